@@ -0,0 +1,82 @@
+"""
+Out-of-sample backtest of tuning configs.
+
+Scores saved tuning / calibration results (and the default parameters) on every
+season with player stats and standings (src/backtest.py). Random search and fit
+mode tune on the 2024-25 table, so 2023-24 is out of sample for them.
+Intermediate stages are cached in output/backtest_cache, so re-running after a
+parameter change only recomputes what depends on it.
+
+Usage:
+    python backtest.py                                      # all saved results
+    python backtest.py --configs output/tuning_results_20260110_144236.json --workers 4
+"""
+import argparse
+import glob
+import json
+import os
+import shutil
+from datetime import datetime
+
+import pandas as pd
+
+from src.backtest import CACHE_DIR, SEASONS, STAGES, run_backtest
+from src.exact import DEFAULT_NODES
+from src.params import DEFAULT_SIM_PARAMS, params_to_config
+from src.power_model import METRIC_DEFAULTS
+
+OUTPUT_DIR = 'output'
+RESULT_GLOBS = ['output/tuning_results_*.json', 'output/calibration_results_*.json']
+
+
+def load_configs(paths):
+    """{name: flat config} from result files with a 'best_config', plus the defaults."""
+    metric_weights = dict(METRIC_DEFAULTS)
+    configs = {'default': params_to_config(DEFAULT_SIM_PARAMS, metric_weights)}
+    for path in paths:
+        with open(path) as f:
+            config = json.load(f).get('best_config')
+        if not config:
+            print(f"[WARN] No 'best_config' in {path}, skipping.")
+            continue
+        configs[os.path.splitext(os.path.basename(path))[0]] = config
+    return configs
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Score tuning configs on every season with known standings.")
+    parser.add_argument('--configs', nargs='+', default=None,
+                        help="Result JSON files (default: all saved tuning and calibration results)")
+    parser.add_argument('--workers', type=int, default=None, help="Worker processes")
+    parser.add_argument('--nodes', type=int, default=DEFAULT_NODES, help="Quadrature nodes for the expected tables")
+    parser.add_argument('--cache-dir', default=CACHE_DIR)
+    parser.add_argument('--clear-cache', action='store_true', help="Delete cached stages first")
+    args = parser.parse_args()
+
+    paths = args.configs or sorted(p for pattern in RESULT_GLOBS for p in glob.glob(pattern))
+    configs = load_configs(paths)
+    if args.clear_cache and os.path.isdir(args.cache_dir):
+        shutil.rmtree(args.cache_dir)
+
+    print(f"Backtesting {len(configs)} configs on seasons {', '.join(SEASONS)}...")
+    rows, stats = run_backtest(configs, cache_dir=args.cache_dir, n_nodes=args.nodes, max_workers=args.workers)
+
+    df = pd.DataFrame(rows)
+    table = df.pivot(index='config', columns='season', values=['error', 'mae', 'rank_corr'])
+    table.columns = [f"{metric} {season}" for metric, season in table.columns]
+    pd.set_option('display.width', 200)
+    print(table.round(3).sort_values(table.columns[0]).to_string())
+
+    computed = ', '.join(f"{stage} {stats['misses'][stage]}" for stage in STAGES)
+    reused = ', '.join(f"{stage} {stats['hits'][stage]}" for stage in STAGES)
+    print(f"\nStages computed: {computed} | reused from cache: {reused}")
+
+    os.makedirs(OUTPUT_DIR, exist_ok=True)
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = f"{OUTPUT_DIR}/backtest_{timestamp}.csv"
+    df.to_csv(output_file, index=False)
+    print(f"Results saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,255 @@
+"""
+Headless scenario runner.
+
+Loads the player data, the league and the tuned parameters once, then evaluates
+every scenario of a scenario file in the same process and writes the results to
+JSON or CSV.
+
+Usage:
+    python batch_runner.py scenarios.json --output output/batch_results.json
+    python batch_runner.py scenarios.json --output output/batch_results.csv --sims 5000
+
+Scenario file: a JSON list (or {"scenarios": [...]}) of objects like
+    {
+        "name": "City without Rodri",
+        "type": "league",                          # "league" (default) or "match"
+        "home": "Liverpool", "away": "Arsenal",    # match scenarios only
+        "num_sims": 10000,
+        "form": true,                              # in-season form model (src/form.py), league only
+        "params": {"sigma": 0.2, "mid_att": 0.8},  # SCENARIO_PARAM_KEYS: match and position-weight keys
+                                                   # (see src/params.py) and form_rate / form_decay
+        "lineups": {"Arsenal": ["David Raya", "..."]},
+        "unavailable": {"Manchester City": ["Rodri"]},
+        "custom_teams": {"All Stars": ["Mohamed Salah", "..."]}
+    }
+"""
+import argparse
+import json
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_loader import load_players_from_csv
+from src.form import simulate_form_seasons
+from src.league import League
+from src.models import Team
+from src.params import METRIC_WEIGHT_KEYS, POSITION_WEIGHT_KEYS, SCALAR_PARAM_KEYS, apply_config, params_key
+from src.simulation import build_fixtures, simulate_matches, simulate_seasons, summarize_seasons
+from src.snapshot import load_snapshot
+
+PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
+DEFAULT_NUM_SIMS = 10000
+RELEGATION_SPOTS = 3
+# Player metric weights are baked into the player scores when the CSV is loaded, so they cannot vary per scenario
+SCENARIO_PARAM_KEYS = SCALAR_PARAM_KEYS + tuple(POSITION_WEIGHT_KEYS)
+
+
+class BatchRunner:
+    def __init__(self, player_csv=PLAYER_CSV, base_params=None, seed=None):
+        print("Loading data...")
+        self.all_players = load_players_from_csv(player_csv)
+        self.league = League(self.all_players)
+        self.players_by_name = {}
+        for p in self.all_players:
+            self.players_by_name.setdefault(p.name, p)
+
+        self.seed = seed
+
+        # Shared tables, reused by every scenario
+        self._power_cache = {}
+        self._fixture_cache = {}
+
+        if base_params is None:
+            # Tuned params and the default XI powers for them come precomputed
+            snapshot = load_snapshot(player_csv)
+            base_params = snapshot.params
+            p_key = params_key(base_params)
+            for name in snapshot.team_names:
+                team = self.league.teams[name]
+                self._power_cache[(name, tuple(sorted(team.squad_pool)), (), (), p_key)] = snapshot.power(name)
+        self.base_params = base_params
+
+    def _fixtures(self, n_teams):
+        if n_teams not in self._fixture_cache:
+            self._fixture_cache[n_teams] = build_fixtures(n_teams)
+        return self._fixture_cache[n_teams]
+
+    def _team_power(self, team, params, p_key, lineup=None, unavailable=None):
+        key = (team.name, tuple(sorted(team.squad_pool)), tuple(lineup or ()),
+               tuple(sorted(unavailable or ())), p_key)
+        if key not in self._power_cache:
+            if lineup is None and unavailable:
+                lineup = [p.name for p in team.get_default_11(exclude=set(unavailable))]
+            self._power_cache[key] = team.calculate_power(params, lineup)
+        return self._power_cache[key]
+
+    def _build_custom_team(self, name, player_names):
+        team = Team(name)
+        for p_name in player_names:
+            if p_name not in self.players_by_name:
+                raise ValueError(f"Player not found: {p_name}")
+            team.add_player(self.players_by_name[p_name])
+        return team
+
+    def _scenario_teams(self, scenario):
+        teams = dict(self.league.teams)
+        for name, player_names in scenario.get('custom_teams', {}).items():
+            if name in teams:
+                raise ValueError(f"Team already exists: {name}")
+            teams[name] = self._build_custom_team(name, player_names)
+
+        for section in ('lineups', 'unavailable'):
+            for name in scenario.get(section, {}):
+                if name not in teams:
+                    raise ValueError(f"Team not found in '{section}': {name}")
+        return teams
+
+    def _scenario_powers(self, scenario, teams, team_names, params):
+        p_key = params_key(params)
+        lineups = scenario.get('lineups', {})
+        unavailable = scenario.get('unavailable', {})
+        powers = [self._team_power(teams[name], params, p_key, lineups.get(name), unavailable.get(name))
+                  for name in team_names]
+        att, dfn = np.array(powers).T
+        return att, dfn
+
+    def _scenario_params(self, scenario):
+        overrides = scenario.get('params', {})
+        if not isinstance(overrides, dict):
+            raise ValueError("'params' must be an object")
+        unsupported = [k for k in overrides if k in METRIC_WEIGHT_KEYS]
+        if unsupported:
+            raise ValueError(f"Metric weights are not supported in scenarios: {', '.join(unsupported)}")
+        unknown = [k for k in overrides if k not in SCENARIO_PARAM_KEYS]
+        if unknown:
+            raise ValueError(f"Unknown params: {', '.join(unknown)}")
+        return apply_config(self.base_params, overrides)
+
+    def run_scenario(self, scenario, rng):
+        params = self._scenario_params(scenario)
+        num_sims = int(scenario.get('num_sims', DEFAULT_NUM_SIMS))
+        teams = self._scenario_teams(scenario)
+        kind = scenario.get('type', 'league')
+
+        if kind == 'match':
+            h_name, a_name = scenario['home'], scenario['away']
+            for name in (h_name, a_name):
+                if name not in teams:
+                    raise ValueError(f"Team not found: {name}")
+            (h_att, a_att), (h_def, a_def) = self._scenario_powers(scenario, teams, [h_name, a_name], params)
+            gh, ga = simulate_matches(h_att, h_def, a_att, a_def, params, num_sims, rng)
+            return {
+                'home': h_name,
+                'away': a_name,
+                'home_win': float(np.mean(gh > ga)),
+                'draw': float(np.mean(gh == ga)),
+                'away_win': float(np.mean(gh < ga)),
+                'avg_home_goals': float(gh.mean()),
+                'avg_away_goals': float(ga.mean()),
+            }
+
+        if kind != 'league':
+            raise ValueError(f"Unknown scenario type: {kind}")
+
+        team_names = list(teams.keys())
+        att, dfn = self._scenario_powers(scenario, teams, team_names, params)
+        if scenario.get('form'):
+            seasons = simulate_form_seasons(att, dfn, params, num_sims, rng=rng)
+        else:
+            seasons = simulate_seasons(att, dfn, params, num_sims,
+                                       fixtures=self._fixtures(len(team_names)), rng=rng)
+        return {'table': summarize_seasons(team_names, seasons, RELEGATION_SPOTS)}
+
+    def run_all(self, scenarios):
+        results = []
+        start = time.perf_counter()
+        for i, scenario in enumerate(scenarios):
+            is_object = isinstance(scenario, dict)
+            name = scenario.get('name', f'scenario_{i + 1}') if is_object else f'scenario_{i + 1}'
+            rng = np.random.default_rng(None if self.seed is None else [self.seed, i])
+            entry = {'name': name, 'type': scenario.get('type', 'league') if is_object else None,
+                     'num_sims': None}
+            try:
+                if not is_object:
+                    raise ValueError("Scenario must be a JSON object")
+                entry['num_sims'] = int(scenario.get('num_sims', DEFAULT_NUM_SIMS))
+                entry.update(self.run_scenario(scenario, rng))
+            # Malformed fields (e.g. a list where an object is expected) fail with TypeError / AttributeError
+            except (KeyError, ValueError, TypeError, AttributeError) as e:
+                print(f"[WARN] Scenario '{name}' failed: {e}")
+                entry['error'] = str(e)
+            results.append(entry)
+
+        elapsed = time.perf_counter() - start
+        rate = len(scenarios) / elapsed * 60 if elapsed > 0 else float('inf')
+        print(f"Evaluated {len(scenarios)} scenarios in {elapsed:.1f}s ({rate:.0f} scenarios/min)")
+        return results
+
+
+def load_scenarios(filepath):
+    with open(filepath, 'r') as f:
+        data = json.load(f)
+    if isinstance(data, dict):
+        data = data.get('scenarios', [])
+    return data
+
+
+def results_to_frame(results):
+    """Flatten results to one row per (scenario, team) for league runs and one row per match run."""
+    rows = []
+    for res in results:
+        base = {'scenario': res['name'], 'type': res['type'], 'num_sims': res['num_sims']}
+        if 'error' in res:
+            rows.append({**base, 'error': res['error']})
+        elif res['type'] == 'match':
+            rows.append({**base, **{k: v for k, v in res.items() if k not in base and k != 'name'}})
+        else:
+            for pos, row in enumerate(res['table'], start=1):
+                flat = {k: v for k, v in row.items() if k != 'Positions'}
+                rows.append({**base, 'Pos': pos, **flat})
+    frame = pd.DataFrame(rows)
+    # Malformed scenarios have no num_sims; keep the column integer
+    if 'num_sims' in frame:
+        frame['num_sims'] = frame['num_sims'].astype('Int64')
+    return frame
+
+
+def write_results(results, filepath, fmt=None):
+    fmt = fmt or ('csv' if filepath.endswith('.csv') else 'json')
+    out_dir = os.path.dirname(filepath)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+
+    if fmt == 'csv':
+        results_to_frame(results).to_csv(filepath, index=False)
+    else:
+        with open(filepath, 'w') as f:
+            json.dump(results, f, indent=2)
+    print(f"Results saved to {filepath}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run simulation scenarios without the interactive menu.")
+    parser.add_argument('scenarios', help="Path to the scenario JSON file")
+    parser.add_argument('--output', default='output/batch_results.json', help="Output file (.json or .csv)")
+    parser.add_argument('--format', choices=['json', 'csv'], default=None, help="Override output format")
+    parser.add_argument('--sims', type=int, default=None, help="Default num_sims for scenarios that omit it")
+    parser.add_argument('--players', default=PLAYER_CSV, help="Player stats CSV")
+    parser.add_argument('--seed', type=int, default=None, help="Base seed for reproducible runs")
+    args = parser.parse_args()
+
+    scenarios = load_scenarios(args.scenarios)
+    if args.sims is not None:
+        for s in scenarios:
+            if isinstance(s, dict):
+                s.setdefault('num_sims', args.sims)
+
+    runner = BatchRunner(args.players, seed=args.seed)
+    results = runner.run_all(scenarios)
+    write_results(results, args.output, args.format)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Engine benchmarks.
+
+Times the reference scalar path (League.simulate_match_fast in Python loops)
+against the vectorized NumPy engine and the optional Numba kernel, measures the
+effective sample-size gain of randomized QMC over plain Monte Carlo, the
+latency of thread and process execution (src/executors.py), profiles peak
+memory per stage (src/memory.py) with and without a memory budget, times
+player search (src/player_index.py) on a large synthetic index, and saves the
+numbers to output/benchmark_<timestamp>.json.
+
+Usage:
+    python benchmark.py
+    python benchmark.py --sims 200 1000 10000
+    python benchmark.py --memory-sims 200000 --memory-mb 256
+    python benchmark.py --search-rows 300000
+"""
+import argparse
+import copy
+import json
+import time
+from datetime import datetime
+
+import numpy as np
+
+from src.data_loader import load_players_from_csv
+from src.equivalence import reference_seasons
+from src.executors import SimulationExecutor
+from src.kernels import HAS_NUMBA
+from src.league import League
+from src.memory import MemoryProfiler, set_memory_budget
+from src.params import DEFAULT_SIM_PARAMS
+from src.player_index import PlayerIndex
+from src.simulation import simulate_matches, simulate_seasons
+
+PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
+OUTPUT_DIR = 'output'
+SEARCH_QUERIES = ['odegard', 'sal', 'van dijk', 'saka', 'bruno fernandes', 'a']
+SEARCH_TARGET_MS = 1.0
+
+
+def time_call(fn, repeats=3):
+    best = float('inf')
+    for _ in range(repeats):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_engines(league, att, dfn, params, sims_list, reference_sims=20):
+    results = {'numba_available': HAS_NUMBA, 'runs': []}
+
+    ref_time = time_call(lambda: reference_seasons(league, att, dfn, params, reference_sims), repeats=1)
+    ref_per_season = ref_time / reference_sims
+    print(f"  reference: {ref_per_season * 1e3:.2f} ms/season")
+    results['reference_ms_per_season'] = ref_per_season * 1e3
+
+    engines = ['numpy'] + (['numba'] if HAS_NUMBA else [])
+    if HAS_NUMBA:
+        start = time.perf_counter()
+        simulate_seasons(att, dfn, params, 1, engine='numba')
+        results['numba_first_call_s'] = time.perf_counter() - start
+        print(f"  numba first call (compile or disk-cache load): {results['numba_first_call_s']:.2f}s")
+
+    for num_sims in sims_list:
+        for engine in engines:
+            rng = np.random.default_rng(0)
+            elapsed = time_call(lambda: simulate_seasons(att, dfn, params, num_sims, rng=rng, engine=engine))
+            speedup = ref_per_season * num_sims / elapsed
+            print(f"  {engine:<6} {num_sims:>7} seasons: {elapsed * 1e3:9.1f} ms  ({speedup:.0f}x reference)")
+            results['runs'].append({'engine': engine, 'num_sims': num_sims,
+                                    'seconds': elapsed, 'speedup_vs_reference': speedup})
+    return results
+
+
+def replicate_estimates(estimate, replicates, seed):
+    """Per-replicate estimates and the mean time per replicate."""
+    start = time.perf_counter()
+    values = np.array([estimate(rng) for rng in np.random.default_rng(seed).spawn(replicates)])
+    return values, (time.perf_counter() - start) / replicates
+
+
+def ess_gain(mc_values, qmc_values):
+    """Variance ratio MC / RQMC at equal sample size, i.e. how many MC samples one QMC sample is worth."""
+    var_mc = mc_values.var(axis=0, ddof=1)
+    var_qmc = np.maximum(qmc_values.var(axis=0, ddof=1), 1e-300)
+    return var_mc / var_qmc
+
+
+def bench_qmc(att, dfn, params, num_sims=1024, replicates=16, seed=0):
+    """
+    Plain MC vs randomized QMC (src/qmc.py) at the same number of samples, over
+    independent replicates. Reports the variance ratio (ESS gain) per quantity,
+    and the gain per second once the extra cost of the Sobol points is included.
+    """
+    results = {'num_sims': num_sims, 'replicates': replicates, 'match': {}, 'season': {}}
+    h, a = int(np.argmax(att - dfn)), int(np.argmin(att - dfn))
+
+    def match_estimate(engine):
+        def estimate(rng):
+            gh, ga = simulate_matches(att[h], dfn[h], att[a], dfn[a], params, num_sims, rng, engine=engine)
+            return [np.mean(gh > ga), np.mean(gh == ga), np.mean(gh)]
+        return estimate
+
+    def season_estimate(engine):
+        def estimate(rng):
+            seasons = simulate_seasons(att, dfn, params, num_sims, rng=rng, engine=engine)
+            return np.concatenate([seasons['points'].mean(axis=0), np.mean(seasons['positions'] == 1, axis=0)])
+        return estimate
+
+    mc, t_mc = replicate_estimates(match_estimate('numpy'), replicates, seed)
+    qm, t_qmc = replicate_estimates(match_estimate('qmc'), replicates, seed)
+    gains = ess_gain(mc, qm)
+    for name, gain in zip(['home_win', 'draw', 'home_goals'], gains):
+        results['match'][name] = {'ess_gain': float(gain), 'gain_per_second': float(gain * t_mc / t_qmc)}
+        print(f"  match  {name:<18} ESS gain {gain:7.1f}x  ({gain * t_mc / t_qmc:.1f}x per second)")
+
+    mc, t_mc = replicate_estimates(season_estimate('auto'), replicates, seed)
+    qm, t_qmc = replicate_estimates(season_estimate('qmc'), replicates, seed)
+    n = len(att)
+    gains = ess_gain(mc, qm)
+    # Title odds only where the title is actually contested, the others have ~0 variance
+    contested = mc[:, n:].mean(axis=0) > 0.01
+    summary = {'expected_points': gains[:n], 'title_probability': gains[n:][contested]}
+    for name, g in summary.items():
+        gain = float(np.median(g)) if len(g) else float('nan')
+        results['season'][name] = {'ess_gain_median': gain, 'gain_per_second': gain * t_mc / t_qmc}
+        print(f"  season {name:<18} ESS gain {gain:7.1f}x  ({gain * t_mc / t_qmc:.1f}x per second, median over teams)")
+    return results
+
+
+def bench_backends(att, dfn, params, sims_list, max_workers=None):
+    """
+    Wall time of simulate_seasons through a thread and a process SimulationExecutor:
+    the first call on a new executor (cold: includes starting the pool) and the
+    best of the following calls (warm).
+    """
+    results = []
+    for backend in ('thread', 'process'):
+        for num_sims in sims_list:
+            executor = SimulationExecutor(backend, max_workers, seed=0)
+            start = time.perf_counter()
+            executor.simulate_seasons(att, dfn, params, num_sims)
+            cold = time.perf_counter() - start
+            warm = time_call(lambda: executor.simulate_seasons(att, dfn, params, num_sims))
+            executor.shutdown()
+            print(f"  {backend:<8} {num_sims:>7} seasons: cold {cold * 1e3:8.1f} ms, warm {warm * 1e3:8.1f} ms")
+            results.append({'backend': backend, 'num_sims': num_sims, 'cold_seconds': cold, 'warm_seconds': warm})
+    return results
+
+
+def bench_memory(att, dfn, params, num_sims, budget_mb, profiler=None):
+    """
+    Peak memory of each season engine at num_sims seasons, first with the default
+    chunk sizes, then with chunk sizes chosen for budget_mb. The traced peak of a
+    budgeted run should stay under the budget.
+    """
+    profiler = profiler or MemoryProfiler()
+    engines = ['numpy', 'qmc'] + (['numba'] if HAS_NUMBA else [])
+    for budget in (None, budget_mb):
+        set_memory_budget(budget)
+        for engine in engines:
+            label = f"{engine} {num_sims}" + (f" ({budget:g} MB budget)" if budget else '')
+            with profiler.stage(label):
+                simulate_seasons(att, dfn, params, num_sims, rng=np.random.default_rng(0), engine=engine)
+    set_memory_budget(None)
+    profiler.print_report()
+
+    stages = profiler.stages
+    budgeted = [s for s in stages if 'budget' in s['stage']]
+    within = all(s['traced_peak_mb'] <= budget_mb for s in budgeted)
+    print(f"  Budgeted runs {'stay within' if within else 'EXCEED'} {budget_mb:g} MB")
+    return {'num_sims': num_sims, 'budget_mb': budget_mb, 'within_budget': within, 'stages': stages}
+
+
+def synthetic_players(players, num_rows, seed=0):
+    """
+    num_rows distinct players: the real ones plus copies named by recombining real
+    first and last names, so common n-grams are as common as in a real large export.
+    """
+    rng = np.random.default_rng(seed)
+    firsts = sorted({p.name.split()[0] for p in players})
+    lasts = sorted({p.name.split()[-1] for p in players})
+    names = {p.name for p in players}
+    result = list(players)
+    while len(result) < num_rows:
+        # Half get a second surname, otherwise the first x last combinations run out
+        lasts_idx = rng.integers(len(lasts), size=1 + (rng.random() < 0.5))
+        name = ' '.join([firsts[rng.integers(len(firsts))]] + [lasts[i] for i in lasts_idx])
+        if name in names:
+            continue
+        names.add(name)
+        player = copy.copy(players[rng.integers(len(players))])
+        player.name = name
+        player.minutes_played = float(rng.integers(0, 3420))
+        result.append(player)
+    return result
+
+
+def bench_search(players, num_rows, queries=SEARCH_QUERIES, target_ms=SEARCH_TARGET_MS):
+    """Build time of a PlayerIndex over num_rows synthetic players and the best time per query."""
+    start = time.perf_counter()
+    index = PlayerIndex(synthetic_players(players, num_rows))
+    build = time.perf_counter() - start
+    print(f"  index of {len(index)} players built in {build:.1f}s")
+    timings = {}
+    for query in queries:
+        timings[query] = time_call(lambda: index.search(query), repeats=50) * 1e3
+        print(f"  {query!r:<18} {timings[query]:.2f} ms")
+    within = max(timings.values()) <= target_ms
+    print(f"  Queries {'stay within' if within else 'EXCEED'} {target_ms:g} ms")
+    return {'rows': len(index), 'build_seconds': build, 'query_ms': timings, 'within_target': within}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulation engines.")
+    parser.add_argument('--sims', type=int, nargs='+', default=[50, 1000, 10000])
+    parser.add_argument('--players', default=PLAYER_CSV)
+    parser.add_argument('--qmc-sims', type=int, default=1024, help="Samples per replicate (power of two)")
+    parser.add_argument('--replicates', type=int, default=16)
+    parser.add_argument('--memory-sims', type=int, default=100000, help="Seasons per engine in the memory profile")
+    parser.add_argument('--memory-mb', type=float, default=128, help="Memory budget to check the chunk sizing against")
+    parser.add_argument('--search-rows', type=int, default=300000, help="Players in the synthetic search index")
+    args = parser.parse_args()
+
+    profiler = MemoryProfiler()
+    with profiler.stage('load players'):
+        players = load_players_from_csv(args.players)
+        league = League(players)
+    params = DEFAULT_SIM_PARAMS
+    powers = np.array([t.calculate_power(params) for t in league.teams.values()])
+    att, dfn = powers[:, 0], powers[:, 1]
+
+    print("--- Season engines ---")
+    report = {'engines': bench_engines(league, att, dfn, params, args.sims)}
+
+    print("\n--- Quasi-Monte Carlo vs Monte Carlo ---")
+    report['qmc'] = bench_qmc(att, dfn, params, args.qmc_sims, args.replicates)
+
+    print("\n--- Thread vs process execution ---")
+    report['backends'] = bench_backends(att, dfn, params, args.sims)
+
+    print("\n--- Memory per stage ---")
+    report['memory'] = bench_memory(att, dfn, params, args.memory_sims, args.memory_mb, profiler)
+
+    print("\n--- Player search ---")
+    report['search'] = bench_search(players, args.search_rows)
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = f"{OUTPUT_DIR}/benchmark_{timestamp}.json"
+    with open(output_file, 'w') as f:
+        json.dump(report, f, indent=2)
+    print(f"\nResults saved to {output_file}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Statistical equivalence check of the simulation engines.
+
+Runs the reference scalar path (League.simulate_match_fast in Python loops)
+and every vectorized engine on the tuned team powers with fixed seeds, and
+compares outcome frequencies, goal distributions and league positions with
+two-sample tests (src/equivalence.py). Exits with status 1 if any engine
+differs beyond the Bonferroni-corrected threshold, so it can gate a new engine.
+
+Usage:
+    python equivalence_check.py
+    python equivalence_check.py --engines numba qmc --season-sims 5000 --match-sims 100000
+"""
+import argparse
+import sys
+import time
+
+import numpy as np
+
+from src.data_loader import load_players_from_csv
+from src.equivalence import (FAMILY_ALPHA, MATCH_ENGINES, SEASON_ENGINES, check_match_engine, check_season_engine,
+                             judge, reference_seasons)
+from src.league import League
+from src.snapshot import load_snapshot
+
+PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
+
+
+def test_fixtures(team_names, att, dfn):
+    """Strongest at home to the weakest, the reverse, and two mid-table sides."""
+    order = np.argsort(-(att + dfn))
+    strong, weak, mid = order[0], order[-1], order[len(order) // 2 - 1:len(order) // 2 + 1]
+    pairs = [(strong, weak), (weak, strong), tuple(mid)]
+    return [(f"{team_names[h]} v {team_names[a]}", att[h], dfn[h], att[a], dfn[a]) for h, a in pairs]
+
+
+def report(engine, rows, family_alpha):
+    passed, threshold = judge(rows, family_alpha)
+    worst = min(rows, key=lambda row: row['p_value'])
+    status = "PASS" if passed else "FAIL"
+    print(f"  {engine:<8} {status}  {len(rows)} checks, smallest p = {worst['p_value']:.2g} "
+          f"({worst['check']}: {worst['test']}), threshold {threshold:.2g}")
+    for row in rows:
+        if not row['passed']:
+            print(f"      {row['check']}: {row['test']} p = {row['p_value']:.2g} {row['detail']}")
+    return passed
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that the vectorized engines match the reference distributions.")
+    parser.add_argument('--engines', nargs='+', default=None,
+                        help=f"Engines to check (default: all of {', '.join(sorted(set(MATCH_ENGINES) | set(SEASON_ENGINES)))})")
+    parser.add_argument('--match-sims', type=int, default=50000, help="Samples per test fixture")
+    parser.add_argument('--season-sims', type=int, default=2000, help="Seasons per engine (the reference loop is slow)")
+    parser.add_argument('--alpha', type=float, default=FAMILY_ALPHA,
+                        help="Probability that a correct engine fails (per engine, Bonferroni over its checks)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--players', default=PLAYER_CSV)
+    args = parser.parse_args()
+
+    snapshot = load_snapshot(args.players)
+    params, att, dfn, team_names = snapshot.params, snapshot.att, snapshot.dfn, snapshot.team_names
+    league = League(load_players_from_csv(args.players))
+    engines = args.engines or sorted(set(MATCH_ENGINES) | set(SEASON_ENGINES))
+    unknown = [e for e in engines if e not in MATCH_ENGINES and e not in SEASON_ENGINES]
+    if unknown:
+        parser.error(f"Unknown engines: {', '.join(unknown)}")
+
+    all_passed = True
+    match_engines = [e for e in engines if e in MATCH_ENGINES]
+    if match_engines:
+        fixtures = test_fixtures(team_names, att, dfn)
+        print(f"--- Matches: {args.match_sims} samples of {len(fixtures)} fixtures per engine ---")
+        for engine in match_engines:
+            rows = check_match_engine(engine, league, fixtures, params, args.match_sims, args.seed)
+            all_passed &= report(engine, rows, args.alpha)
+
+    season_engines = [e for e in engines if e in SEASON_ENGINES]
+    if season_engines:
+        print(f"\n--- Seasons: {args.season_sims} per engine ---")
+        t0 = time.perf_counter()
+        reference = reference_seasons(league, att, dfn, params, args.season_sims, args.seed)
+        print(f"  reference loop: {time.perf_counter() - t0:.1f}s")
+        for engine in season_engines:
+            rows = check_season_engine(engine, team_names, att, dfn, params, args.season_sims, args.seed, reference)
+            all_passed &= report(engine, rows, args.alpha)
+
+    print("\nAll engines equivalent to the reference." if all_passed else "\nSome engines differ from the reference.")
+    sys.exit(0 if all_passed else 1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,3 +1,5 @@
+import argparse
+import heapq
 import itertools
 import json
 import numpy as np
@@ -9,11 +11,23 @@ from tqdm import tqdm
 from typing import Dict, List, Any, Tuple
 import concurrent.futures
 import multiprocessing
+import subprocess
+import threading
+import time
 
-from src.data_loader import load_players_from_csv
+from src.data_loader import load_match_results, load_player_records, load_players_from_csv
+from src.calibration import calibrate
+from src.fitting import fit_parameters
 from src.league import League
+from src.memory import MB, memory_budget_mb, set_memory_budget, workers_for_budget
 from src.models import Team, Player
+from src.params import DEFAULT_SIM_PARAMS, apply_config, build_metric_weights, find_latest_tuning_file, params_to_config
+from src.power_model import METRIC_DEFAULTS, TeamPowerModel
+from src.simulation import RESULT_BYTES_PER_TEAM, simulate_seasons
+from src.snapshot import build_snapshot, snapshot_path
+from src.sweep import SWEEP_SIMS, sweep_grid
 from src.utils import calculate_player_metrics, simplify_position, compute_error
+from src.work_queue import WorkQueue, default_worker_id
 
 # ============================================================================
 # CONFIGURATION & CONSTANTS
@@ -21,6 +35,9 @@ from src.utils import calculate_player_metrics, simplify_position, compute_error
 
 PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
 OUTPUT_DIR = 'output'
+HISTORY_SIZE = 10
+# Resident memory of a worker process before it simulates (interpreter, numpy, pandas, numba)
+WORKER_BASE_MB = 200
 
 # Ground Truth: 2024-25 Premier League Standings
 GROUND_TRUTH = [
@@ -67,6 +84,19 @@ PARAM_CONFIG = {
     'prg_weight': {'range': (0.05, 0.5), 'importance': 5, 'type': 'float'},
 }
 
+# Match-level calibration (--mode calibrate) fits to 2023-24 match scores.
+# Attack power is linear in the metric weights, so their overall scale is only
+# identified against scaling_factor once one of them is held fixed.
+MATCH_CSV = 'data/raw/match_stats_2023-24.csv'
+MATCH_PLAYER_CSV = 'data/raw/player_stats_2023-24.csv'
+CALIBRATION_FIXED = {'xg_weight': 15.0}
+CALIBRATION_CONFIG = {k: v for k, v in PARAM_CONFIG.items() if k not in CALIBRATION_FIXED}
+CALIBRATION_CONFIG.update({
+    'sigma': {'range': (0.0, 0.35), 'type': 'float'},
+    'scaling_factor': {'range': (100, 10000), 'type': 'int'},
+    'league_avg_goals': {'range': (0.5, 3.0), 'type': 'float'},
+})
+
 # ============================================================================
 # HELPER CLASSES
 # ============================================================================
@@ -95,28 +125,56 @@ class SilentOutput:
 # WORKER FUNCTION
 # ============================================================================
 
+# Set once per worker process by init_trial_worker instead of being pickled with every task
+_worker_data = {}
+
+
+def init_trial_worker(raw_player_data, ground_truth, memory_mb=None):
+    _worker_data['players'] = raw_player_data
+    _worker_data['ground_truth'] = ground_truth
+    # The worker's share of the budget; the coordinating process keeps the full one
+    if memory_mb is not None:
+        set_memory_budget(memory_mb)
+
+
+def trial_workers(num_sims, max_workers=None):
+    """
+    (worker processes, per-worker budget in MB) for trials of num_sims seasons.
+    With a memory budget, only as many workers as fit, and each gets an equal share
+    of what is left for simulation (pass it to init_trial_worker); without one the
+    per-worker budget is None.
+    """
+    budget = memory_budget_mb()
+    per_worker = WORKER_BASE_MB * MB + num_sims * len(GROUND_TRUTH) * RESULT_BYTES_PER_TEAM * 2
+    workers = workers_for_budget(per_worker, max_workers=max_workers)
+    if budget is not None:
+        if budget * MB < per_worker:
+            raise MemoryError(f"Memory budget of {budget:.0f} MB is too small for one worker "
+                              f"({per_worker / MB:.0f} MB at {num_sims} sims/trial)")
+        return workers, budget / workers - WORKER_BASE_MB
+    return workers, None
+
+
+_trial_ids = itertools.count()
+
+
+def record_trial(history, config, error):
+    """Keep the HISTORY_SIZE lowest-error trials in history, a heap on -error."""
+    entry = (-error, next(_trial_ids), {'config': config, 'error': error})
+    if len(history) < HISTORY_SIZE:
+        heapq.heappush(history, entry)
+    else:
+        heapq.heappushpop(history, entry)
+
+
 def run_single_trial(args: Tuple) -> Tuple[Dict[str, Any], float]:
-    config, raw_player_data, ground_truth, num_sims = args
-    
+    config, num_sims = args
+    raw_player_data, ground_truth = _worker_data['players'], _worker_data['ground_truth']
+
     with SilentOutput():
         # 1. Weights
-        metric_weights = {
-            'gls': config['gls_weight'], 'ast': config['ast_weight'],
-            'xg': config['xg_weight'], 'xag': config['xag_weight'],
-            'prg': config['prg_weight'],
-        }
-        
-        sim_params = {
-            'sigma': config['sigma'], 'scaling_factor': config['scaling_factor'],
-            'league_avg_goals': 1.6395, 'home_adv': config['home_adv'],
-            'weights': {
-                'ATT': {'att': 1.0, 'def': config['att_def']},
-                'MID': {'att': config['mid_att'], 'def': config['mid_def']},
-                'DEF': {'att': config['def_att'], 'def': 1.0},
-                'GK':  {'att': 0.0, 'def': 0.0},
-                'UNK': {'att': 0.5, 'def': 0.5}
-            }
-        }
+        metric_weights = build_metric_weights(config)
+        sim_params = apply_config(DEFAULT_SIM_PARAMS, config)
         
         # 2. Build League with SimplePlayer
         teams = {}
@@ -137,27 +195,11 @@ def run_single_trial(args: Tuple) -> Tuple[Dict[str, Any], float]:
         league.teams = teams
         league._calibrate_league() 
 
-        # 3. Simulate
-        team_powers = {name: t.calculate_power(sim_params) for name, t in league.teams.items()}
-        total_points = {name: 0 for name in league.teams}
+        # 3. Simulate (vectorized, numba kernel when available)
         team_names = list(league.teams.keys())
-        
-        for _ in range(num_sims):
-            season_points = {name: 0 for name in league.teams}
-            for i in range(len(team_names)):
-                for j in range(len(team_names)):
-                    if i == j: continue
-                    h, a = team_names[i], team_names[j]
-                    h_att, h_def = team_powers[h]
-                    a_att, a_def = team_powers[a]
-                    
-                    gh, ga = league.simulate_match_fast(h_att, h_def, a_att, a_def, sim_params)
-                    if gh > ga: season_points[h] += 3
-                    elif ga > gh: season_points[a] += 3
-                    else:
-                        season_points[h] += 1
-                        season_points[a] += 1
-            for t in total_points: total_points[t] += season_points[t]
+        team_powers = np.array([league.teams[name].calculate_power(sim_params) for name in team_names])
+        seasons = simulate_seasons(team_powers[:, 0], team_powers[:, 1], sim_params, num_sims)
+        total_points = dict(zip(team_names, seasons['points'].sum(axis=0).tolist()))
         
         results = sorted([{'Team': t, 'Points': pts/num_sims} for t, pts in total_points.items()], 
                         key=lambda x: x['Points'], reverse=True)
@@ -173,14 +215,7 @@ class LeagueOptimizer:
 
     def _load_data(self) -> List[Dict]:
         try:
-            df = pd.read_csv(self.player_data_path)
-            df.fillna(0, inplace=True)
-            from src.data_loader import standardize_team_name
-            if 'Squad' not in df.columns and 'Team' in df.columns:
-                df['Squad'] = df['Team']
-            if 'Squad' in df.columns:
-                df['Squad'] = df['Squad'].apply(standardize_team_name)
-            return df.to_dict('records')
+            return load_player_records(self.player_data_path, lineups_only=True)
         except Exception as e:
             print(f"Error loading data: {e}")
             return []
@@ -202,30 +237,159 @@ class LeagueOptimizer:
         return {param: np.random.choice(values) for param, values in self.param_pools.items()}
 
     def search_parallel(self, n_trials=100, sims_per_trial=50):
-        # Use all available logical cores
-        max_workers = os.cpu_count() or 1
+        # All logical cores, or as many workers as fit the memory budget
+        max_workers, worker_budget = trial_workers(sims_per_trial)
             
         print(f"Starting Parallel Search: {n_trials} trials, {sims_per_trial} sims/trial")
-        print(f"Utilizing all {max_workers} CPU threads.")
+        print(f"Utilizing {max_workers} of {os.cpu_count() or 1} CPU threads.")
         
-        trial_args = [(self.get_random_config(), self.raw_player_data, self.ground_truth, sims_per_trial) 
-                      for _ in range(n_trials)]
+        trial_args = [(self.get_random_config(), sims_per_trial) for _ in range(n_trials)]
             
         best_error = float('inf')
         best_config = None
         history = []
         
         # smoothing=0 makes ETA based on total average, which is more stable for parallel starts
-        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=init_trial_worker,
+                                                    initargs=(self.raw_player_data, self.ground_truth,
+                                                              worker_budget)) as executor:
             futures = [executor.submit(run_single_trial, arg) for arg in trial_args]
             for future in tqdm(concurrent.futures.as_completed(futures), total=n_trials, desc="Optimizing", smoothing=0):
                 config, error = future.result()
-                history.append({'config': config, 'error': error})
+                record_trial(history, config, error)
                 if error < best_error:
                     best_error, best_config = error, config
                     tqdm.write(f"  New Best: MSE={error:.2f}")
 
-        return best_config, best_error, history
+        return best_config, best_error, [entry for _, _, entry in history]
+
+    def search_distributed(self, queue_dir, n_trials=100, sims_per_trial=50, batch_size=20,
+                           lease_timeout=120, poll_interval=2.0, local_workers=0):
+        """
+        Coordinator side of the shared-directory queue (src/work_queue.py).
+        Splits the trials into batches, waits for workers on any machine that can
+        see queue_dir and merges their results. Re-running with the same
+        queue_dir resumes instead of starting over.
+        local_workers: also start this many worker processes on this machine.
+        """
+        queue = WorkQueue(queue_dir, json_kwargs={'cls': NumpyEncoder})
+        if queue.exists():
+            print(f"Resuming queue {queue_dir}")
+        else:
+            configs = [self.get_random_config() for _ in range(n_trials)]
+            batches = [configs[i:i + batch_size] for i in range(0, n_trials, batch_size)]
+            queue.create({'player_csv': self.player_data_path, 'ground_truth': self.ground_truth,
+                          'sims_per_trial': sims_per_trial, 'lease_timeout': lease_timeout},
+                         batches)
+        job = queue.job()
+        batch_ids = set(job['batch_ids'])
+        print(f"Coordinating {len(batch_ids)} batches in {queue_dir} "
+              f"({job['sims_per_trial']} sims/trial, lease timeout {job['lease_timeout']}s)")
+
+        procs = []
+        if local_workers:
+            per_worker = max(1, (os.cpu_count() or 1) // local_workers)
+            budget = memory_budget_mb()
+            command = [sys.executable, os.path.abspath(__file__), '--mode', 'worker',
+                       '--queue', queue_dir, '--processes', str(per_worker)]
+            if budget is not None:
+                # The local workers share this machine's budget
+                command += ['--memory-mb', str(budget / local_workers)]
+            for _ in range(local_workers):
+                procs.append(subprocess.Popen(command))
+
+        best_error, best_config = float('inf'), None
+        history, failures, merged, n_trials = [], [], {}, 0
+        with tqdm(total=len(batch_ids), desc="Batches", smoothing=0) as bar:
+            while len(merged) < len(batch_ids):
+                for batch_id in queue.requeue_expired(job['lease_timeout']):
+                    tqdm.write(f"  Lease expired, requeued {batch_id}")
+                for batch_id, result in queue.results(skip=merged).items():
+                    merged[batch_id] = result['worker']
+                    for trial in result['trials']:
+                        if trial.get('failure'):
+                            failures.append(trial)
+                            continue
+                        record_trial(history, trial['config'], trial['error'])
+                        n_trials += 1
+                        if trial['error'] < best_error:
+                            best_error, best_config = trial['error'], trial['config']
+                            tqdm.write(f"  New Best: MSE={best_error:.2f} (from {result['worker']})")
+                    bar.update(1)
+                if len(merged) < len(batch_ids):
+                    time.sleep(poll_interval)
+
+        queue.mark_finished()
+        for proc in procs:
+            proc.wait()
+        workers = sorted(set(merged.values()))
+        print(f"Merged {n_trials} trials from {len(workers)} worker(s): {', '.join(workers)}")
+        if failures:
+            print(f"[WARN] {len(failures)} trials failed, e.g.: {failures[0]['failure']}")
+        return best_config, best_error, [entry for _, _, entry in history]
+
+
+def _keep_lease_alive(lease, stop, interval):
+    while not stop.wait(interval):
+        lease.heartbeat()
+
+
+def run_worker(queue_dir, processes=None, poll_interval=2.0):
+    """
+    Worker side of the shared-directory queue: lease batches of configs, run them
+    on this machine's cores and write the errors back, until the coordinator
+    marks the queue finished. Survives the shared directory disappearing for a
+    while; a batch it could not finish is requeued by the coordinator.
+    """
+    queue = WorkQueue(queue_dir, json_kwargs={'cls': NumpyEncoder})
+    worker_id = default_worker_id()
+    print(f"Worker {worker_id} waiting for {queue_dir}")
+    while not queue.exists():
+        time.sleep(poll_interval)
+    job = queue.job()
+    optimizer = LeagueOptimizer(job['player_csv'], job['ground_truth'])
+    heartbeat_interval = job['lease_timeout'] / 4
+
+    done = 0
+    processes, worker_budget = trial_workers(job['sims_per_trial'], max_workers=processes)
+    with concurrent.futures.ProcessPoolExecutor(max_workers=processes, initializer=init_trial_worker,
+                                                initargs=(optimizer.raw_player_data, optimizer.ground_truth,
+                                                          worker_budget)) as executor:
+        while True:
+            try:
+                if queue.is_finished():
+                    break
+                lease = queue.claim()
+            except OSError as e:
+                print(f"[WARN] Queue unavailable ({e}), retrying...")
+                time.sleep(poll_interval)
+                continue
+            if lease is None:
+                time.sleep(poll_interval)
+                continue
+
+            stop = threading.Event()
+            keeper = threading.Thread(target=_keep_lease_alive, args=(lease, stop, heartbeat_interval), daemon=True)
+            keeper.start()
+            futures = {executor.submit(run_single_trial, (config, job['sims_per_trial'])): config
+                       for config in lease.payload}
+            trials = []
+            for future in concurrent.futures.as_completed(futures):
+                try:
+                    config, error = future.result()
+                    trials.append({'config': config, 'error': error})
+                except Exception as e:
+                    trials.append({'config': futures[future], 'failure': f"{type(e).__name__}: {e}"})
+            stop.set()
+            keeper.join()
+
+            try:
+                lease.complete({'worker': worker_id, 'trials': trials})
+                done += 1
+            except OSError as e:
+                # The coordinator will requeue the lease once it expires
+                print(f"[WARN] Could not report {lease.batch_id} ({e})")
+    print(f"Worker {worker_id} finished after {done} batches")
 
 
 class NumpyEncoder(json.JSONEncoder):
@@ -245,17 +409,175 @@ class NumpyEncoder(json.JSONEncoder):
             return obj.tolist()
         return super(NumpyEncoder, self).default(obj)
 
+def run_calibration(match_csv=MATCH_CSV, player_csv=MATCH_PLAYER_CSV):
+    print(f"Calibrating on match scores from {match_csv} (players: {player_csv})...")
+    matches = load_match_results(match_csv)
+    config, std_errors, info = calibrate(load_player_records(player_csv, lineups_only=True), matches,
+                                         CALIBRATION_CONFIG, fixed=CALIBRATION_FIXED)
+
+    print("\n" + "="*30)
+    print("CALIBRATION COMPLETE")
+    print("="*30)
+    for key, value in config.items():
+        if key in CALIBRATION_FIXED:
+            note = "(fixed)"
+        elif std_errors.get(key) is None:
+            note = "(at bound)" if key in info['at_bound'] else "(no s.e.)"
+        else:
+            note = f"+/- {std_errors[key]:.4g}"
+        print(f"  {key}: {value} {note}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = f"{OUTPUT_DIR}/calibration_results_{timestamp}.json"
+    with open(output_file, 'w') as f:
+        json.dump({
+            'method': 'calibrate',
+            'match_data': match_csv,
+            'player_data': player_csv,
+            'best_config': config,
+            'std_errors': std_errors,
+            'fixed': CALIBRATION_FIXED,
+            **info,
+        }, f, indent=2, cls=NumpyEncoder)
+    print(f"\nResults saved to {output_file}")
+
+
+def parse_grid(specs, default_points=11):
+    """{key: values} from 'key' (PARAM_CONFIG range), 'key=start:stop' or 'key=start:stop:points'."""
+    grid = {}
+    for spec in specs:
+        key, _, values = spec.partition('=')
+        if values:
+            parts = [float(v) for v in values.split(':')]
+            start, stop = parts[:2]
+            points = int(parts[2]) if len(parts) > 2 else default_points
+        elif key in PARAM_CONFIG:
+            (start, stop), points = PARAM_CONFIG[key]['range'], default_points
+        else:
+            raise ValueError(f"No range for '{key}': use {key}=start:stop[:points]")
+        grid[key] = np.linspace(start, stop, points)
+    return grid
+
+
+def run_sweep(specs, num_sims=SWEEP_SIMS, points=11, seed=None):
+    grid = parse_grid(specs, points)
+    base_config = params_to_config(DEFAULT_SIM_PARAMS, METRIC_DEFAULTS)
+    latest = find_latest_tuning_file()
+    if latest:
+        with open(latest) as f:
+            base_config.update(json.load(f).get('best_config', {}))
+    records = load_player_records(PLAYER_CSV, lineups_only=True)
+    model = TeamPowerModel.from_records(records)
+
+    n_points = int(np.prod([len(v) for v in grid.values()]))
+    print(f"Sweeping {' x '.join(grid)} ({n_points} configs) on {num_sims} common seasons "
+          f"(other parameters from {latest or 'the defaults'})...")
+    with tqdm(desc="Seasons", smoothing=0) as bar:
+        def progress(done, total):
+            bar.total = total
+            bar.update(done - bar.n)
+        result = sweep_grid(model, GROUND_TRUTH, grid, base_config, num_sims=num_sims,
+                            rng=np.random.default_rng(seed), progress=progress)
+
+    error = result['error']
+    keys, values = result['keys'], result['values']
+    pd.set_option('display.width', 200)
+    if len(keys) == 2:
+        table = pd.DataFrame(error, index=pd.Index(values[0].round(4), name=keys[0]),
+                             columns=pd.Index(values[1].round(4), name=keys[1]))
+    else:
+        table = pd.DataFrame(error.reshape(-1, 1), columns=['error'],
+                             index=pd.MultiIndex.from_product([v.round(4) for v in values], names=keys))
+    print(table.round(1).to_string())
+    best = np.unravel_index(np.argmin(error), error.shape)
+    best_point = {k: float(v[i]) for k, v, i in zip(keys, values, best)}
+    print(f"\nLowest error {error[best]:.2f} at {best_point}")
+
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    output_file = f"{OUTPUT_DIR}/sweep_{timestamp}.json"
+    with open(output_file, 'w') as f:
+        json.dump({
+            'method': 'sweep',
+            'num_sims': num_sims,
+            'base_config': base_config,
+            'grid': dict(zip(keys, values)),
+            'error': error,
+            'points': dict(zip(model.team_names, np.moveaxis(result['points'], -1, 0))),
+            'best_point': best_point,
+        }, f, indent=2, cls=NumpyEncoder)
+    print(f"Results saved to {output_file}")
+
+
 def main():
+    parser = argparse.ArgumentParser(description="Tune simulation parameters against the real table.")
+    parser.add_argument('--mode', choices=['random', 'fit', 'calibrate', 'sweep', 'coordinator', 'worker'],
+                        default='random',
+                        help="random: parallel random search over the pools; "
+                             "fit: L-BFGS on the expected-points error; "
+                             "calibrate: maximum likelihood on individual match scores; "
+                             "sweep: error surface over a --grid of one or two parameters on common random numbers; "
+                             "coordinator/worker: random search spread over machines sharing --queue")
+    parser.add_argument('--trials', type=int, default=5000, help="Random search trials")
+    parser.add_argument('--sims', type=int, default=None,
+                        help=f"Seasons per random search trial (default 10000), or common seasons of a sweep "
+                             f"(default {SWEEP_SIMS})")
+    parser.add_argument('--starts', type=int, default=1, help="Extra random starting points for fit mode")
+    parser.add_argument('--grid', nargs='+', default=['sigma', 'scaling_factor'],
+                        help="Sweep: parameters as key, key=start:stop or key=start:stop:points")
+    parser.add_argument('--grid-points', type=int, default=11, help="Sweep: points per parameter when not given")
+    parser.add_argument('--seed', type=int, default=None, help="Sweep: seed for the common random numbers")
+    parser.add_argument('--matches', default=MATCH_CSV, help="Calibrate: match results CSV")
+    parser.add_argument('--match-players', default=MATCH_PLAYER_CSV, help="Calibrate: player stats of that season")
+    parser.add_argument('--queue', default=f'{OUTPUT_DIR}/tuning_queue', help="Shared queue directory")
+    parser.add_argument('--batch-size', type=int, default=20, help="Configs per queue batch")
+    parser.add_argument('--lease-timeout', type=float, default=120,
+                        help="Seconds without a heartbeat before a batch is given to another worker")
+    parser.add_argument('--local-workers', type=int, default=0,
+                        help="Coordinator: also start this many workers on this machine")
+    parser.add_argument('--processes', type=int, default=None, help="Worker: processes on this machine")
+    parser.add_argument('--memory-mb', type=float, default=None,
+                        help="Memory budget for this machine's search processes; limits workers and chunk sizes")
+    args = parser.parse_args()
+    if args.sims is None:
+        args.sims = SWEEP_SIMS if args.mode == 'sweep' else 10000
+    if args.memory_mb is not None:
+        set_memory_budget(args.memory_mb)
+
+    if args.mode == 'worker':
+        run_worker(args.queue, processes=args.processes)
+        return
+    if args.mode == 'calibrate':
+        run_calibration(args.matches, args.match_players)
+        return
+    if args.mode == 'sweep':
+        run_sweep(args.grid, num_sims=args.sims, points=args.grid_points, seed=args.seed)
+        return
+
     # Make sure to protect entry point
     optimizer = LeagueOptimizer(PLAYER_CSV, GROUND_TRUTH)
-    
-    print("Parameter Pools Generated:")
-    for param, vals in optimizer.param_pools.items():
-        print(f"  {param}: {len(vals)} values")
-    print("-" * 30)
 
-    # Increased sims/trial because it's faster now
-    best_config, best_error, history = optimizer.search_parallel(n_trials=5000, sims_per_trial=10000)
+    if args.mode == 'fit':
+        print("Fitting parameters on expected points (L-BFGS-B)...")
+        latest = find_latest_tuning_file()
+        starts = []
+        if latest:
+            with open(latest) as f:
+                starts.append(json.load(f).get('best_config', {}))
+        best_config, best_error, history = fit_parameters(
+            optimizer.raw_player_data, GROUND_TRUTH, PARAM_CONFIG,
+            starts=starts, n_random_starts=args.starts)
+    elif args.mode == 'coordinator':
+        best_config, best_error, history = optimizer.search_distributed(
+            args.queue, n_trials=args.trials, sims_per_trial=args.sims, batch_size=args.batch_size,
+            lease_timeout=args.lease_timeout, local_workers=args.local_workers)
+    else:
+        print("Parameter Pools Generated:")
+        for param, vals in optimizer.param_pools.items():
+            print(f"  {param}: {len(vals)} values")
+        print("-" * 30)
+
+        # Increased sims/trial because it's faster now
+        best_config, best_error, history = optimizer.search_parallel(n_trials=args.trials, sims_per_trial=args.sims)
 
     print("\n" + "="*30)
     print(f"SEARCH COMPLETE. Best MSE: {best_error:.2f}")
@@ -268,6 +590,7 @@ def main():
     
     with open(output_file, 'w') as f:
         json.dump({
+            'method': args.mode,
             'best_config': best_config,
             'best_error': best_error,
             'history_top_10': sorted(history, key=lambda x: x['error'])[:10]
@@ -275,6 +598,11 @@ def main():
         
     print(f"\nResults saved to {output_file}")
 
+    # Tools load the tuned model from the snapshot instead of rebuilding it
+    with SilentOutput():
+        build_snapshot(PLAYER_CSV)
+    print(f"Model snapshot updated: {snapshot_path(PLAYER_CSV)}")
+
 
 if __name__ == "__main__":
     main()
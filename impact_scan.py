@@ -0,0 +1,77 @@
+"""
+League-wide player-swap impact scan.
+
+Scores every single-player substitution and removal in every team's default XI
+by its effect on that team's title, top-four and relegation odds (src/impact.py),
+prints the biggest changes and writes all of them to CSV.
+
+Usage:
+    python impact_scan.py
+    python impact_scan.py --same-position
+    python impact_scan.py --teams Arsenal "Manchester City" --rank-by title --top 30
+"""
+import argparse
+import os
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+from tqdm import tqdm
+
+from src.data_loader import load_players_from_csv
+from src.impact import METRICS, rank_changes, scan_changes
+from src.league import League
+from src.snapshot import load_snapshot
+
+PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
+OUTPUT_DIR = 'output'
+
+
+def print_ranking(rows, top):
+    print(f"\n{'Team':<24} {'Change':<48} {'Title':>8} {'Top 4':>8} {'Releg.':>8} {'Pts':>7}")
+    print("-" * 108)
+    for row in rows[:top]:
+        print(f"{row['team']:<24} {row['change'][:48]:<48} "
+              f"{row['d_title']:>+8.1%} {row['d_top4']:>+8.1%} {row['d_relegated']:>+8.1%} {row['d_points']:>+7.1f}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Rank single-player lineup changes by their effect on the season.")
+    parser.add_argument('--sims', type=int, default=4000, help="Seasons shared by every change (common random numbers)")
+    parser.add_argument('--teams', nargs='+', default=None, help="Only scan these teams (default: all)")
+    parser.add_argument('--same-position', action='store_true',
+                        help="Only swap players of the same position group (no outfielders in goal)")
+    parser.add_argument('--rank-by', choices=['any'] + METRICS, default='any',
+                        help="Sort by the change in this metric ('any': largest title / top 4 / relegation change)")
+    parser.add_argument('--top', type=int, default=25, help="Changes to print")
+    parser.add_argument('--output', default=None, help="CSV path (default: output/impact_scan_<timestamp>.csv)")
+    parser.add_argument('--players', default=PLAYER_CSV, help="Player stats CSV")
+    parser.add_argument('--seed', type=int, default=None, help="Seed for reproducible scans")
+    args = parser.parse_args()
+
+    league = League(load_players_from_csv(args.players))
+    params = load_snapshot(args.players).params
+    unknown = [t for t in args.teams or [] if t not in league.teams]
+    if unknown:
+        parser.error(f"Unknown teams: {', '.join(unknown)}")
+
+    with tqdm(desc="Changes", smoothing=0) as bar:
+        def progress(done, total):
+            bar.total = total
+            bar.update(done - bar.n)
+        rows = scan_changes(league, params, num_sims=args.sims, teams=args.teams,
+                            same_position=args.same_position, rng=np.random.default_rng(args.seed), progress=progress)
+
+    ranked = rank_changes(rows, args.rank_by)
+    print_ranking(ranked, args.top)
+
+    if args.output is None:
+        os.makedirs(OUTPUT_DIR, exist_ok=True)
+        timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+        args.output = f"{OUTPUT_DIR}/impact_scan_{timestamp}.csv"
+    pd.DataFrame(ranked).to_csv(args.output, index=False)
+    print(f"\n{len(rows)} changes saved to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,86 +1,59 @@
-import sys
-import glob
-import json
 import os
+import sys
+from functools import cached_property
 import numpy as np
 import pandas as pd
-from src.data_loader import load_players_from_csv, load_teams_from_csv
+from src.cache import make_key
+from src.data_loader import load_players_from_csv
+from src.jobs import CANCELLED, FAILED, QUEUED, RUNNING, JobManager
 from src.league import League
 from src.models import Team
+from src.player_index import PlayerIndex
+from src.rare_events import estimate_event
+from src.results_store import RUNS_DIR, SeasonStore, SeasonStoreWriter, list_runs, new_run_path, parse_event
+from src.simulation import iter_matches, iter_seasons
+from src.snapshot import load_snapshot
 from src.visualizer import plot_league_heatmap, plot_points_distribution, plot_convergence
 
 # Config
 PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
-TEAM_CSV = 'data/raw/team_stats_2024-25.csv'
-
-# Default Parameters
-SIM_PARAMS = {
-    'sigma': 0.15,
-    'scaling_factor': 1500,
-    'league_avg_goals': 1.6395,
-    'home_adv': 1.0,
-    'weights': {
-        'ATT': {'att': 1.0, 'def': 0.15},
-        'MID': {'att': 0.7, 'def': 0.6},
-        'DEF': {'att': 0.1, 'def': 1.0},
-        'GK':  {'att': 0.0, 'def': 0.0},
-        'UNK': {'att': 0.5, 'def': 0.5}
-    }
-}
-
-# --- Load Optimized Parameters ---
-def load_optimized_params():
-    try:
-        # Find latest tuning file
-        list_of_files = glob.glob('output/tuning_results_*.json')
-        if not list_of_files:
-            print("[INFO] No tuning results found. Using default parameters.")
-            return
-
-        latest_file = max(list_of_files, key=os.path.getctime)
-        print(f"[INFO] Loading optimized parameters from: {latest_file}")
-
-        with open(latest_file, 'r') as f:
-            data = json.load(f)
-            config = data.get('best_config', {})
-        
-        if not config:
-            print("[WARN] 'best_config' not found in file. Using defaults.")
-            return
-
-        # Update SIM_PARAMS structure
-        SIM_PARAMS['sigma'] = config.get('sigma', SIM_PARAMS['sigma'])
-        SIM_PARAMS['scaling_factor'] = config.get('scaling_factor', SIM_PARAMS['scaling_factor'])
-        SIM_PARAMS['home_adv'] = config.get('home_adv', SIM_PARAMS['home_adv'])
-        
-        # Position weights
-        SIM_PARAMS['weights']['ATT']['def'] = config.get('att_def', SIM_PARAMS['weights']['ATT']['def'])
-        SIM_PARAMS['weights']['MID']['att'] = config.get('mid_att', SIM_PARAMS['weights']['MID']['att'])
-        SIM_PARAMS['weights']['MID']['def'] = config.get('mid_def', SIM_PARAMS['weights']['MID']['def'])
-        SIM_PARAMS['weights']['DEF']['att'] = config.get('def_att', SIM_PARAMS['weights']['DEF']['att'])
-        
-        print("[SUCCESS] Optimized parameters applied.")
-        print("-" * 40)
-        for k, v in config.items():
-            print(f"  {k}: {v}")
-        print("-" * 40)
 
-    except Exception as e:
-        print(f"[ERROR] Failed to load optimized parameters: {e}")
-        print("Using default parameters.")
-
-# Execute load
-load_optimized_params()
+# --- Load Optimized Parameters (and default XI powers) ---
+SNAPSHOT = load_snapshot(PLAYER_CSV)
+SIM_PARAMS = SNAPSHOT.params
+# Below this many hits a query offers an importance-sampling estimate
+RARE_EVENT_HITS = 30
+# Seconds between progress lines while waiting for a job
+PROGRESS_INTERVAL = 2
 
 class PremierLeagueCLI:
     def __init__(self):
-        print("Loading data...")
-        self.all_players = load_players_from_csv(PLAYER_CSV)
-        self.team_names = load_teams_from_csv(TEAM_CSV)
-        self.league = League(self.all_players)
+        # League teams plus custom ones; the players are only loaded when a menu needs them
+        self.team_names = list(SNAPSHOT.team_names)
         self.custom_lineups = {} # Format: {'TeamName': [PlayerObj1, PlayerObj2...]}
+        # League / match simulations run here so the menu stays usable
+        self.jobs = JobManager(max_workers=2)
         print("System Ready.\n")
 
+    @cached_property
+    def all_players(self):
+        print("Loading player data...")
+        return load_players_from_csv(PLAYER_CSV)
+
+    @cached_property
+    def league(self):
+        return League(self.all_players)
+
+    @cached_property
+    def player_index(self):
+        return PlayerIndex(self.all_players)
+
+    def _team_power(self, name, lineup_names=None):
+        # Default XIs of the snapshot's teams are precomputed; custom lineups and teams are not
+        if lineup_names is None and name in SNAPSHOT.team_names:
+            return SNAPSHOT.power(name)
+        return self.league.teams[name].calculate_power(SIM_PARAMS, lineup_names)
+
     def run(self):
         while True:
             print("\n=== PREMIER LEAGUE MANAGER ===")
@@ -88,7 +61,11 @@ class PremierLeagueCLI:
             print("2. Simulate Full League Season")
             print("3. Manage Team / Edit Lineup")
             print("4. Create Custom Team")
-            print("5. Exit")
+            print("5. Query Saved Simulations")
+            print("6. Background Jobs")
+            print("7. Exit")
+            for job in self.jobs.active():
+                print(f"   [{job.describe()}]")
             
             choice = input("Select option: ")
             
@@ -101,7 +78,12 @@ class PremierLeagueCLI:
             elif choice == '4':
                 self.menu_create_team()
             elif choice == '5':
+                self.menu_saved_runs()
+            elif choice == '6':
+                self.menu_jobs()
+            elif choice == '7':
                 print("Exiting...")
+                self.jobs.shutdown()
                 sys.exit()
             else:
                 print("Invalid option.")
@@ -116,7 +98,7 @@ class PremierLeagueCLI:
         h_team = input("Enter Home Team Name: ")
         a_team = input("Enter Away Team Name: ")
 
-        if h_team not in self.league.teams or a_team not in self.league.teams:
+        if h_team not in self.team_names or a_team not in self.team_names:
             print("Error: One or both teams not found.")
             return
 
@@ -131,33 +113,42 @@ class PremierLeagueCLI:
         h_names = [p.name for p in h_lineup] if h_lineup else None
         a_names = [p.name for p in a_lineup] if a_lineup else None
 
-        h_att, h_def = self.league.teams[h_team].calculate_power(SIM_PARAMS, h_names)
-        a_att, a_def = self.league.teams[a_team].calculate_power(SIM_PARAMS, a_names)
+        h_att, h_def = self._team_power(h_team, h_names)
+        a_att, a_def = self._team_power(a_team, a_names)
 
-        wins_h, wins_a, draws = 0, 0, 0
         num_sims = 10000
-        
-        # Track history for convergence plotting (3 separate lists)
+        key = make_key('match', h_team, a_team, h_names, a_names, SIM_PARAMS, num_sims)
+        job = self.jobs.submit(f"{h_team} vs {a_team}", key, num_sims,
+                               lambda job: self._match_job(job, h_team, a_team, (h_att, h_def, a_att, a_def), num_sims))
+        if self._wait_for(job):
+            self._show_result(job)
+
+    def _match_job(self, job, h_team, a_team, powers, num_sims):
+        # Outcome per simulated match for convergence plotting, as int8 chunks
+        # (results stay in the job cache, Python int lists would be ~25x larger)
         h_hist = []
         d_hist = []
         a_hist = []
 
-        for _ in range(num_sims):
-            gh, ga = self.league.simulate_match_fast(h_att, h_def, a_att, a_def, SIM_PARAMS)
-            if gh > ga: 
-                wins_h += 1
-                h_hist.append(1); d_hist.append(0); a_hist.append(0)
-            elif ga > gh: 
-                wins_a += 1
-                h_hist.append(0); d_hist.append(0); a_hist.append(1)
-            else: 
-                draws += 1
-                h_hist.append(0); d_hist.append(1); a_hist.append(0)
-
-        print(f"\nResults ({num_sims} runs):")
-        print(f"{h_team}: {wins_h/num_sims*100:.1f}%")
-        print(f"Draw:      {draws/num_sims*100:.1f}%")
-        print(f"{a_team}: {wins_a/num_sims*100:.1f}%")
+        snapshot = None
+        for snapshot in iter_matches(*powers, SIM_PARAMS, num_sims, every=2000):
+            gh, ga = snapshot['home_goals'], snapshot['away_goals']
+            h_hist.append((gh > ga).astype(np.int8))
+            d_hist.append((gh == ga).astype(np.int8))
+            a_hist.append((gh < ga).astype(np.int8))
+            job.update(snapshot['num_sims'], f"home win {snapshot['home_win']:.1%}")
+            if job.cancelled:
+                break
+        return {'kind': 'match', 'home': h_team, 'away': a_team, 'snapshot': snapshot,
+                'history': tuple(np.concatenate(hist) for hist in (h_hist, d_hist, a_hist))}
+
+    def _show_match(self, result):
+        h_team, a_team, snapshot = result['home'], result['away'], result['snapshot']
+        n, ci = snapshot['num_sims'], snapshot['ci']
+        print(f"\nResults ({n} runs):")
+        print(f"{h_team}: {snapshot['home_win']*100:.1f}% ± {ci['home_win']*100:.1f}")
+        print(f"Draw:      {snapshot['draw']*100:.1f}% ± {ci['draw']*100:.1f}")
+        print(f"{a_team}: {snapshot['away_win']*100:.1f}% ± {ci['away_win']*100:.1f}")
         
         # Option to visualize convergence
         print("\n[Options]")
@@ -167,116 +158,214 @@ class PremierLeagueCLI:
         
         if choice == 'V':
             print("Generating Convergence Plot...")
-            plot_convergence(h_hist, d_hist, a_hist, h_team, a_team)
+            plot_convergence(*result['history'], h_team, a_team)
             # No need to break or exit, plot_convergence shows plot then returns
 
     def menu_league_sim(self):
         print("\n--- League Simulation ---")
         print("Calculating team powers...")
         
-        team_powers = {}
-        for name, team in self.league.teams.items():
+        team_names = list(self.team_names)
+        team_powers = []
+        lineups = {}
+        for name in team_names:
             lineup_objs = self._get_lineup_for_team(name)
             lineup_names = [p.name for p in lineup_objs] if lineup_objs else None
-            team_powers[name] = team.calculate_power(SIM_PARAMS, lineup_names)
+            if lineup_names:
+                lineups[name] = lineup_names
+            team_powers.append(self._team_power(name, lineup_names))
+        team_powers = np.array(team_powers)
 
-        # Storage for results
-        rankings_data = {name: {} for name in self.league.teams} # Team -> {Pos: Count}
-        points_history = {name: [] for name in self.league.teams} # Team -> [Points list]
-        
-        table_totals = {name: {'Points': 0, 'GF': 0} for name in self.league.teams}
-        
         num_sims = 10000
-        print(f"Running {num_sims} simulations of the entire season...")
+        key = make_key('league', team_names, lineups, SIM_PARAMS, num_sims)
+        # A cached result whose run has since been pruned from output/runs is simulated again
+        cached = self.jobs.cache.get(key)
+        if cached is not None and not os.path.isdir(cached['run_path']):
+            self.jobs.forget(key)
+        job = self.jobs.submit("League season", key, num_sims,
+                               lambda job: self._league_job(job, team_names, team_powers, num_sims))
+        if self._wait_for(job):
+            self._show_result(job)
+
+    def _league_job(self, job, team_names, team_powers, num_sims):
+        # Persist the run so it can be queried later without resimulating; only the newest KEEP_RUNS are kept
+        run_path = new_run_path()
+        writer = SeasonStoreWriter(run_path, team_names, num_sims, params=SIM_PARAMS, powers=team_powers)
+        snapshot = None
+        for snapshot in iter_seasons(team_names, team_powers[:, 0], team_powers[:, 1], SIM_PARAMS,
+                                     num_sims, every=1000):
+            writer.append(snapshot['seasons'])
+            leader = snapshot['table'][0]
+            job.update(snapshot['num_sims'], f"leader {leader['Team']} {leader['Avg Pts']:.1f} pts, "
+                                             f"title {leader['Title']:.1%}")
+            if job.cancelled:
+                break
+        writer.close()
+        return {'kind': 'league', 'run_path': run_path, 'table': snapshot['table']}
+
+    def _show_league(self, result):
+        # Older runs are pruned (KEEP_RUNS); the table is still in the result
+        store = None
+        if os.path.isdir(result['run_path']):
+            store = SeasonStore.open(result['run_path'])
+            print(f"Results stored in {result['run_path']}")
+        else:
+            print(f"Run {result['run_path']} has been pruned, showing the table only.")
 
-        for _ in range(num_sims):
-            # Run one full season round-robin
-            season_points = {name: 0 for name in self.league.teams}
-            season_gf = {name: 0 for name in self.league.teams}
-            
-            teams_list = list(self.league.teams.keys())
-            for i in range(len(teams_list)):
-                for j in range(i + 1, len(teams_list)):
-                    t1, t2 = teams_list[i], teams_list[j]
-                    
-                    # Home Game for T1
-                    t1_att, t1_def = team_powers[t1]
-                    t2_att, t2_def = team_powers[t2]
-                    
-                    gh, ga = self.league.simulate_match_fast(t1_att, t1_def, t2_att, t2_def, SIM_PARAMS)
-                    
-                    season_gf[t1] += gh
-                    season_gf[t2] += ga
-                    if gh > ga: season_points[t1] += 3
-                    elif ga > gh: season_points[t2] += 3
-                    else:
-                        season_points[t1] += 1
-                        season_points[t2] += 1
-
-                    # Away Game for T1 (Home for T2)
-                    gh, ga = self.league.simulate_match_fast(t2_att, t2_def, t1_att, t1_def, SIM_PARAMS)
-                    
-                    season_gf[t2] += gh
-                    season_gf[t1] += ga
-                    if gh > ga: season_points[t2] += 3
-                    elif ga > gh: season_points[t1] += 3
-                    else:
-                        season_points[t2] += 1
-                        season_points[t1] += 1
-            
-            # Record season results
-            sorted_table = sorted(season_points.items(), key=lambda x: (x[1], season_gf[x[0]]), reverse=True)
-            
-            for rank, (team_name, pts) in enumerate(sorted_table):
-                pos = rank + 1
-                # Update Rankings Hist
-                rankings_data[team_name][pos] = rankings_data[team_name].get(pos, 0) + 1
-                # Update Points Hist
-                points_history[team_name].append(pts)
-                
-                # Totals for Average Table
-                table_totals[team_name]['Points'] += pts
-                table_totals[team_name]['GF'] += season_gf[team_name]
-
-        # Average out
-        results = []
-        for t in table_totals:
-            avg_pts = table_totals[t]['Points'] / num_sims
-            avg_gf = table_totals[t]['GF'] / num_sims
-            results.append({'Team': t, 'Avg Pts': avg_pts, 'Avg GF': avg_gf})
-
-        # Sort by Points then GF
-        results.sort(key=lambda x: (x['Avg Pts'], x['Avg GF']), reverse=True)
+        # Sorted by Points then GF
+        results = result['table']
 
         print(f"\n{'Pos':<4} {'Team':<25} {'Pts':<6} {'GF':<6}")
         print("-" * 45)
         for i, res in enumerate(results):
             print(f"{i+1:<4} {res['Team']:<25} {res['Avg Pts']:.1f}   {res['Avg GF']:.1f}")
             
+        if store is not None:
+            self._results_menu(store)
+
+    def _wait_for(self, job):
+        """
+        Show progress until the job stops. Returns True if it has a result to show.
+        Ctrl+C (or answering n) leaves it running; see Background Jobs.
+        """
+        if job.cached:
+            print("Same lineups and parameters as an earlier run, using the cached result.")
+            return True
+        if job.status in (QUEUED, RUNNING):
+            if input(f"Job #{job.id} started. Wait for the result? (Y/n): ").lower() == 'n':
+                print("Running in the background, see Background Jobs.")
+                return False
+            print("Waiting... (Ctrl+C to return to the menu)")
+            try:
+                while not job.wait(PROGRESS_INTERVAL):
+                    print(f"  {job.describe()}")
+            except KeyboardInterrupt:
+                print(f"\nJob #{job.id} keeps running in the background.")
+                return False
+        if job.status == FAILED:
+            print(f"Job #{job.id} failed: {job.error}")
+            return False
+        return job.result is not None
+
+    def _show_result(self, job):
+        if job.status == CANCELLED:
+            print(f"Job #{job.id} was cancelled after {job.done} simulations, showing partial results.")
+        if job.result['kind'] == 'match':
+            self._show_match(job.result)
+        else:
+            self._show_league(job.result)
+
+    def menu_jobs(self):
+        print("\n--- Background Jobs ---")
+        if not self.jobs.jobs:
+            print("No jobs yet.")
+            return
+        for job in self.jobs.jobs.values():
+            print(job.describe())
+        choice = input("Job number to view, 'c <number>' to cancel, or B to go back: ").strip().lower()
+        cancel = choice.startswith('c')
+        try:
+            job = self.jobs.get(int(choice[1:] if cancel else choice))
+        except ValueError:
+            return
+        if job is None:
+            print("No such job.")
+        elif cancel:
+            job.cancel()
+            print(f"Cancelling job #{job.id}, partial results are kept.")
+        elif not job.wait(0):
+            print(f"Job #{job.id} is still running: {job.describe()}")
+        elif job.result is None:
+            print(f"Job #{job.id} has no result ({job.status}).")
+        else:
+            self._show_result(job)
+
+    def _results_menu(self, store):
         # Visualisation Menu
         while True:
             print("\n[Visualisation Options]")
             print("1. Show Position Heatmap (All Teams)")
             print("2. Show Points Distribution (Specific Team)")
-            print("3. Return to Main Menu")
+            print("3. Query Probabilities")
+            print("4. Return to Main Menu")
             v_choice = input("Select: ")
             
             if v_choice == '1':
                 print("Generating Heatmap...")
-                plot_league_heatmap(rankings_data, self.league.teams.keys())
+                plot_league_heatmap(store.rankings_data(), store.team_names)
             elif v_choice == '2':
                 t_input = input("Enter Team Name: ")
-                if t_input in self.league.teams:
-                    plot_points_distribution(points_history[t_input], t_input)
+                if t_input in store.team_names:
+                    plot_points_distribution(store.points(t_input), t_input)
                 else:
                     print("Team not found.")
             elif v_choice == '3':
+                self._query_store(store)
+            elif v_choice == '4':
                 break
 
+    def _query_store(self, store):
+        print("Examples: 'Arsenal above Chelsea and Tottenham Hotspur relegated', 'Liverpool top 4'")
+        print("Add ' given <condition>' for a conditional probability.")
+        text = input("Query: ")
+        event_text, _, given_text = text.partition(' given ')
+        try:
+            event = parse_event(store, event_text)
+            given = parse_event(store, given_text) if given_text else None
+        except (KeyError, ValueError) as e:
+            print(f"Invalid query: {e}")
+            return
+        p, se = store.prob(event, given)
+        print(f"P = {p*100:.2f}% (+/- {1.96*se*100:.2f}%, N={store.num_sims})")
+
+        # Too few hits for a useful estimate: offer importance sampling
+        hits = int(np.count_nonzero(event))
+        if given is None and hits < RARE_EVENT_HITS and store.meta.get('powers'):
+            if input(f"Only {hits} hits. Estimate by importance sampling? (y/n): ").lower() == 'y':
+                self._estimate_rare(store, event_text)
+
+    def _estimate_rare(self, store, text):
+        powers = np.array(store.meta['powers'])
+        params = store.meta.get('params') or SIM_PARAMS
+        print("Choosing tilt from pilot runs...")
+        try:
+            r = estimate_event(store.team_names, powers[:, 0], powers[:, 1], params, text,
+                               relegation_spots=store.relegation_spots)
+        except (KeyError, ValueError) as e:
+            print(f"Invalid query: {e}")
+            return
+        if r['hits'] == 0:
+            print(f"No hits even when tilting {r['tilt_team']}: P is far below 1/{r['num_sims']}.")
+            return
+        print(f"P = {r['probability']:.3g} (+/- {1.96*r['std_error']:.2g}, relative error {r['relative_error']:.1%}, "
+              f"tilt {r['tilt_team']} theta={r['theta']:+.3f}, effective hits {r['effective_sample_size']:.0f})")
+        if r['effective_sample_size'] < RARE_EVENT_HITS:
+            print("Few effective hits: treat this as an order of magnitude.")
+
+    def menu_saved_runs(self):
+        print("\n--- Saved Simulations ---")
+        runs = list_runs()
+        if not runs:
+            print("No saved simulations found.")
+            return
+        for i, run in enumerate(runs):
+            print(f"{i+1}. {run}")
+        try:
+            idx = int(input("Select run: ")) - 1
+            if idx < 0 or idx >= len(runs):
+                print("Invalid selection.")
+                return
+        except ValueError:
+            print("Invalid input.")
+            return
+        store = SeasonStore.open(os.path.join(RUNS_DIR, runs[idx]))
+        print(f"Loaded {store.num_sims} seasons.")
+        self._results_menu(store)
+
     def menu_manage_team(self):
         print("\n--- Team Manager ---")
         t_name = input("Enter Team Name to manage: ")
-        if t_name not in self.league.teams:
+        if t_name not in self.team_names:
             print("Team not found.")
             return
 
@@ -351,7 +440,7 @@ class PremierLeagueCLI:
     def menu_create_team(self):
         print("\n--- Create Custom Team ---")
         name = input("Enter new team name: ")
-        if name in self.league.teams:
+        if name in self.team_names:
             print("Team already exists!")
             return
 
@@ -363,8 +452,8 @@ class PremierLeagueCLI:
             if query == 'DONE':
                 break
             
-            # Search in all_players
-            matches = [p for p in self.all_players if query.lower() in p.name.lower()]
+            # Ranked fuzzy search (accent-insensitive)
+            matches = [p for p, _ in self.player_index.search(query, limit=5)]
             
             if not matches:
                 print("No matches found.")
@@ -388,6 +477,7 @@ class PremierLeagueCLI:
             print("Warning: Team has fewer than 11 players. Simulation might crash or be weird.")
         
         self.league.teams[name] = new_team
+        self.team_names.append(name)
         print(f"Team {name} added to the league!")
 
 if __name__ == "__main__":
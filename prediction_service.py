@@ -0,0 +1,387 @@
+"""
+Local prediction service.
+
+Keeps the model snapshot (src/snapshot.py) and an LRU cache of match and
+league predictions in memory, so other tools only pay for a local request
+instead of process startup, CSV parsing and league calibration. The League and
+player index are built on the first request that needs them (custom lineups,
+params overrides, /players).
+
+League simulations and large match requests run on a thread pool for small
+and medium requests and on worker processes for large ones (--backend,
+src/executors.py). "num_sims" is limited to MAX_MATCH_SIMS / MAX_LEAGUE_SIMS.
+
+Usage:
+    python prediction_service.py --port 8765
+    python prediction_service.py --unix /tmp/pl_simulator.sock
+    python prediction_service.py --backend thread --workers 4
+
+Endpoints (JSON in, JSON out):
+    GET  /health
+    GET  /teams
+    POST /match   {"home": "Liverpool", "away": "Arsenal",
+                   "home_lineup": [...], "away_lineup": [...],
+                   "params": {"sigma": 0.2}, "num_sims": 10000}
+    POST /league  {"lineups": {"Arsenal": [...]}, "params": {...}, "num_sims": 10000}
+                  add "stream": true (and "every": 1000) for newline-delimited JSON
+                  snapshots with the table and 95% intervals so far
+    POST /players {"query": "odegaard", "position": "MID", "squad": "Arsenal",
+                   "min_minutes": 900, "limit": 10}
+"""
+import argparse
+import asyncio
+import json
+from functools import cached_property
+
+import numpy as np
+
+from src.cache import LRUCache, make_key
+from src.data_loader import load_players_from_csv
+from src.executors import BACKENDS, SimulationExecutor
+from src.league import League
+from src.params import apply_config
+from src.player_index import PlayerIndex
+from src.simulation import iter_seasons, simulate_matches, simulate_seasons, snapshots_async, summarize_seasons
+from src.snapshot import load_snapshot
+
+PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
+DEFAULT_MATCH_SIMS = 10000
+DEFAULT_LEAGUE_SIMS = 10000
+DEFAULT_STREAM_EVERY = 1000
+# Upper limits on "num_sims"; anything larger is rejected rather than tying up the workers and memory
+MAX_MATCH_SIMS = 1_000_000
+MAX_LEAGUE_SIMS = 200_000
+# Smaller match jobs run on the event loop, where they take well under a millisecond
+MATCH_INLINE_SIMS = 20_000
+MAX_BODY_BYTES = 1 << 20
+
+HTTP_REASONS = {200: 'OK', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+                413: 'Payload Too Large', 500: 'Internal Server Error'}
+
+
+class RequestError(Exception):
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+def run_match_job(h_att, h_def, a_att, a_def, params, num_sims):
+    """Worker-pool entry point: simulate one fixture and return the outcome rates and mean goals."""
+    gh, ga = simulate_matches(h_att, h_def, a_att, a_def, params, num_sims)
+    return {
+        'home_win': float(np.mean(gh > ga)),
+        'draw': float(np.mean(gh == ga)),
+        'away_win': float(np.mean(gh < ga)),
+        'avg_home_goals': float(gh.mean()),
+        'avg_away_goals': float(ga.mean()),
+    }
+
+
+def run_league_job(team_names, att, dfn, params, num_sims):
+    """Worker-pool entry point: simulate seasons and return the summary table."""
+    seasons = simulate_seasons(att, dfn, params, num_sims)
+    return summarize_seasons(team_names, seasons)
+
+
+class PredictionService:
+    def __init__(self, player_csv=PLAYER_CSV, cache_size=4096, max_workers=None, backend='auto'):
+        self.player_csv = player_csv
+        snapshot = load_snapshot(player_csv)
+        self.team_names = snapshot.team_names
+        self.params = snapshot.params
+        self.cache = LRUCache(cache_size)
+        self.power_cache = LRUCache(cache_size)
+        p_key = make_key(self.params)
+        for name in snapshot.team_names:
+            self.power_cache.put((name, None, p_key), snapshot.power(name))
+        self.executor = SimulationExecutor(backend, max_workers)
+        # Identical league requests arriving while one is running share its future
+        self._pending = {}
+
+    # The snapshot covers default-XI requests; players are loaded on the first custom lineup,
+    # params override or player search
+    @cached_property
+    def all_players(self):
+        return load_players_from_csv(self.player_csv)
+
+    @cached_property
+    def league(self):
+        return League(self.all_players)
+
+    @cached_property
+    def player_index(self):
+        return PlayerIndex(self.all_players)
+
+    def _params_for(self, body):
+        overrides = body.get('params') or {}
+        if not isinstance(overrides, dict):
+            raise RequestError(400, "'params' must be an object")
+        return apply_config(self.params, overrides)
+
+    @staticmethod
+    def _num_sims(body, default, maximum):
+        num_sims = int(body.get('num_sims', default))
+        if not 1 <= num_sims <= maximum:
+            raise RequestError(400, f"'num_sims' must be between 1 and {maximum}")
+        return num_sims
+
+    @staticmethod
+    def _lineup(value, field):
+        if value is not None and not (isinstance(value, list) and all(isinstance(n, str) for n in value)):
+            raise RequestError(400, f"'{field}' must be a list of player names")
+        return value
+
+    def _lineups(self, body):
+        lineups = body.get('lineups') or {}
+        if not isinstance(lineups, dict):
+            raise RequestError(400, "'lineups' must be an object")
+        for name, lineup in lineups.items():
+            self._check_team(name)
+            self._lineup(lineup, f"lineups.{name}")
+        return lineups
+
+    def _check_team(self, name):
+        if name not in self.team_names:
+            raise RequestError(404, f"Team not found: {name}")
+
+    def _team_power(self, name, lineup, params, p_key):
+        key = (name, tuple(lineup) if lineup else None, p_key)
+        power = self.power_cache.get(key)
+        if power is None:
+            power = self.league.teams[name].calculate_power(params, lineup)
+            self.power_cache.put(key, power)
+        return power
+
+    async def predict_match(self, body):
+        home, away = body.get('home'), body.get('away')
+        self._check_team(home)
+        self._check_team(away)
+        params = self._params_for(body)
+        num_sims = self._num_sims(body, DEFAULT_MATCH_SIMS, MAX_MATCH_SIMS)
+        h_lineup = self._lineup(body.get('home_lineup'), 'home_lineup')
+        a_lineup = self._lineup(body.get('away_lineup'), 'away_lineup')
+
+        key = make_key('match', home, away, h_lineup, a_lineup, params, num_sims)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        p_key = make_key(params)
+        h_att, h_def = self._team_power(home, h_lineup, params, p_key)
+        a_att, a_def = self._team_power(away, a_lineup, params, p_key)
+        job = (h_att, h_def, a_att, a_def, params, num_sims)
+        if num_sims <= MATCH_INLINE_SIMS:
+            rates = run_match_job(*job)
+        else:
+            rates = await asyncio.wrap_future(self.executor.submit(run_match_job, *job, num_sims=num_sims))
+        result = {'home': home, 'away': away, 'num_sims': num_sims, **rates}
+        self.cache.put(key, result)
+        return result
+
+    async def predict_league(self, body):
+        params = self._params_for(body)
+        lineups = self._lineups(body)
+        num_sims = self._num_sims(body, DEFAULT_LEAGUE_SIMS, MAX_LEAGUE_SIMS)
+
+        key = make_key('league', lineups, params, num_sims)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+        if key in self._pending:
+            return await asyncio.shield(self._pending[key])
+
+        p_key = make_key(params)
+        team_names = list(self.team_names)
+        powers = np.array([self._team_power(n, lineups.get(n), params, p_key) for n in team_names])
+
+        future = asyncio.wrap_future(self.executor.submit(run_league_job, team_names, powers[:, 0], powers[:, 1],
+                                                          params, num_sims, num_sims=num_sims))
+        self._pending[key] = future
+        try:
+            table = await future
+        finally:
+            self._pending.pop(key, None)
+
+        result = {'num_sims': num_sims, 'table': table}
+        self.cache.put(key, result)
+        return result
+
+    def stream_league(self, body):
+        """
+        Validate a /league request with "stream": true and return an async
+        iterator of snapshots (every "every" seasons). The final table is
+        cached like a normal /league result.
+        """
+        params = self._params_for(body)
+        lineups = self._lineups(body)
+        num_sims = self._num_sims(body, DEFAULT_LEAGUE_SIMS, MAX_LEAGUE_SIMS)
+        every = max(1, int(body.get('every', DEFAULT_STREAM_EVERY)))
+        key = make_key('league', lineups, params, num_sims)
+
+        p_key = make_key(params)
+        team_names = list(self.team_names)
+        powers = np.array([self._team_power(n, lineups.get(n), params, p_key) for n in team_names])
+
+        async def snapshots():
+            cached = self.cache.get(key)
+            if cached is not None:
+                yield dict(cached, num_sims=num_sims, target=num_sims, done=True)
+                return
+            generator = iter_seasons(team_names, powers[:, 0], powers[:, 1], params, num_sims, every=every)
+            async for snap in snapshots_async(generator):
+                payload = {k: snap[k] for k in ('num_sims', 'target', 'done', 'table', 'ci')}
+                if snap['done']:
+                    self.cache.put(key, {'num_sims': num_sims, 'table': snap['table']})
+                yield payload
+        return snapshots()
+
+    def search_players(self, body):
+        query = body.get('query')
+        if not isinstance(query, str):
+            raise RequestError(400, "'query' must be a string")
+        matches = self.player_index.search(
+            query, limit=int(body.get('limit', 10)), position=body.get('position'),
+            squad=body.get('squad'), min_minutes=float(body.get('min_minutes', 0)))
+        return {'players': [{'name': p.name, 'squad': p.squad_name, 'position': p.position,
+                             'minutes': float(p.minutes_played), 'score': score}
+                            for p, score in matches]}
+
+    async def dispatch(self, method, path, body):
+        if path == '/health':
+            return {'status': 'ok', 'teams': len(self.team_names), 'cache': self.cache.stats()}
+        if path == '/teams':
+            return {'teams': sorted(self.team_names)}
+        if path in ('/match', '/league', '/players'):
+            if method != 'POST':
+                raise RequestError(405, f"{path} expects POST")
+            if path == '/match':
+                return await self.predict_match(body)
+            if path == '/players':
+                return self.search_players(body)
+            if body.get('stream'):
+                return self.stream_league(body)
+            return await self.predict_league(body)
+        raise RequestError(404, f"Unknown endpoint: {path}")
+
+    async def handle_connection(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                try:
+                    method, path, _ = request_line.decode('latin-1').split(' ', 2)
+                except ValueError:
+                    await self._respond(writer, 400, {'error': 'Malformed request line'}, keep_alive=False)
+                    break
+
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                length = int(headers.get('content-length', 0) or 0)
+                if length > MAX_BODY_BYTES:
+                    await self._respond(writer, 413, {'error': 'Request body too large'}, keep_alive=False)
+                    break
+                raw = await reader.readexactly(length) if length else b''
+
+                try:
+                    body = json.loads(raw) if raw else {}
+                    if not isinstance(body, dict):
+                        raise RequestError(400, 'Request body must be a JSON object')
+                    status, payload = 200, await self.dispatch(method, path.split('?')[0], body)
+                except RequestError as e:
+                    status, payload = e.status, {'error': str(e)}
+                except (ValueError, TypeError) as e:
+                    status, payload = 400, {'error': str(e)}
+                except Exception as e:
+                    status, payload = 500, {'error': str(e)}
+
+                if hasattr(payload, '__aiter__'):
+                    await self._respond_stream(writer, payload, keep_alive)
+                else:
+                    await self._respond(writer, status, payload, keep_alive)
+                if not keep_alive:
+                    break
+        except (asyncio.IncompleteReadError, ConnectionResetError, BrokenPipeError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    async def _respond(writer, status, payload, keep_alive=True):
+        data = json.dumps(payload).encode('utf-8')
+        head = (f"HTTP/1.1 {status} {HTTP_REASONS.get(status, '')}\r\n"
+                f"Content-Type: application/json\r\n"
+                f"Content-Length: {len(data)}\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1') + data)
+        await writer.drain()
+
+    @staticmethod
+    async def _respond_stream(writer, snapshots, keep_alive=True):
+        """Chunked response with one JSON object per line. A client hanging up stops the simulation."""
+        head = (f"HTTP/1.1 200 OK\r\n"
+                f"Content-Type: application/x-ndjson\r\n"
+                f"Transfer-Encoding: chunked\r\n"
+                f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n")
+        writer.write(head.encode('latin-1'))
+        try:
+            async for snapshot in snapshots:
+                line = json.dumps(snapshot).encode('utf-8') + b'\n'
+                writer.write(f"{len(line):x}\r\n".encode('latin-1') + line + b"\r\n")
+                await writer.drain()
+        except (ConnectionResetError, BrokenPipeError):
+            raise
+        except Exception as e:
+            # Headers are already sent; report the error in-band
+            line = json.dumps({'error': str(e)}).encode('utf-8') + b'\n'
+            writer.write(f"{len(line):x}\r\n".encode('latin-1') + line + b"\r\n")
+        finally:
+            await snapshots.aclose()
+        writer.write(b"0\r\n\r\n")
+        await writer.drain()
+
+    async def serve(self, host='127.0.0.1', port=8765, unix_path=None):
+        if unix_path:
+            server = await asyncio.start_unix_server(self.handle_connection, path=unix_path)
+            print(f"Prediction service listening on unix:{unix_path}")
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+            print(f"Prediction service listening on http://{host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def shutdown(self):
+        self.executor.shutdown(cancel_futures=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve match and league predictions over local HTTP.")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--unix', default=None, help="Listen on a Unix socket path instead of TCP")
+    parser.add_argument('--players', default=PLAYER_CSV, help="Player stats CSV")
+    parser.add_argument('--cache-size', type=int, default=4096)
+    parser.add_argument('--workers', type=int, default=None, help="League simulation threads / processes")
+    parser.add_argument('--backend', choices=BACKENDS, default='auto',
+                        help="Run league simulations on threads, processes, or pick by size (auto)")
+    args = parser.parse_args()
+
+    service = PredictionService(args.players, cache_size=args.cache_size, max_workers=args.workers,
+                                backend=args.backend)
+    try:
+        asyncio.run(service.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        print("Shutting down...")
+    finally:
+        service.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Headless report rendering.
+
+Renders the position heatmap and the points distribution of every team for a
+saved league run (see src/results_store.py), plus convergence plots for any
+requested matches, in parallel worker processes with the Agg backend. Plots
+whose inputs did not change since the last run are skipped. With --exact the
+points distributions are the exact ones of the tuned model (src/exact.py)
+instead of a saved run's histograms, so no simulation is needed.
+
+Usage:
+    python render_report.py                                   # latest run in output/runs
+    python render_report.py --run output/runs/league_20260110_150000 --match Liverpool Arsenal
+    python render_report.py --exact
+"""
+import argparse
+import os
+
+import numpy as np
+
+from src.results_store import RUNS_DIR, SeasonStore, list_runs
+from src.visualizer import PLOTS_DIR, render_batch
+
+PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
+
+
+def league_jobs(store):
+    jobs = [{'kind': 'heatmap', 'args': (store.rankings_data(), store.team_names),
+             'filename': 'league_heatmap.png'}]
+    for team in store.team_names:
+        jobs.append({'kind': 'points', 'args': (np.asarray(store.points(team)), team),
+                     'filename': f"{team.replace(' ', '')}_points_dist.png"})
+    return jobs
+
+
+def match_jobs(matches, params, num_sims, seed):
+    from src.data_loader import load_players_from_csv
+    from src.league import League
+    from src.simulation import simulate_matches
+
+    league = League(load_players_from_csv(PLAYER_CSV))
+    jobs = []
+    for i, (h_name, a_name) in enumerate(matches):
+        if h_name not in league.teams or a_name not in league.teams:
+            print(f"[WARN] Skipping unknown match {h_name} vs {a_name}")
+            continue
+        h_att, h_def = league.teams[h_name].calculate_power(params)
+        a_att, a_def = league.teams[a_name].calculate_power(params)
+        gh, ga = simulate_matches(h_att, h_def, a_att, a_def, params, num_sims,
+                                  np.random.default_rng([seed, i]))
+        histories = [(gh > ga).astype(np.int8), (gh == ga).astype(np.int8), (gh < ga).astype(np.int8)]
+        jobs.append({'kind': 'convergence', 'args': (*histories, h_name, a_name),
+                     'filename': f"{h_name}_vs_{a_name}_convergence.png".replace(' ', '')})
+    return jobs
+
+
+def exact_jobs():
+    from src.exact import season_pmfs
+    from src.snapshot import load_snapshot
+
+    snapshot = load_snapshot(PLAYER_CSV)
+    pmfs = season_pmfs(snapshot.att, snapshot.dfn, snapshot.params)['points']
+    return [{'kind': 'points', 'args': (None, team), 'kwargs': {'pmf': pmf.round(12).tolist()},
+             'filename': f"{team.replace(' ', '')}_points_exact.png"}
+            for team, pmf in zip(snapshot.team_names, pmfs)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Render all report plots headlessly.")
+    parser.add_argument('--run', default=None, help="Saved run directory (default: latest)")
+    parser.add_argument('--match', nargs=2, action='append', default=[], metavar=('HOME', 'AWAY'),
+                        help="Add a convergence plot for this match (repeatable)")
+    parser.add_argument('--match-sims', type=int, default=10000)
+    parser.add_argument('--seed', type=int, default=0, help="Seed for match simulations (keeps plots cacheable)")
+    parser.add_argument('--plots-dir', default=PLOTS_DIR)
+    parser.add_argument('--workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="Re-render even if inputs are unchanged")
+    parser.add_argument('--exact', action='store_true',
+                        help="Exact points distributions of the tuned model instead of a saved run")
+    args = parser.parse_args()
+
+    if args.exact:
+        print("Rendering exact points distributions")
+        render_batch(exact_jobs(), plots_dir=args.plots_dir, max_workers=args.workers, force=args.force)
+        return
+
+    run_path = args.run
+    if run_path is None:
+        runs = list_runs()
+        if not runs:
+            print("No saved runs found. Run a league simulation first.")
+            return
+        run_path = os.path.join(RUNS_DIR, runs[-1])
+
+    store = SeasonStore.open(run_path)
+    print(f"Rendering report for {run_path} ({store.num_sims} seasons)")
+
+    jobs = league_jobs(store)
+    if args.match:
+        if not store.meta.get('params'):
+            print("[WARN] Run has no stored params, skipping match plots.")
+        else:
+            jobs += match_jobs(args.match, store.meta['params'], args.match_sims, args.seed)
+
+    render_batch(jobs, plots_dir=args.plots_dir, max_workers=args.workers, force=args.force)
+
+
+if __name__ == "__main__":
+    main()
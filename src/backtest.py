@@ -0,0 +1,147 @@
+"""
+Multi-season backtesting with cached stages.
+
+Each season pairs a player stats CSV with its final standings. A tuning
+config is scored on a season in three stages:
+
+    data:   player records and standings, keyed by the contents of both files
+    powers: team attack / defense (src/power_model.py), keyed by the data key,
+            the position weights and the player metric weights
+    table:  expected points per team (src/exact.py), keyed by the powers key and
+            the match parameters (sigma, scaling_factor, home_adv, league_avg_goals)
+
+Every stage result is pickled under cache_dir/<stage>/<key>.pkl. A stage is only
+recomputed when its own inputs change, so after changing sigma a backtest reuses
+the parsed data and the team powers of every season and only rebuilds the
+tables. (config, season) pairs run in parallel worker processes that share the
+cache directory; entries are written atomically.
+"""
+import concurrent.futures
+import os
+import pickle
+import uuid
+
+import numpy as np
+from scipy.stats import spearmanr
+
+from src.cache import file_hash, make_key
+from src.data_loader import load_player_records, load_standings_from_csv
+from src.exact import DEFAULT_NODES, expected_points
+from src.params import DEFAULT_SIM_PARAMS, apply_config, build_metric_weights
+from src.power_model import TeamPowerModel
+
+SEASONS = {
+    '2023-24': {'players': 'data/raw/player_stats_2023-24.csv',
+                'standings': 'data/raw/team_stats_2023-24_full.csv'},
+    '2024-25': {'players': 'data/raw/player_stats_2024-25.csv',
+                'standings': 'data/raw/team_stats_2024-25.csv'},
+}
+CACHE_DIR = 'output/backtest_cache'
+STAGES = ('data', 'powers', 'table')
+MATCH_KEYS = ('sigma', 'scaling_factor', 'home_adv', 'league_avg_goals')
+
+
+class StageCache:
+    """Pickled stage results on disk, with per-stage hit / miss counts."""
+    def __init__(self, cache_dir=CACHE_DIR):
+        self.cache_dir = cache_dir
+        self.hits = dict.fromkeys(STAGES, 0)
+        self.misses = dict.fromkeys(STAGES, 0)
+
+    def get_or_compute(self, stage, key, compute):
+        path = os.path.join(self.cache_dir, stage, f"{key}.pkl")
+        try:
+            with open(path, 'rb') as f:
+                value = pickle.load(f)
+            self.hits[stage] += 1
+            return value
+        except (FileNotFoundError, EOFError, pickle.UnpicklingError):
+            pass
+        value = compute()
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp, 'wb') as f:
+            pickle.dump(value, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, path)
+        self.misses[stage] += 1
+        return value
+
+
+def _load_season(spec):
+    standings = load_standings_from_csv(spec['standings'])
+    if standings.empty:
+        raise ValueError(f"No standings in {spec['standings']}")
+    return load_player_records(spec['players'], lineups_only=True), standings
+
+
+def _team_powers(records, sim_params, metric_weights):
+    model = TeamPowerModel.from_records(records)
+    att, dfn = model.powers(sim_params, metric_weights)
+    return model.team_names, att, dfn
+
+
+def evaluate_season(season, spec, config, base_params=None, cache=None, n_nodes=DEFAULT_NODES):
+    """
+    Score a flat tuning config on one season. Returns a dict with
+        error:     rank-paired squared error, the tuning objective (compute_error)
+        mae:       mean absolute points error per team
+        rank_corr: Spearman correlation of expected and actual points
+        champion:  whether the team with the most expected points won the league
+    """
+    cache = cache or StageCache()
+    sim_params = apply_config(base_params or DEFAULT_SIM_PARAMS, config)
+    metric_weights = build_metric_weights(config)
+
+    data_key = make_key('data', file_hash(spec['players']), file_hash(spec['standings']))
+    records, standings = cache.get_or_compute('data', data_key, lambda: _load_season(spec))
+
+    powers_key = make_key('powers', data_key, sim_params['weights'], metric_weights)
+    team_names, att, dfn = cache.get_or_compute(
+        'powers', powers_key, lambda: _team_powers(records, sim_params, metric_weights))
+
+    table_key = make_key('table', powers_key, {k: sim_params.get(k) for k in MATCH_KEYS}, n_nodes)
+    predicted = cache.get_or_compute('table', table_key, lambda: expected_points(att, dfn, sim_params, n_nodes=n_nodes))
+
+    actual = standings.set_index('Squad')['Pts'].reindex(team_names)
+    if actual.isna().any():
+        missing = ', '.join(actual[actual.isna()].index)
+        raise ValueError(f"{season}: teams without standings: {missing}")
+    actual = actual.to_numpy(dtype=float)
+    return {
+        'season': season,
+        'error': float(np.sum((np.sort(predicted) - np.sort(actual)) ** 2)),
+        'mae': float(np.mean(np.abs(predicted - actual))),
+        'rank_corr': float(spearmanr(predicted, actual).statistic),
+        'champion': bool(np.argmax(predicted) == np.argmax(actual)),
+    }
+
+
+def _evaluate_task(args):
+    name, season, spec, config, base_params, cache_dir, n_nodes = args
+    cache = StageCache(cache_dir)
+    row = evaluate_season(season, spec, config, base_params, cache, n_nodes)
+    return dict(row, config=name), cache.hits, cache.misses
+
+
+def run_backtest(configs, seasons=None, base_params=None, cache_dir=CACHE_DIR, n_nodes=DEFAULT_NODES,
+                 max_workers=None):
+    """
+    Score every config on every season in parallel.
+
+    configs: {name: flat tuning config}
+    seasons: {season: {'players': csv, 'standings': csv}}, defaults to SEASONS
+    Returns (rows, stats): one metrics dict per (config, season), and the total
+    stage cache hits / misses.
+    """
+    seasons = seasons or SEASONS
+    tasks = [(name, season, spec, config, base_params, cache_dir, n_nodes)
+             for name, config in configs.items() for season, spec in seasons.items()]
+    stats = {'hits': dict.fromkeys(STAGES, 0), 'misses': dict.fromkeys(STAGES, 0)}
+    rows = []
+    with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers) as executor:
+        for row, hits, misses in executor.map(_evaluate_task, tasks):
+            rows.append(row)
+            for stage in STAGES:
+                stats['hits'][stage] += hits[stage]
+                stats['misses'][stage] += misses[stage]
+    return rows, stats
@@ -0,0 +1,93 @@
+"""
+Forecast intervals that include the uncertainty of the player statistics.
+
+Team powers come from season totals (goals, assists, xG, xAG, progressive
+actions) that are themselves noisy. Each bootstrap replicate redraws the
+attacking totals of every default-XI player and recomputes the team powers:
+
+    - counts (Gls, Ast, PrgC / PrgP / PrgR) ~ Poisson(observed)
+    - xG, xAG ~ XG_PER_CHANCE * Poisson(observed / XG_PER_CHANCE), i.e. the total
+      of chances worth XG_PER_CHANCE each
+
+Sums of independent Poisson draws are Poisson, so a replicate only needs one
+draw per team, position group and stat group of TeamPowerModel.att_stats, and
+all replicate powers come from one tensor contraction. Minutes and starts
+(hence lineups and defensive power) are exact records and stay fixed.
+All replicates are then simulated in one simulate_seasons call with per-season
+powers, sims_per_replicate seasons each.
+"""
+import numpy as np
+
+from src.simulation import simulate_seasons
+
+XG_PER_CHANCE = 0.1
+# Poisson unit of each TeamPowerModel attacking stat group (Gls, Ast, xG, xAG, progressive actions)
+STAT_UNITS = np.array([1.0, 1.0, XG_PER_CHANCE, XG_PER_CHANCE, 1.0])
+EVENTS = ['Title', 'Top 4', 'Relegated']
+
+
+def resample_att_stats(att_stats, n_replicates, rng=None):
+    """(n_replicates, *att_stats.shape) parametric bootstrap draws of the lineup stat totals."""
+    rng = np.random.default_rng() if rng is None else rng
+    return rng.poisson(att_stats / STAT_UNITS, size=(n_replicates,) + att_stats.shape) * STAT_UNITS
+
+
+def bootstrap_powers(model, sim_params, metric_weights=None, n_replicates=200, rng=None):
+    """Attack and defense powers per replicate, (n_replicates, n_teams) each."""
+    stats = resample_att_stats(model.att_stats, n_replicates, rng)
+    att, dfn = model.powers(sim_params, metric_weights, att_stats=stats)
+    return att, np.broadcast_to(dfn, att.shape)
+
+
+def bootstrap_forecast(model, sim_params, metric_weights=None, n_replicates=200, sims_per_replicate=1000,
+                       rng=None, interval=0.9, relegation_spots=3):
+    """
+    Nested simulation: n_replicates bootstrap replicates of the team powers,
+    sims_per_replicate seasons each, in one batched run.
+
+    Returns table rows sorted by average points with
+        'Avg Pts', 'Pts low', 'Pts high': mean and central `interval` of season points
+                                          over all seasons (data and match uncertainty)
+        'Pts low (fixed)', 'Pts high (fixed)': the same interval with the stats taken as exact
+        'Data share': share of the points variance due to the player statistics
+        'Title', 'Top 4', 'Relegated': probabilities, each with 'low' / 'high' bounds,
+                                       the `interval` range of the replicate probabilities
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    att, dfn = bootstrap_powers(model, sim_params, metric_weights, n_replicates, rng)
+    num_sims = n_replicates * sims_per_replicate
+    seasons = simulate_seasons(np.repeat(att, sims_per_replicate, axis=0), np.repeat(dfn, sims_per_replicate, axis=0),
+                               sim_params, num_sims, rng=rng)
+    n_teams = att.shape[1]
+    points = seasons['points'].reshape(n_replicates, sims_per_replicate, n_teams).astype(float)
+    positions = seasons['positions'].reshape(points.shape)
+
+    q = [(1 - interval) / 2, (1 + interval) / 2]
+    pts_range = np.quantile(points.reshape(num_sims, n_teams), q, axis=0)
+    # Within-replicate spread only, centred on each replicate's mean: the stats-as-exact interval
+    within = points - points.mean(axis=1, keepdims=True) + points.mean(axis=(0, 1))
+    fixed_range = np.quantile(within.reshape(num_sims, n_teams), q, axis=0)
+    data_share = points.mean(axis=1).var(axis=0) / np.maximum(points.reshape(num_sims, n_teams).var(axis=0), 1e-12)
+
+    events = {
+        'Title': positions == 1,
+        'Top 4': positions <= 4,
+        'Relegated': positions > n_teams - relegation_spots,
+    }
+    rows = []
+    for t, name in enumerate(model.team_names):
+        row = {
+            'Team': name,
+            'Avg Pts': float(points[..., t].mean()),
+            'Pts low': float(pts_range[0, t]),
+            'Pts high': float(pts_range[1, t]),
+            'Pts low (fixed)': float(fixed_range[0, t]),
+            'Pts high (fixed)': float(fixed_range[1, t]),
+            'Data share': float(data_share[t]),
+        }
+        for event, hits in events.items():
+            per_replicate = hits[..., t].mean(axis=1)
+            row[event] = float(per_replicate.mean())
+            row[f'{event} low'], row[f'{event} high'] = (float(v) for v in np.quantile(per_replicate, q))
+        rows.append(row)
+    return sorted(rows, key=lambda r: r['Avg Pts'], reverse=True)
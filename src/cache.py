@@ -0,0 +1,56 @@
+import hashlib
+import json
+from collections import OrderedDict
+
+
+def make_key(*parts):
+    """Stable hash for JSON-serialisable request parts (teams, lineups, params...)."""
+    payload = json.dumps(parts, sort_keys=True, default=float)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def file_hash(path):
+    """SHA-1 of a file's contents."""
+    h = hashlib.sha1()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            h.update(block)
+    return h.hexdigest()
+
+
+class LRUCache:
+    """Small least-recently-used cache on top of OrderedDict."""
+    def __init__(self, maxsize=1024):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, default=None):
+        if key in self._data:
+            self._data.move_to_end(key)
+            self.hits += 1
+            return self._data[key]
+        self.misses += 1
+        return default
+
+    def put(self, key, value):
+        self._data[key] = value
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        self._data.clear()
+
+    def stats(self):
+        return {'size': len(self._data), 'maxsize': self.maxsize, 'hits': self.hits, 'misses': self.misses}
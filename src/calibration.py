@@ -0,0 +1,162 @@
+"""
+Match-level maximum-likelihood calibration.
+
+Fits the tuning config to individual match scores instead of the final table.
+Under the simulate_match_fast model a score (g_h, g_a) has likelihood
+
+    E_noise[ Pois(g_h; lambda_home) * Pois(g_a; lambda_away) ]
+
+with the home and away form noise integrated out by Gauss-Hermite quadrature.
+Team powers come from the same player stats and default XI as the simulator
+(src/power_model.py), so one evaluation over a whole season of matches is a
+few array operations. Standard errors come from the inverse of the numerical
+Hessian of the negative log-likelihood at the optimum.
+"""
+import time
+
+import numpy as np
+from scipy.optimize import minimize
+from scipy.special import gammaln, logsumexp
+
+from src.exact import normal_quadrature
+from src.fitting import ParamSpace, round_config
+from src.params import DEFAULT_SIM_PARAMS, apply_config, build_metric_weights
+from src.power_model import TeamPowerModel
+from src.simulation import match_rates
+
+CALIBRATION_NODES = 8
+HESSIAN_STEP = 1e-3
+# Within one Hessian step of a bound the central differences would leave [0, 1]
+BOUND_TOL = HESSIAN_STEP
+
+
+def at_bound(u, tol=BOUND_TOL):
+    """Whether a unit-scaled value is too close to 0 or 1 for a central-difference Hessian."""
+    return not tol <= u <= 1 - tol
+
+
+class MatchLikelihood(ParamSpace):
+    """Negative log-likelihood of the observed scores as a function of the unit-scaled config."""
+    def __init__(self, model, matches, param_config, base_params=None, fixed=None, n_nodes=CALIBRATION_NODES):
+        super().__init__(param_config)
+        self.model = model
+        self.fixed = fixed or {}
+        self.base_params = base_params or DEFAULT_SIM_PARAMS
+        self.n_nodes = n_nodes
+
+        index = {name: i for i, name in enumerate(model.team_names)}
+        unknown = sorted((set(matches['home_team']) | set(matches['away_team'])) - set(index))
+        if unknown:
+            raise ValueError(f"Teams in match data without player stats: {', '.join(unknown)}")
+        self.home = matches['home_team'].map(index).to_numpy()
+        self.away = matches['away_team'].map(index).to_numpy()
+        self.goals_home = matches['home_score'].to_numpy(dtype=float)
+        self.goals_away = matches['away_score'].to_numpy(dtype=float)
+        self.log_fact = gammaln(self.goals_home + 1) + gammaln(self.goals_away + 1)
+        self.n_evals = 0
+
+    def log_likelihood(self, config):
+        config = dict(self.fixed, **config)
+        sim_params = apply_config(self.base_params, config)
+        att, dfn = self.model.powers(sim_params, build_metric_weights(config))
+        x, w = normal_quadrature(sim_params.get('sigma', 0.1), self.n_nodes)
+        log_w = np.log(w[:, None] * w[None, :])
+
+        expand = (slice(None), None, None)
+        lambda_home, lambda_away = match_rates(
+            att[self.home][expand], dfn[self.home][expand],
+            att[self.away][expand], dfn[self.away][expand],
+            x[:, None], x[None, :], sim_params)
+        gh = self.goals_home[expand]
+        ga = self.goals_away[expand]
+        log_p = gh * np.log(lambda_home) - lambda_home + ga * np.log(lambda_away) - lambda_away
+        per_match = logsumexp(log_p + log_w, axis=(1, 2)) - self.log_fact
+        return float(per_match.sum())
+
+    def __call__(self, u):
+        self.n_evals += 1
+        return -self.log_likelihood(self.to_config(u))
+
+    def hessian(self, u, free, step=HESSIAN_STEP):
+        """Central-difference Hessian of the objective over the indices in free (unit space)."""
+        n = len(free)
+        H = np.zeros((n, n))
+        f0 = self(u)
+        for a, i in enumerate(free):
+            for b, j in enumerate(free[:a + 1]):
+                if i == j:
+                    up, down = u.copy(), u.copy()
+                    up[i] += step
+                    down[i] -= step
+                    H[a, a] = (self(up) - 2 * f0 + self(down)) / step ** 2
+                    continue
+                total = 0.0
+                for si, sj, sign in ((1, 1, 1), (1, -1, -1), (-1, 1, -1), (-1, -1, 1)):
+                    shifted = u.copy()
+                    shifted[i] += si * step
+                    shifted[j] += sj * step
+                    total += sign * self(shifted)
+                H[a, b] = H[b, a] = total / (4 * step ** 2)
+        return H
+
+    def standard_errors(self, u):
+        """
+        {key: standard error} in natural units. Parameters at or within
+        BOUND_TOL of a bound have no regular asymptotic distribution (and no
+        symmetric difference step) and get None; so does everything if
+        the Hessian is not positive definite (parameters not identified).
+        """
+        free = [i for i in range(len(u)) if not at_bound(u[i])]
+        errors = {key: None for key in self.keys}
+        if not free:
+            return errors
+        H = self.hessian(u, free)
+        try:
+            np.linalg.cholesky(H)
+        except np.linalg.LinAlgError:
+            return errors
+        cov = np.linalg.inv(H)
+        span = self.upper - self.lower
+        for a, i in enumerate(free):
+            errors[self.keys[i]] = float(np.sqrt(cov[a, a]) * span[i])
+        return errors
+
+
+def calibrate(records, matches, param_config, fixed=None, starts=None, base_params=None,
+              max_iter=500, verbose=True):
+    """
+    Maximum-likelihood config for the observed match scores.
+
+    records: player rows for the season the matches come from
+    matches: DataFrame from data_loader.load_match_results
+    param_config: PARAM_CONFIG-style ranges of the keys to fit
+    fixed: config values held constant. Attack power is linear in the metric
+           weights, so scaling all of them and scaling_factor together leaves
+           every rate unchanged; one metric weight has to be fixed to pin the scale.
+    Returns (config, std_errors, info); config includes the fixed values.
+    """
+    t0 = time.perf_counter()
+    model = TeamPowerModel.from_records(records)
+    objective = MatchLikelihood(model, matches, param_config, base_params, fixed)
+
+    initial = [np.full(len(objective.keys), 0.5)] + [objective.to_unit(c) for c in (starts or [])]
+    best = None
+    for u0 in initial:
+        res = minimize(objective.value_and_gradient, u0, jac=True, method='L-BFGS-B',
+                       bounds=objective.bounds(), options={'maxiter': max_iter})
+        if best is None or res.fun < best.fun:
+            best = res
+
+    config = round_config(objective.to_config(best.x), param_config)
+    std_errors = objective.standard_errors(best.x)
+    info = {
+        'log_likelihood': -float(best.fun),
+        'n_matches': int(len(objective.home)),
+        'at_bound': [k for k, u in zip(objective.keys, best.x) if at_bound(u)],
+        'evaluations': objective.n_evals,
+        'seconds': time.perf_counter() - t0,
+    }
+    if verbose:
+        print(f"  Log-likelihood {info['log_likelihood']:.2f} over {info['n_matches']} matches "
+              f"({info['evaluations']} evaluations, {info['seconds']:.1f}s)")
+    return dict(objective.fixed, **config), std_errors, info
@@ -1,5 +1,6 @@
 import pandas as pd
 from src.models import Player
+from src.utils import simplify_position
 
 
 TEAM_NAME_MAPPING = {
@@ -9,39 +10,111 @@ TEAM_NAME_MAPPING = {
     'Bournemouth': 'AFC Bournemouth',
     'West Ham': 'West Ham United',
     'Wolves': 'Wolverhampton Wanderers',
+    'Wolverhampton': 'Wolverhampton Wanderers',
     'Manchester Utd': 'Manchester United',
     'Spurs': 'Tottenham Hotspur',
     'Tottenham': 'Tottenham Hotspur',
 }
 
 
+# Player columns read by Player / calculate_player_metrics / TeamPowerModel; the rest of an export is skipped
+PLAYER_COLUMNS = ['Player', 'Squad', 'Pos', 'Min', 'Starts', 'Gls', 'Ast', 'xG', 'xAG', 'PrgC', 'PrgP', 'PrgR']
+TEXT_COLUMNS = ['Player', 'Squad', 'Pos']
+CHUNK_ROWS = 100_000
+# Players per team and position group that can make a default XI (Team.get_default_11)
+LINEUP_CANDIDATES = 11
+
+
 def standardize_team_name(name: str) -> str:
     """Convert team name to standard form"""
     return TEAM_NAME_MAPPING.get(name, name)
 
 
-def load_players_from_csv(filepath):
+def iter_player_chunks(filepath, chunksize=CHUNK_ROWS, extra_columns=()):
+    """
+    Player rows in DataFrames of at most chunksize rows, with only PLAYER_COLUMNS
+    (plus extra_columns, e.g. a season or competition column), missing stats as 0,
+    whole-number stats downcast to the smallest integer type and standardized
+    'Squad' names. Exports with a 'Team' column instead of 'Squad' are renamed.
+    """
+    header = pd.read_csv(filepath, nrows=0).columns
+    rename = {'Team': 'Squad'} if 'Squad' not in header and 'Team' in header else {}
+    usecols = [c for c in PLAYER_COLUMNS + list(extra_columns) if c in header] + list(rename)
+
+    for chunk in pd.read_csv(filepath, usecols=usecols, chunksize=chunksize):
+        chunk = chunk.rename(columns=rename)
+        for col in chunk.columns:
+            if col in TEXT_COLUMNS or col in extra_columns:
+                continue
+            values = chunk[col].fillna(0)
+            if (values % 1 == 0).all():
+                values = pd.to_numeric(values, downcast='integer')
+            chunk[col] = values
+        if 'Squad' in chunk.columns:
+            chunk['Squad'] = chunk['Squad'].replace(TEAM_NAME_MAPPING)
+        yield chunk
+
+
+def lineup_candidates(df, keys=('Squad',)):
+    """
+    The rows that can make a team's default XI: per team (keys) and position
+    group, the LINEUP_CANDIDATES players with the most minutes, in file order.
+    A player further down their group is never picked, not even as a filler, so
+    default-XI powers are unchanged. Players listed twice for a team keep their
+    last row, like Team.squad_pool.
+    """
+    keys = list(keys)
+    df = df.drop_duplicates(subset=keys + ['Player'], keep='last')
+    group = df['Pos'].map({pos: simplify_position(pos) for pos in df['Pos'].dropna().unique()}).fillna('UNK')
+    ranked = df.assign(_group=group).sort_values('Min', ascending=False, kind='stable')
+    return ranked.groupby(keys + ['_group'], sort=False).head(LINEUP_CANDIDATES).drop(columns='_group').sort_index()
+
+
+def load_player_frame(filepath, chunksize=CHUNK_ROWS, lineups_only=False, extra_columns=()):
+    """
+    All player rows of a CSV as one compact DataFrame, read chunk by chunk.
+    lineups_only: keep only lineup_candidates (per team, and per extra_columns
+    value), so memory stays bounded by the number of teams instead of rows.
+    """
+    keys = ['Squad'] + [c for c in extra_columns if c != 'Squad']
+    kept = None
+    for chunk in iter_player_chunks(filepath, chunksize, extra_columns):
+        kept = chunk if kept is None else pd.concat([kept, chunk])
+        if lineups_only:
+            kept = lineup_candidates(kept, keys)
+    return kept if kept is not None else pd.DataFrame(columns=PLAYER_COLUMNS)
+
+
+def load_players_from_csv(filepath, chunksize=CHUNK_ROWS):
     try:
-        df = pd.read_csv(filepath)
-        df.fillna(0, inplace=True)
-
-        if 'Squad' not in df.columns and 'Team' in df.columns:
-            df['Squad'] = df['Team']
-
-        # Standardize team names
-        if 'Squad' in df.columns:
-            df['Squad'] = df['Squad'].apply(standardize_team_name)
-
         players_objects = []
-        for _, row in df.iterrows():
-            players_objects.append(Player(row))
-
+        for chunk in iter_player_chunks(filepath, chunksize):
+            players_objects.extend(Player(row) for row in chunk.to_dict('records'))
         return players_objects
     except Exception as e:
         print(f"Error loading players CSV: {e}")
         return []
 
 
+def load_player_records(filepath, chunksize=CHUNK_ROWS, lineups_only=False):
+    """
+    Player rows as dicts with standardized 'Squad' names (no Player objects).
+    lineups_only: only the rows that can make a default XI (lineup_candidates),
+    enough for everything that uses default lineups (tuning, fitting, backtests).
+    """
+    return load_player_frame(filepath, chunksize, lineups_only).to_dict('records')
+
+
+def load_match_results(filepath):
+    """Played matches (home_team, away_team, home_score, away_score) with standardized names."""
+    df = pd.read_csv(filepath, usecols=['home_team', 'away_team', 'home_score', 'away_score'])
+    df = df.dropna()
+    df['home_team'] = df['home_team'].apply(standardize_team_name)
+    df['away_team'] = df['away_team'].apply(standardize_team_name)
+    df[['home_score', 'away_score']] = df[['home_score', 'away_score']].astype(int)
+    return df.reset_index(drop=True)
+
+
 def load_teams_from_csv(filepath):
     """Load unique team names from CSV"""
     try:
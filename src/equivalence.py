@@ -0,0 +1,187 @@
+"""
+Statistical equivalence of simulation engines.
+
+A faster engine must reproduce the distributions of the reference scalar path
+(League.simulate_match_fast in Python loops), not just its means. Both are run
+on the same team powers and fixed seeds and compared with two-sample tests:
+
+    match outcomes (W/D/L) and goal counts:  chi-square homogeneity
+    goal counts and season points:           Kolmogorov-Smirnov
+    league positions:                        chi-square homogeneity
+    mean goals / points, title, top-four and relegation rates:
+                                             confidence interval of the difference contains 0
+
+Every check yields a p-value and fails below family_alpha / number of checks
+(Bonferroni), so a correct engine fails a whole run with probability at most
+family_alpha. The interval half-widths and the detectable differences shrink
+as 1 / sqrt(samples), so more samples give tighter tolerances. Sparse
+categories are pooled until every expected count reaches MIN_EXPECTED. KS is
+conservative on discrete data, so the chi-square tests carry most of the power.
+"""
+import numpy as np
+from scipy import stats
+
+from src.form import simulate_form_seasons
+from src.kernels import HAS_NUMBA
+from src.simulation import build_fixtures, simulate_matches, simulate_seasons
+
+FAMILY_ALPHA = 0.01
+MIN_EXPECTED = 5
+
+MATCH_ENGINES = {
+    'numpy': lambda h_att, h_def, a_att, a_def, params, n, rng: simulate_matches(
+        h_att, h_def, a_att, a_def, params, n, rng, engine='numpy'),
+    'qmc': lambda h_att, h_def, a_att, a_def, params, n, rng: simulate_matches(
+        h_att, h_def, a_att, a_def, params, n, rng, engine='qmc'),
+}
+SEASON_ENGINES = {
+    'numpy': lambda att, dfn, params, n, rng: simulate_seasons(att, dfn, params, n, rng=rng, engine='numpy'),
+    'qmc': lambda att, dfn, params, n, rng: simulate_seasons(att, dfn, params, n, rng=rng, engine='qmc'),
+    # The in-season form engine with form switched off is the static model played by rounds
+    'form': lambda att, dfn, params, n, rng: simulate_form_seasons(att, dfn, dict(params, form_rate=0), n, rng),
+}
+if HAS_NUMBA:
+    SEASON_ENGINES['numba'] = lambda att, dfn, params, n, rng: simulate_seasons(
+        att, dfn, params, n, rng=rng, engine='numba')
+
+
+def reference_matches(league, h_att, h_def, a_att, a_def, params, num_sims, seed):
+    """num_sims scores from League.simulate_match_fast, seeded through the global NumPy state it uses."""
+    np.random.seed(seed)
+    scores = np.array([league.simulate_match_fast(h_att, h_def, a_att, a_def, params) for _ in range(num_sims)])
+    return scores[:, 0], scores[:, 1]
+
+
+def reference_seasons(league, att, dfn, params, num_sims, seed=None):
+    """The original per-match Python season loop: points, gf, ga and positions like simulate_seasons."""
+    if seed is not None:
+        np.random.seed(seed)
+    n_teams = len(att)
+    home, away = build_fixtures(n_teams)
+    points = np.zeros((num_sims, n_teams), dtype=np.int16)
+    gf = np.zeros((num_sims, n_teams), dtype=np.int32)
+    ga = np.zeros((num_sims, n_teams), dtype=np.int32)
+    positions = np.zeros((num_sims, n_teams), dtype=np.int64)
+    for s in range(num_sims):
+        for h, a in zip(home, away):
+            gh, g_a = league.simulate_match_fast(att[h], dfn[h], att[a], dfn[a], params)
+            gf[s, h] += gh
+            gf[s, a] += g_a
+            ga[s, h] += g_a
+            ga[s, a] += gh
+            if gh > g_a: points[s, h] += 3
+            elif g_a > gh: points[s, a] += 3
+            else:
+                points[s, h] += 1
+                points[s, a] += 1
+        # Points, then goals scored, then team order
+        table = sorted(range(n_teams), key=lambda t: (-points[s, t], -gf[s, t]))
+        for pos, t in enumerate(table):
+            positions[s, t] = pos + 1
+    return {'points': points, 'gf': gf, 'ga': ga, 'positions': positions}
+
+
+def chi_square_test(a, b):
+    """
+    Two-sample chi-square homogeneity p-value for integer samples. Adjacent values
+    are pooled until every expected count is at least MIN_EXPECTED.
+    """
+    a, b = np.asarray(a).ravel(), np.asarray(b).ravel()
+    values = np.union1d(a, b)
+    counts = np.array([np.bincount(np.searchsorted(values, x), minlength=len(values)) for x in (a, b)])
+    share = min(len(a), len(b)) / (len(a) + len(b))
+    bins, current = [], np.zeros(2)
+    for column in counts.T:
+        current = current + column
+        if current.sum() * share >= MIN_EXPECTED:
+            bins.append(current)
+            current = np.zeros(2)
+    if current.sum() and bins:
+        bins[-1] = bins[-1] + current
+    if len(bins) < 2:
+        return 1.0
+    return float(stats.chi2_contingency(np.array(bins).T, correction=False).pvalue)
+
+
+def ks_test(a, b):
+    return float(stats.ks_2samp(np.asarray(a).ravel(), np.asarray(b).ravel()).pvalue)
+
+
+def difference_test(a, b, z=1.96):
+    """
+    Difference of means and the half-width of its z-interval (default 95%), with the
+    p-value of 'no difference'; the tolerance shrinks as 1 / sqrt(samples).
+    """
+    a, b = np.asarray(a, dtype=float), np.asarray(b, dtype=float)
+    diff = b.mean() - a.mean()
+    pooled = np.concatenate([a, b])
+    se = np.sqrt(pooled.var(ddof=1) * (1 / len(a) + 1 / len(b)))
+    if se == 0:
+        return diff, 0.0, 1.0 if diff == 0 else 0.0
+    return diff, z * se, float(2 * stats.norm.sf(abs(diff) / se))
+
+
+def _row(check, test, p_value, detail=''):
+    return {'check': check, 'test': test, 'p_value': p_value, 'detail': detail}
+
+
+def compare_matches(label, reference, candidate):
+    """Checks of one fixture: (home goals, away goals) samples of the reference and the candidate."""
+    (ref_h, ref_a), (new_h, new_a) = reference, candidate
+    rows = [_row(label, 'outcomes chi2', chi_square_test(np.sign(ref_h - ref_a), np.sign(new_h - new_a)))]
+    for side, ref, new in (('home', ref_h, new_h), ('away', ref_a, new_a)):
+        diff, tol, p = difference_test(ref, new)
+        rows += [_row(label, f'{side} goals chi2', chi_square_test(ref, new)),
+                 _row(label, f'{side} goals KS', ks_test(ref, new)),
+                 _row(label, f'{side} mean goals', p, f'{diff:+.3f} (tolerance {tol:.3f})')]
+    return rows
+
+
+def compare_seasons(team_names, reference, candidate, relegation_spots=3):
+    """Per-team checks of two season samples (dicts with 'points' and 'positions')."""
+    n_teams = len(team_names)
+    events = {'title': lambda pos: pos == 1, 'top 4': lambda pos: pos <= 4,
+              'relegated': lambda pos: pos > n_teams - relegation_spots}
+    rows = []
+    for t, name in enumerate(team_names):
+        ref_pos, new_pos = reference['positions'][:, t], candidate['positions'][:, t]
+        ref_pts, new_pts = reference['points'][:, t], candidate['points'][:, t]
+        diff, tol, p = difference_test(ref_pts, new_pts)
+        rows += [_row(name, 'positions chi2', chi_square_test(ref_pos, new_pos)),
+                 _row(name, 'points KS', ks_test(ref_pts, new_pts)),
+                 _row(name, 'mean points', p, f'{diff:+.2f} (tolerance {tol:.2f})')]
+        for event, test in events.items():
+            diff, tol, p = difference_test(test(ref_pos), test(new_pos))
+            rows.append(_row(name, f'{event} rate', p, f'{diff:+.4f} (tolerance {tol:.4f})'))
+    return rows
+
+
+def judge(rows, family_alpha=FAMILY_ALPHA):
+    """Mark rows as passed against the Bonferroni threshold; returns (all passed, threshold)."""
+    threshold = family_alpha / max(len(rows), 1)
+    for row in rows:
+        row['passed'] = row['p_value'] >= threshold
+    return all(row['passed'] for row in rows), threshold
+
+
+def check_match_engine(engine, league, fixtures, params, num_sims, seed=0):
+    """
+    Rows for one match engine against the reference.
+    fixtures: [(label, h_att, h_def, a_att, a_def)]
+    """
+    simulate = MATCH_ENGINES[engine] if isinstance(engine, str) else engine
+    rows = []
+    for i, (label, *powers) in enumerate(fixtures):
+        reference = reference_matches(league, *powers, params, num_sims, seed + i)
+        candidate = simulate(*powers, params, num_sims, np.random.default_rng([seed, i, 1]))
+        rows += compare_matches(label, reference, candidate)
+    return rows
+
+
+def check_season_engine(engine, team_names, att, dfn, params, num_sims, seed=0, reference=None, league=None):
+    """Rows for one season engine; pass a reference_seasons result to reuse it across engines."""
+    simulate = SEASON_ENGINES[engine] if isinstance(engine, str) else engine
+    if reference is None:
+        reference = reference_seasons(league, att, dfn, params, num_sims, seed)
+    candidate = simulate(att, dfn, params, len(reference['points']), np.random.default_rng([seed, 1]))
+    return compare_seasons(team_names, reference, candidate)
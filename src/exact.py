@@ -0,0 +1,177 @@
+"""
+Deterministic match outcome probabilities.
+
+Under the simulate_match_fast model a fixture only has two random inputs before
+the Poisson draws: the home and away form noise, N(0, sigma) each. Integrating
+them with Gauss-Hermite quadrature over the Skellam goal difference gives the
+exact (up to quadrature error) win/draw/loss probabilities and
+expected points, with no sampling noise.
+
+Fixtures share no random inputs, so a team's season points are a sum of
+independent per-match points and their distribution is the convolution of its
+per-match win/draw/loss distributions (season_pmfs). Goals for work the same
+way with per-match goal distributions. Histograms and percentile bands then
+come without sampling.
+"""
+import numpy as np
+from scipy.fft import irfft, next_fast_len, rfft
+from scipy.special import gammaln
+from scipy.stats import poisson, skellam
+
+from src.simulation import build_fixtures, match_rates
+
+DEFAULT_NODES = 8
+# Goal distributions: quadrature nodes per noise, and the probability mass they may neglect
+GOAL_NODES = 24
+GOAL_TAIL = 1e-6
+
+
+def normal_quadrature(sigma, n_nodes=DEFAULT_NODES):
+    """Nodes and weights so that sum(w * f(x)) ~ E[f(X)], X ~ N(0, sigma)."""
+    x, w = np.polynomial.hermite_e.hermegauss(n_nodes)
+    return sigma * x, w / w.sum()
+
+
+def conditional_outcomes(lambda_home, lambda_away):
+    """
+    P(home win), P(draw), P(away win) for given Poisson rates (any shape).
+    The goal difference of two independent Poissons is Skellam distributed, which
+    stays accurate for the very large rates extreme params can produce.
+    """
+    draw = skellam.pmf(0, lambda_home, lambda_away)
+    away_win = skellam.cdf(-1, lambda_home, lambda_away)
+    home_win = np.clip(1.0 - away_win - draw, 0.0, 1.0)
+    return home_win, draw, away_win
+
+
+def fixture_probabilities(h_att, h_def, a_att, a_def, params, n_nodes=DEFAULT_NODES):
+    """
+    Win/draw/loss probabilities for arrays of fixtures (broadcastable inputs),
+    with the form noise integrated out.
+    """
+    x, w = normal_quadrature(params.get('sigma', 0.1), n_nodes)
+    noise_home = x[:, None]
+    noise_away = x[None, :]
+    weight = (w[:, None] * w[None, :])
+
+    shape = np.broadcast(h_att, h_def, a_att, a_def).shape
+    expand = (...,) + (None, None)
+    lambda_home, lambda_away = match_rates(
+        np.asarray(h_att)[expand], np.asarray(h_def)[expand],
+        np.asarray(a_att)[expand], np.asarray(a_def)[expand],
+        noise_home, noise_away, params)
+    hw, dr, aw = conditional_outcomes(lambda_home, lambda_away)
+    out = [np.sum(p * weight, axis=(-2, -1)).reshape(shape) for p in (hw, dr, aw)]
+    return tuple(out)
+
+
+def expected_points(att, dfn, params, fixtures=None, n_nodes=DEFAULT_NODES):
+    """Expected season points per team for a double round-robin (or the given fixtures)."""
+    att = np.asarray(att, dtype=float)
+    dfn = np.asarray(dfn, dtype=float)
+    home, away = build_fixtures(len(att)) if fixtures is None else fixtures
+    hw, dr, aw = fixture_probabilities(att[home], dfn[home], att[away], dfn[away], params, n_nodes)
+    points = np.zeros(len(att))
+    np.add.at(points, home, 3 * hw + dr)
+    np.add.at(points, away, 3 * aw + dr)
+    return points
+
+
+def fixture_goal_pmfs(h_att, h_def, a_att, a_def, params, max_goals=None, n_nodes=GOAL_NODES, tail=GOAL_TAIL):
+    """
+    Home and away goal distributions, (..., max_goals + 1) each, for arrays of
+    fixtures with the form noise integrated out. The last entry holds P(goals >= max_goals).
+
+    The home log-rate is linear in the two noises, (h_att * n_home - a_def * n_away) / scaling_factor,
+    so it is normal with sd sigma * hypot(h_att, a_def) / scaling_factor and one
+    quadrature dimension is exact. Goal counts depend far more on the noise tails
+    than results do, hence more nodes. By default max_goals is the smallest count
+    that every fixture exceeds with probability at most `tail`.
+    """
+    sigma = params.get('sigma', 0.1)
+    scaling_factor = params.get('scaling_factor', 250)
+    x, w = normal_quadrature(1.0, n_nodes)
+    h_att, h_def, a_att, a_def = np.broadcast_arrays(*(np.asarray(v, dtype=float) for v in (h_att, h_def, a_att, a_def)))
+    base_home, base_away = match_rates(h_att, h_def, a_att, a_def, 0, 0, params)
+    rates = [base_home[..., None] * np.exp(sigma * np.hypot(h_att, a_def)[..., None] / scaling_factor * x),
+             base_away[..., None] * np.exp(sigma * np.hypot(a_att, h_def)[..., None] / scaling_factor * x)]
+    if max_goals is None:
+        # Bisect on the mixture tail; the largest node rate alone would give a far larger bound
+        lo, hi = 1, int(poisson.isf(tail, max(r.max() for r in rates))) + 1
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if max(np.max(poisson.sf(mid, r) @ w) for r in rates) <= tail:
+                hi = mid
+            else:
+                lo = mid + 1
+        max_goals = lo
+    k = np.arange(max_goals + 1)
+    log_factorial = gammaln(k + 1)
+    pmfs = []
+    for rate in rates:
+        pmf = np.zeros(rate.shape[:-1] + (max_goals + 1,))
+        for i in range(len(w)):
+            lam = rate[..., i, None]
+            node_pmf = np.exp(k * np.log(lam) - lam - log_factorial)
+            node_pmf[..., -1] = poisson.sf(max_goals - 1, lam[..., 0])
+            pmf += w[i] * node_pmf
+        pmfs.append(pmf)
+    return tuple(pmfs)
+
+
+def convolve_pmfs(pmfs):
+    """
+    Distribution of the sum of independent variables on 0, 1, 2, ...:
+    pmfs (..., n_terms, support) -> (..., n_terms * (support - 1) + 1).
+    """
+    n_terms, support = pmfs.shape[-2:]
+    size = n_terms * (support - 1) + 1
+    n_fft = next_fast_len(size, real=True)
+    spectrum = np.prod(rfft(pmfs, n=n_fft, axis=-1), axis=-2)
+    total = np.clip(irfft(spectrum, n=n_fft, axis=-1)[..., :size], 0.0, None)
+    return total / total.sum(axis=-1, keepdims=True)
+
+
+def _team_terms(home_terms, away_terms, home, away, n_teams):
+    """Per-team stacks (n_teams, max matches, support) of per-fixture pmfs; idle slots are 0 w.p. 1."""
+    counts = np.bincount(home, minlength=n_teams) + np.bincount(away, minlength=n_teams)
+    terms = np.zeros((n_teams, counts.max(), home_terms.shape[-1]))
+    terms[..., 0] = 1.0
+    slot = np.zeros(n_teams, dtype=int)
+    for i, (h, a) in enumerate(zip(home, away)):
+        terms[h, slot[h]] = home_terms[i]
+        terms[a, slot[a]] = away_terms[i]
+        slot[h] += 1
+        slot[a] += 1
+    return terms
+
+
+def season_pmfs(att, dfn, params, fixtures=None, goals=False, n_nodes=DEFAULT_NODES, max_goals=None):
+    """
+    Exact season distributions per team for a double round-robin (or the given fixtures).
+    Returns {'points': (n_teams, 3 * matches + 1) pmf over season points}, plus
+    'gf': (n_teams, max_goals * matches + 1) pmf over goals for when goals=True
+    (see fixture_goal_pmfs for max_goals).
+    """
+    att = np.asarray(att, dtype=float)
+    dfn = np.asarray(dfn, dtype=float)
+    n_teams = len(att)
+    home, away = build_fixtures(n_teams) if fixtures is None else fixtures
+    h_att, h_def, a_att, a_def = att[home], dfn[home], att[away], dfn[away]
+
+    hw, dr, aw = fixture_probabilities(h_att, h_def, a_att, a_def, params, n_nodes)
+    zero = np.zeros_like(hw)
+    # P(0), P(1), P(2), P(3) points from one fixture
+    home_points = np.stack([aw, dr, zero, hw], axis=-1)
+    away_points = np.stack([hw, dr, zero, aw], axis=-1)
+    result = {'points': convolve_pmfs(_team_terms(home_points, away_points, home, away, n_teams))}
+    if goals:
+        home_goals, away_goals = fixture_goal_pmfs(h_att, h_def, a_att, a_def, params, max_goals)
+        result['gf'] = convolve_pmfs(_team_terms(home_goals, away_goals, home, away, n_teams))
+    return result
+
+
+def pmf_quantile(pmf, q):
+    """Smallest value whose cumulative probability reaches q, along the last axis."""
+    cdf = np.cumsum(pmf, axis=-1)
+    return np.argmax(cdf >= np.asarray(q)[..., None] - 1e-12, axis=-1)
@@ -0,0 +1,94 @@
+"""
+Thread and process execution backends for simulations.
+
+A process pool pays for spawning workers, importing numpy / pandas / numba in
+each of them and pickling arguments and results. For a single match or a few
+thousand seasons that costs more than the simulation itself. Nearly all of a
+simulation runs inside NumPy (random draws, exp, matmul) or the Numba kernel
+(compiled with nogil=True), which release the GIL, so threads of one process
+overlap just as well for those jobs.
+
+SimulationExecutor runs work on
+    'thread':  a ThreadPoolExecutor, no startup or pickling cost
+    'process': a ProcessPoolExecutor, started on first use
+    'auto':    threads for jobs under PROCESS_MIN_SEASONS seasons or on a single
+               CPU, processes for larger jobs
+
+simulate_seasons() splits a run into one block per worker. Each block gets its
+own Generator spawned from the executor's SeedSequence (Generators are not
+thread-safe), so a seeded run gives the same seasons whatever the scheduling.
+"""
+import concurrent.futures
+import os
+
+import numpy as np
+
+from src.simulation import simulate_seasons
+
+BACKENDS = ('auto', 'thread', 'process')
+# Below this many seasons the process pool's pickling and warm-up cost more than they save
+PROCESS_MIN_SEASONS = 50_000
+MIN_BLOCK_SEASONS = 500
+
+
+def _simulate_block(att, dfn, params, num_sims, seed, kwargs):
+    return simulate_seasons(att, dfn, params, num_sims, rng=np.random.default_rng(seed), **kwargs)
+
+
+class SimulationExecutor:
+    def __init__(self, backend='auto', max_workers=None, seed=None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown backend: {backend} (expected one of {', '.join(BACKENDS)})")
+        self.backend = backend
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.seed = np.random.SeedSequence(seed)
+        self._threads = None
+        self._processes = None
+
+    def backend_for(self, num_sims):
+        """'thread' or 'process' for a job of num_sims seasons (or matches)."""
+        if self.backend != 'auto':
+            return self.backend
+        return 'process' if self.max_workers > 1 and num_sims >= PROCESS_MIN_SEASONS else 'thread'
+
+    def pool(self, backend):
+        if backend == 'thread':
+            if self._threads is None:
+                self._threads = concurrent.futures.ThreadPoolExecutor(self.max_workers, thread_name_prefix='sim')
+            return self._threads
+        if self._processes is None:
+            self._processes = concurrent.futures.ProcessPoolExecutor(self.max_workers)
+        return self._processes
+
+    def submit(self, fn, *args, num_sims=0):
+        """Run fn(*args) on the backend for a job of num_sims seasons. Returns a concurrent Future."""
+        return self.pool(self.backend_for(num_sims)).submit(fn, *args)
+
+    def simulate_seasons(self, att, dfn, params, num_sims, **kwargs):
+        """
+        src.simulation.simulate_seasons split into blocks over the workers, same output.
+        Per-season powers ((num_sims, n_teams)) are split with the blocks. QMC runs
+        stay in one block, splitting would break up the Sobol point set.
+        """
+        if kwargs.get('engine') == 'qmc':
+            n_blocks = 1
+        else:
+            n_blocks = max(1, min(self.max_workers, num_sims // MIN_BLOCK_SEASONS))
+        bounds = np.linspace(0, num_sims, n_blocks + 1).astype(int)
+        att, dfn = np.asarray(att), np.asarray(dfn)
+        pool = self.pool(self.backend_for(num_sims))
+        futures = []
+        for start, stop, seed in zip(bounds[:-1], bounds[1:], self.seed.spawn(n_blocks)):
+            rows = slice(start, stop) if att.ndim == 2 else slice(None)
+            futures.append(pool.submit(_simulate_block, att[rows], dfn[rows], params, int(stop - start),
+                                       seed, kwargs))
+        blocks = [f.result() for f in futures]
+        if len(blocks) == 1:
+            return blocks[0]
+        return {k: np.concatenate([b[k] for b in blocks]) for k in blocks[0]}
+
+    def shutdown(self, cancel_futures=False):
+        for pool in (self._threads, self._processes):
+            if pool is not None:
+                pool.shutdown(cancel_futures=cancel_futures)
+        self._threads = self._processes = None
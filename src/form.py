@@ -0,0 +1,121 @@
+"""
+Dynamic in-season form.
+
+The static engines give every match independent form noise, so a team is
+equally strong in round 1 and round 38. Here each team carries attack and
+defense form offsets that move after every round, score-driven like an Elo
+update on the Poisson goal model:
+
+    z = clip((goals - lambda0) / sqrt(lambda0), -FORM_CLIP, FORM_CLIP)
+    attack form of the scorer     += form_rate * scaling_factor * z
+    defense form of the conceder  -= form_rate * scaling_factor * z
+    every round, all form         *= form_decay   (mean reversion)
+
+lambda0 is the pre-match expectation without the match noise. The noise makes
+scorelines heavy-tailed (a handful of seasons in ten thousand have a side
+scoring dozens of goals), so the surprise is clipped to keep one freak result
+from swamping the ratings.
+
+The season is played in round-robin rounds (38 rounds of 10 fixtures for 20
+teams) since each round depends on the ones before. Each round is one set of
+array operations over all simulated seasons of a chunk, so the only Python
+loop is over rounds.
+
+    seasons = simulate_form_seasons(att, dfn, params, 10000)
+"""
+import numpy as np
+
+from src.memory import chunk_size_for
+from src.simulation import match_rates, rank_table
+
+FORM_RATE = 0.02
+FORM_DECAY = 0.9
+FORM_CLIP = 3.0
+FORM_CHUNK = 10000
+# Form state and per-round arrays per season and team (measured with tracemalloc)
+CHUNK_BYTES_PER_TEAM = 200
+
+
+def build_rounds(n_teams):
+    """
+    Double round-robin as rounds (circle method): (home, away) arrays shaped
+    (n_rounds, matches_per_round). The second half repeats the first with home
+    and away swapped. With an odd team count one team rests every round.
+    """
+    slots = list(range(n_teams)) + ([-1] if n_teams % 2 else [])
+    n = len(slots)
+    first_half = []
+    for r in range(n - 1):
+        pairs = [(slots[i], slots[n - 1 - i]) for i in range(n // 2)]
+        # Alternate the fixed slot's venue so no team has long home or away runs
+        pairs = [(a, b) if (r + i) % 2 == 0 else (b, a) for i, (a, b) in enumerate(pairs)]
+        first_half.append([(a, b) for a, b in pairs if a >= 0 and b >= 0])
+        slots = [slots[0]] + [slots[-1]] + slots[1:-1]
+    rounds = first_half + [[(b, a) for a, b in pairs] for pairs in first_half]
+    rounds = np.array(rounds, dtype=np.int64)
+    return rounds[..., 0], rounds[..., 1]
+
+
+def simulate_form_seasons(att, dfn, params, num_sims, rng=None, rounds=None, chunk_size=None):
+    """
+    simulate_seasons with in-season form (see module docstring); same output dict.
+    params may set 'form_rate' and 'form_decay' (FORM_RATE / FORM_DECAY otherwise);
+    form_rate 0 gives the static model played round by round.
+    rounds: optional (home, away) from build_rounds.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    att = np.asarray(att, dtype=float)
+    dfn = np.asarray(dfn, dtype=float)
+    n_teams = len(att)
+    home, away = build_rounds(n_teams) if rounds is None else rounds
+    sigma = params.get('sigma', 0.1)
+    step = params.get('form_rate', FORM_RATE) * params.get('scaling_factor', 250)
+    decay = params.get('form_decay', FORM_DECAY)
+    if chunk_size is None:
+        chunk_size = chunk_size_for(n_teams * CHUNK_BYTES_PER_TEAM, FORM_CHUNK,
+                                    fixed_bytes=num_sims * n_teams * 36)
+
+    points = np.empty((num_sims, n_teams), dtype=np.int16)
+    gf = np.empty((num_sims, n_teams), dtype=np.int32)
+    ga = np.empty((num_sims, n_teams), dtype=np.int32)
+
+    for start in range(0, num_sims, chunk_size):
+        n = min(chunk_size, num_sims - start)
+        form_att = np.zeros((n, n_teams))
+        form_def = np.zeros((n, n_teams))
+        pts = np.zeros((n, n_teams), dtype=np.int16)
+        g_for = np.zeros((n, n_teams), dtype=np.int32)
+        g_against = np.zeros((n, n_teams), dtype=np.int32)
+
+        for h, a in zip(home, away):
+            h_att, h_def = att[h] + form_att[:, h], dfn[h] + form_def[:, h]
+            a_att, a_def = att[a] + form_att[:, a], dfn[a] + form_def[:, a]
+            noise_home = sigma * rng.standard_normal(h_att.shape)
+            noise_away = sigma * rng.standard_normal(h_att.shape)
+            lambda_home, lambda_away = match_rates(h_att, h_def, a_att, a_def, noise_home, noise_away, params)
+            gh = rng.poisson(lambda_home)
+            g_a = rng.poisson(lambda_away)
+
+            # A team plays at most once per round, so fancy-index updates do not collide
+            pts[:, h] += (3 * (gh > g_a) + (gh == g_a)).astype(np.int16)
+            pts[:, a] += (3 * (g_a > gh) + (gh == g_a)).astype(np.int16)
+            g_for[:, h] += gh
+            g_for[:, a] += g_a
+            g_against[:, h] += g_a
+            g_against[:, a] += gh
+
+            if step:
+                expected_home, expected_away = match_rates(h_att, h_def, a_att, a_def, 0, 0, params)
+                z_home = step * np.clip((gh - expected_home) / np.sqrt(expected_home), -FORM_CLIP, FORM_CLIP)
+                z_away = step * np.clip((g_a - expected_away) / np.sqrt(expected_away), -FORM_CLIP, FORM_CLIP)
+                form_att[:, h] += z_home
+                form_def[:, a] -= z_home
+                form_att[:, a] += z_away
+                form_def[:, h] -= z_away
+                form_att *= decay
+                form_def *= decay
+
+        sl = slice(start, start + n)
+        points[sl], gf[sl], ga[sl] = pts, g_for, g_against
+
+    return {'points': points, 'gf': gf, 'ga': ga, 'positions': rank_table(points, gf)}
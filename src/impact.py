@@ -0,0 +1,231 @@
+"""
+League-wide player-swap impact scan.
+
+Every single-player change to every team's default XI is scored by its effect
+on that team's title, top-four and relegation odds:
+
+    - substitutions: one XI player out, one squad player outside the XI in
+    - removals: a player unavailable, XI rebuilt by get_default_11(exclude=...)
+
+Team power is a sum of per-player contributions (Team.calculate_power), so a
+change only needs the contributions of the players going out and coming in.
+Seasons are simulated once with common random numbers: the form noise and the
+goal uniforms are drawn up front and goals come from the inverse Poisson CDF.
+A change to one team only redraws the 2 * (n_teams - 1) fixtures it plays, with
+the same random numbers, and the differences against the baseline are
+correlated enough that a few thousand seasons rank thousands of changes.
+"""
+import numpy as np
+
+from src.kernels import HAS_NUMBA, poisson_inv
+from src.memory import chunk_size_for
+from src.power_model import GK_DEF_MULTIPLIER, NO_GK_PENALTY
+from src.qmc import poisson_ppf
+from src.simulation import build_fixtures, fixture_incidence, match_rates, rank_table
+
+METRICS = ['title', 'top4', 'relegated', 'points']
+BATCH_SIZE = 16
+# Working memory of evaluate() per candidate, season and replayed fixture, and of the
+# stored random numbers and baseline per season and fixture (measured with tracemalloc)
+BYTES_PER_CANDIDATE_FIXTURE = 60
+STORED_BYTES_PER_FIXTURE = 96
+# Goals for the replayed fixtures dominate the cost; the compiled loop is several times faster
+_poisson_inverse = poisson_inv if HAS_NUMBA else poisson_ppf
+
+
+def player_contribution(player, weights):
+    """(attack, defense) a player adds to Team.calculate_power."""
+    w = weights.get(player.position, weights['UNK'])
+    if player.position == 'GK':
+        return player.s_att * w['att'], player.s_gk * GK_DEF_MULTIPLIER
+    return player.s_att * w['att'], player.s_def * w['def']
+
+
+class LineupDelta:
+    """Powers of a team's default XI after players leave and join, from contribution sums."""
+    def __init__(self, team, weights):
+        self.team = team
+        self.weights = weights
+        self.lineup = team.get_default_11()
+        self.names = {p.name for p in self.lineup}
+        self.att = sum(player_contribution(p, weights)[0] for p in self.lineup)
+        self.raw_def = sum(player_contribution(p, weights)[1] for p in self.lineup)
+        self.n_gk = sum(p.position == 'GK' for p in self.lineup)
+
+    def powers(self, out=(), into=()):
+        att, raw_def, n_gk = self.att, self.raw_def, self.n_gk
+        for sign, players in ((-1, out), (1, into)):
+            for p in players:
+                a, d = player_contribution(p, self.weights)
+                att += sign * a
+                raw_def += sign * d
+                n_gk += sign * (p.position == 'GK')
+        return att, raw_def if n_gk > 0 else raw_def * NO_GK_PENALTY
+
+    def changes(self, same_position=False):
+        """
+        [(label, players out, players in)] for every removal and substitution.
+        same_position: only substitutions between players of the same position group.
+        """
+        bench = [p for p in self.team.squad_pool.values() if p.name not in self.names]
+        changes = []
+        for p in self.lineup:
+            rebuilt = self.team.get_default_11(exclude={p.name})
+            rebuilt_names = {q.name for q in rebuilt}
+            changes.append((f"without {p.name}",
+                            [q for q in self.lineup if q.name not in rebuilt_names],
+                            [q for q in rebuilt if q.name not in self.names]))
+        for p in self.lineup:
+            for q in bench:
+                if same_position and q.position != p.position:
+                    continue
+                changes.append((f"{q.name} for {p.name}", [p], [q]))
+        return changes
+
+
+class CommonRandomSeasons:
+    """
+    num_sims seasons with fixed random numbers; evaluate() replays them with
+    new powers for one team, redrawing only that team's fixtures.
+    """
+    def __init__(self, att, dfn, params, num_sims, rng=None, fixtures=None, relegation_spots=3):
+        rng = np.random.default_rng() if rng is None else rng
+        self.att = np.asarray(att, dtype=float)
+        self.dfn = np.asarray(dfn, dtype=float)
+        self.params = params
+        self.num_sims = num_sims
+        self.n_teams = len(self.att)
+        self.relegation_spots = relegation_spots
+        self.home, self.away = build_fixtures(self.n_teams) if fixtures is None else fixtures
+
+        n_fix = len(self.home)
+        sigma = params.get('sigma', 0.1)
+        self.noise = sigma * rng.standard_normal((num_sims, n_fix, 2))
+        self.unif = rng.random((num_sims, n_fix, 2))
+
+        self.goals = self._goals(slice(None), self.att[self.home], self.dfn[self.home],
+                                 self.att[self.away], self.dfn[self.away])
+        self.points, self.gf = self._tables(*self.goals, slice(None))
+        self.positions = rank_table(self.points, self.gf)
+
+    def _goals(self, idx, h_att, h_def, a_att, a_def):
+        noise, unif = self.noise[:, idx], self.unif[:, idx]
+        lambda_home, lambda_away = match_rates(h_att, h_def, a_att, a_def,
+                                               noise[..., 0], noise[..., 1], self.params)
+        # Candidate powers add leading axes; every candidate reuses the same uniforms
+        return (_poisson_inverse(np.broadcast_to(unif[..., 0], lambda_home.shape), lambda_home),
+                _poisson_inverse(np.broadcast_to(unif[..., 1], lambda_away.shape), lambda_away))
+
+    def _tables(self, gh, ga, idx):
+        """Points and goals for per team, (..., n_teams), from the goals (..., len(idx)) of fixtures idx."""
+        H, A = fixture_incidence(self.home[idx], self.away[idx], self.n_teams)
+        gh = gh.astype(np.float32)
+        ga = ga.astype(np.float32)
+        pts_h = 3 * (gh > ga) + (gh == ga)
+        pts_a = 3 * (ga > gh) + (gh == ga)
+        points = (pts_h.astype(np.float32) @ H + pts_a.astype(np.float32) @ A).astype(np.int64)
+        gf = (gh @ H + ga @ A).astype(np.int64)
+        return points, gf
+
+    def evaluate(self, team, att, dfn):
+        """
+        Positions and points of every team for K candidate powers of `team`.
+        att, dfn: (K,) arrays. Returns (positions, points), each (K, num_sims, n_teams).
+        """
+        att = np.asarray(att, dtype=float)[:, None, None]
+        dfn = np.asarray(dfn, dtype=float)[:, None, None]
+        idx = np.flatnonzero((self.home == team) | (self.away == team))
+        home, away = self.home[idx], self.away[idx]
+        at_home = home == team
+
+        h_att = np.where(at_home, att, self.att[home])
+        h_def = np.where(at_home, dfn, self.dfn[home])
+        a_att = np.where(at_home, self.att[away], att)
+        a_def = np.where(at_home, self.dfn[away], dfn)
+        gh, ga = self._goals(idx, h_att, h_def, a_att, a_def)
+
+        # Swap the team's fixtures out of the baseline tables
+        old_points, old_gf = self._tables(self.goals[0][:, idx], self.goals[1][:, idx], idx)
+        new_points, new_gf = self._tables(gh, ga, idx)
+        points = self.points + new_points - old_points
+        gf = self.gf + new_gf - old_gf
+        return rank_table(points, gf), points
+
+    def team_metrics(self, team, positions, points):
+        """Per-season indicators of METRICS for one team, (..., num_sims) each."""
+        pos = positions[..., team]
+        return {
+            'title': (pos == 1).astype(float),
+            'top4': (pos <= 4).astype(float),
+            'relegated': (pos > self.n_teams - self.relegation_spots).astype(float),
+            'points': points[..., team].astype(float),
+        }
+
+
+def scan_changes(league, params, num_sims=4000, teams=None, same_position=False, batch_size=None, rng=None,
+                 relegation_spots=3, progress=None):
+    """
+    Evaluate every single-player change to the default XI of each team.
+
+    Returns a list of dicts (one per change) with the team, the change, the
+    power deltas, and for each metric in METRICS the baseline value, the
+    change and its standard error (differences are paired season by season).
+    batch_size: changes evaluated together; by default as many as fit the memory budget, up to BATCH_SIZE.
+    progress: optional callable(done, total).
+    """
+    team_names, att, dfn = league.power_arrays(params)
+    teams = teams or team_names
+    n_teams = len(team_names)
+    if batch_size is None:
+        n_fix = n_teams * (n_teams - 1)
+        batch_size = chunk_size_for(num_sims * 2 * (n_teams - 1) * BYTES_PER_CANDIDATE_FIXTURE, BATCH_SIZE,
+                                    fixed_bytes=num_sims * n_fix * STORED_BYTES_PER_FIXTURE)
+    crn = CommonRandomSeasons(att, dfn, params, num_sims, rng, relegation_spots=relegation_spots)
+    weights = params['weights']
+
+    plans = {name: LineupDelta(league.teams[name], weights) for name in teams}
+    total = sum(len(plan.changes(same_position)) for plan in plans.values())
+    rows = []
+    for name, plan in plans.items():
+        t = team_names.index(name)
+        base = crn.team_metrics(t, crn.positions, crn.points)
+        changes = plan.changes(same_position)
+        for start in range(0, len(changes), batch_size):
+            batch = changes[start:start + batch_size]
+            powers = np.array([plan.powers(out, into) for _, out, into in batch])
+            positions, points = crn.evaluate(t, powers[:, 0], powers[:, 1])
+            metrics = crn.team_metrics(t, positions, points)
+            for k, (label, out, into) in enumerate(batch):
+                row = {
+                    'team': name,
+                    'change': label,
+                    'out': ', '.join(p.name for p in out),
+                    'in': ', '.join(p.name for p in into),
+                    'd_att': powers[k, 0] - att[t],
+                    'd_def': powers[k, 1] - dfn[t],
+                }
+                for m in METRICS:
+                    diff = metrics[m][k] - base[m]
+                    row[m] = float(base[m].mean())
+                    row[f'd_{m}'] = float(diff.mean())
+                    row[f'se_{m}'] = float(diff.std(ddof=1) / np.sqrt(num_sims))
+                rows.append(row)
+            if progress:
+                progress(len(rows), total)
+    return rows
+
+
+def rank_changes(rows, by='any'):
+    """
+    Sort changes by the size of their effect. by: one of METRICS, or 'any' for
+    the largest of the title, top-four and relegation changes.
+    """
+    if by == 'any':
+        def size(row):
+            return max(abs(row['d_title']), abs(row['d_top4']), abs(row['d_relegated']))
+    elif by in METRICS:
+        def size(row):
+            return abs(row[f'd_{by}'])
+    else:
+        raise ValueError(f"Unknown ranking metric: {by}")
+    return sorted(rows, key=size, reverse=True)
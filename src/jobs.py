@@ -0,0 +1,138 @@
+"""
+Background simulation jobs for the interactive CLI.
+
+A job is a callable work(job) run on a small thread pool. It reports progress
+with job.update(done, note) and should stop early once job.cancelled is set. The
+simulation generators (iter_seasons / iter_matches) do their work in numpy
+between snapshots, so the menu stays responsive while a job runs.
+
+Finished results are cached by key (see cache.make_key), so submitting the
+same request again returns the earlier result without resimulating. Cancelled
+or failed jobs are never cached.
+"""
+import itertools
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.cache import LRUCache
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+CANCELLED = 'cancelled'
+FAILED = 'failed'
+
+
+class Job:
+    def __init__(self, job_id, label, key, total):
+        self.id = job_id
+        self.label = label
+        self.key = key
+        self.total = total
+        self.done = 0
+        self.note = ''
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.cached = False
+        self.started = None
+        self.finished = None
+        self._cancel = threading.Event()
+        self._finished = threading.Event()
+
+    def update(self, done, note=''):
+        self.done = done
+        self.note = note
+
+    def cancel(self):
+        self._cancel.set()
+
+    @property
+    def cancelled(self):
+        return self._cancel.is_set()
+
+    def wait(self, timeout=None):
+        """Block until the job stops. Returns False on timeout."""
+        return self._finished.wait(timeout)
+
+    def describe(self):
+        if self.cached:
+            return f"#{self.id} {self.label}: cached"
+        text = f"#{self.id} {self.label}: {self.status} {self.done}/{self.total}"
+        if self.status == RUNNING and self.started and self.done:
+            elapsed = time.perf_counter() - self.started
+            text += f" (~{elapsed * (self.total - self.done) / self.done:.0f}s left)"
+        if self.note and self.status != FAILED:
+            text += f" | {self.note}"
+        elif self.status == FAILED:
+            text += f" ({self.error})"
+        return text
+
+
+class JobManager:
+    def __init__(self, max_workers=2, cache_size=32):
+        self.executor = ThreadPoolExecutor(max_workers, thread_name_prefix='sim-job')
+        self.cache = LRUCache(cache_size)
+        self.jobs = {}
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+
+    def submit(self, label, key, total, work):
+        """
+        Run work(job) in the background and return the Job. A cached result
+        comes back as an already finished job; a request identical to one that
+        is still running returns that job instead of starting another.
+        """
+        with self._lock:
+            result = self.cache.get(key)
+            for job in self.jobs.values():
+                if result is None and job.key == key and job.status in (QUEUED, RUNNING) and not job.cancelled:
+                    return job
+            job = Job(next(self._ids), label, key, total)
+            self.jobs[job.id] = job
+        if result is not None:
+            job.result, job.cached, job.done, job.status = result, True, total, DONE
+            job._finished.set()
+            return job
+        self.executor.submit(self._run, job, work)
+        return job
+
+    def _run(self, job, work):
+        if job.cancelled:
+            job.status = CANCELLED
+            job._finished.set()
+            return
+        job.status = RUNNING
+        job.started = time.perf_counter()
+        try:
+            job.result = work(job)
+            if job.cancelled:
+                job.status = CANCELLED
+            else:
+                job.status = DONE
+                with self._lock:
+                    self.cache.put(job.key, job.result)
+        except Exception as e:
+            job.error = e
+            job.status = FAILED
+        finally:
+            job.finished = time.perf_counter()
+            job._finished.set()
+
+    def forget(self, key):
+        """Drop a cached result, e.g. when the files it points to are gone."""
+        with self._lock:
+            self.cache.pop(key)
+
+    def active(self):
+        return [job for job in self.jobs.values() if job.status in (QUEUED, RUNNING)]
+
+    def get(self, job_id):
+        return self.jobs.get(job_id)
+
+    def shutdown(self):
+        """Cancel everything still running and wait for the workers to stop."""
+        for job in self.active():
+            job.cancel()
+        self.executor.shutdown(wait=True, cancel_futures=True)
@@ -0,0 +1,155 @@
+"""
+Optional Numba-compiled season kernel.
+
+Used automatically by src.simulation when numba is installed; the NumPy path is
+used otherwise. Compiled code is cached on disk (__pycache__) on first use, so
+importing this module never triggers compilation.
+"""
+import numpy as np
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+HAS_NUMBA = numba is not None
+
+
+def _poisson_inv(u, lam):
+    """Inverse-CDF Poisson draw for one uniform u."""
+    k = 0
+    pmf = np.exp(-lam)
+    cdf = pmf
+    while u > cdf and pmf > 0.0:
+        k += 1
+        pmf *= lam / k
+        cdf += pmf
+    return k
+
+
+def _poisson_inv_array(u, lam):
+    """_poisson_inv over matching flat arrays."""
+    out = np.empty(u.shape[0], dtype=np.int64)
+    for i in range(u.shape[0]):
+        out[i] = _poisson_inv(u[i], lam[i])
+    return out
+
+
+def _season_kernel(att, dfn, home, away, noise, unif, scaling_factor, avg_goals, home_adv):
+    """
+    Goal rates, Poisson sampling, points accumulation and ranking for a chunk of seasons.
+    att, dfn: (1, n_teams) powers for every season, or (num_sims, n_teams), one row per season.
+    noise: (num_sims, n_fixtures, 2) N(0, sigma) draws, unif: matching U(0, 1) draws.
+    Same model as League.simulate_match_fast.
+    """
+    num_sims = noise.shape[0]
+    n_teams = att.shape[1]
+    n_fix = home.shape[0]
+    points = np.zeros((num_sims, n_teams), dtype=np.int16)
+    gf = np.zeros((num_sims, n_teams), dtype=np.int32)
+    ga = np.zeros((num_sims, n_teams), dtype=np.int32)
+    positions = np.empty((num_sims, n_teams), dtype=np.int64)
+    order = np.empty(n_teams, dtype=np.int64)
+    key = np.empty(n_teams, dtype=np.int64)
+
+    for s in range(num_sims):
+        r = s if att.shape[0] > 1 else 0
+        for f in range(n_fix):
+            h = home[f]
+            a = away[f]
+            noise_home = noise[s, f, 0]
+            noise_away = noise[s, f, 1]
+
+            lambda_home = avg_goals * np.exp((att[r, h] * (1 + noise_home) - dfn[r, a] * (1 + noise_away)) / scaling_factor) * home_adv
+            lambda_away = avg_goals * np.exp((att[r, a] * (1 + noise_away) - dfn[r, h] * (1 + noise_home)) / scaling_factor) / home_adv
+
+            gh = _poisson_inv(unif[s, f, 0], lambda_home)
+            g_a = _poisson_inv(unif[s, f, 1], lambda_away)
+
+            gf[s, h] += gh
+            ga[s, h] += g_a
+            gf[s, a] += g_a
+            ga[s, a] += gh
+            if gh > g_a:
+                points[s, h] += 3
+            elif g_a > gh:
+                points[s, a] += 3
+            else:
+                points[s, h] += 1
+                points[s, a] += 1
+
+        # Stable insertion sort on (points, gf) descending, like rank_table
+        for t in range(n_teams):
+            key[t] = points[s, t] * 10000 + gf[s, t]
+            j = t
+            while j > 0 and key[order[j - 1]] < key[t]:
+                order[j] = order[j - 1]
+                j -= 1
+            order[j] = t
+        for r in range(n_teams):
+            positions[s, order[r]] = r + 1
+
+    return points, gf, ga, positions
+
+
+if HAS_NUMBA:
+    # nogil: kernels called from several threads run in parallel (src/executors.py)
+    _poisson_inv = numba.njit(cache=True, nogil=True)(_poisson_inv)
+    _poisson_inv_array = numba.njit(cache=True, nogil=True)(_poisson_inv_array)
+    _season_kernel = numba.njit(cache=True, nogil=True)(_season_kernel)
+
+
+def poisson_inv(u, lam):
+    """
+    Inverse-CDF Poisson draws elementwise, u and lam broadcast together.
+    Compiled counterpart of src.qmc.poisson_ppf, much faster when numba is installed.
+    """
+    u, lam = np.broadcast_arrays(np.asarray(u, dtype=np.float64), np.asarray(lam, dtype=np.float64))
+    flat = _poisson_inv_array(np.ascontiguousarray(u).ravel(), np.ascontiguousarray(lam).ravel())
+    return flat.reshape(u.shape)
+
+
+def _random_draws(num_sims, n_fixtures, sigma, rng, chunk_size):
+    for start in range(0, num_sims, chunk_size):
+        n = min(chunk_size, num_sims - start)
+        noise = sigma * rng.standard_normal((n, n_fixtures, 2), dtype=np.float32)
+        unif = rng.random((n, n_fixtures, 2), dtype=np.float32)
+        yield noise, unif
+
+
+def simulate_seasons_jit(att, dfn, params, num_sims, home, away, rng, chunk_size=2000, draws=None):
+    """
+    Numba path of src.simulation.simulate_seasons, same output dict.
+    Normal and uniform draws come from the caller's Generator (NumPy's samplers are
+    faster than numba's); everything after that runs in the compiled kernel.
+    draws: optional iterator of (noise, unif) chunks to use instead (e.g. src.qmc.fixture_draws).
+    att, dfn: (n_teams,), or (num_sims, n_teams) for per-season powers.
+    """
+    att = np.ascontiguousarray(np.atleast_2d(att), dtype=np.float64)
+    dfn = np.ascontiguousarray(np.atleast_2d(dfn), dtype=np.float64)
+    per_season = att.shape[0] > 1
+    home = np.ascontiguousarray(home, dtype=np.int64)
+    away = np.ascontiguousarray(away, dtype=np.int64)
+    sigma = float(params.get('sigma', 0.1))
+    scaling_factor = float(params.get('scaling_factor', 250))
+    avg_goals = float(params.get('league_avg_goals', 1.6))
+    home_adv = float(params.get('home_adv', 1.15))
+
+    if draws is None:
+        draws = _random_draws(num_sims, len(home), sigma, rng, chunk_size)
+    # Chunks are written into the result arrays, so only one copy of the results is alive.
+    # Allocated up front (dtypes as in _season_kernel) so num_sims=0 gives empty arrays.
+    shape = (num_sims, att.shape[1])
+    out = [np.empty(shape, dtype=np.int16), np.empty(shape, dtype=np.int32),
+           np.empty(shape, dtype=np.int32), np.empty(shape, dtype=np.int64)]
+    start = 0
+    for noise, unif in draws:
+        n = len(noise)
+        rows = slice(start, start + n) if per_season else slice(None)
+        chunk = _season_kernel(att[rows], dfn[rows], home, away, noise, unif, scaling_factor, avg_goals, home_adv)
+        for array, part in zip(out, chunk):
+            array[start:start + n] = part
+        start += n
+
+    points, gf, ga, positions = out
+    return {'points': points, 'gf': gf, 'ga': ga, 'positions': positions}
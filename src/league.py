@@ -46,6 +46,16 @@ class League:
         
         print(f"League Calibrated. Avg Att: {self.avg_att_power:.1f}, Avg Def: {self.avg_def_power:.1f}")
 
+    def power_arrays(self, params, lineups=None):
+        """
+        Team names and their (attack, defense) powers as arrays, in self.teams order.
+        lineups: optional {team_name: [player names]} overrides.
+        """
+        lineups = lineups or {}
+        names = list(self.teams.keys())
+        powers = np.array([self.teams[n].calculate_power(params, lineups.get(n)) for n in names], dtype=float)
+        return names, powers[:, 0], powers[:, 1]
+
     def predict_match(self, home_name, away_name, params, home_lineup=None, away_lineup=None):
         """
         Return the expected goals (lambda) for home and away teams.
@@ -0,0 +1,147 @@
+"""
+Memory instrumentation and budgets.
+
+MemoryProfiler records, per named stage, the wall time, the peak and current
+memory traced by tracemalloc (NumPy arrays included), the process RSS and its
+peak, and the largest allocation sites at the end of the stage:
+
+    profiler = MemoryProfiler()
+    with profiler.stage('simulate'):
+        simulate_seasons(att, dfn, params, 100000)
+    profiler.print_report()
+
+A memory budget (set_memory_budget, or the PL_SIM_MEMORY_MB environment
+variable) makes the simulators choose their chunk sizes with chunk_size_for, so
+the working arrays of a run stay under it. Without a budget the defaults apply.
+The budget lives in the environment, so worker processes inherit it.
+"""
+import os
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+BUDGET_ENV = 'PL_SIM_MEMORY_MB'
+MB = 1024 * 1024
+TOP_ALLOCATIONS = 5
+
+
+def set_memory_budget(mb):
+    """Budget in MB for the working arrays of one simulation run (None: no budget)."""
+    if mb is None:
+        os.environ.pop(BUDGET_ENV, None)
+    else:
+        os.environ[BUDGET_ENV] = str(mb)
+
+
+def memory_budget_mb():
+    value = os.environ.get(BUDGET_ENV)
+    return float(value) if value else None
+
+
+def chunk_size_for(bytes_per_item, default, fixed_bytes=0, minimum=1, budget_mb=None):
+    """
+    Items per chunk such that fixed_bytes + chunk * bytes_per_item fits in the
+    budget, capped at default. Returns default when there is no budget. Raises
+    MemoryError when not even `minimum` items fit.
+    """
+    budget_mb = memory_budget_mb() if budget_mb is None else budget_mb
+    if budget_mb is None:
+        return default
+    available = budget_mb * MB - fixed_bytes
+    chunk = int(available // max(bytes_per_item, 1))
+    if chunk < minimum:
+        raise MemoryError(f"Memory budget of {budget_mb:.0f} MB is too small: "
+                          f"{fixed_bytes / MB:.1f} MB of results plus {minimum} x "
+                          f"{bytes_per_item / MB:.2f} MB per chunk item needed")
+    return min(chunk, default)
+
+
+def workers_for_budget(bytes_per_worker, budget_mb=None, max_workers=None):
+    """Worker processes that fit in the budget (at least 1), capped at max_workers or the CPU count."""
+    max_workers = max_workers or os.cpu_count() or 1
+    budget_mb = memory_budget_mb() if budget_mb is None else budget_mb
+    if budget_mb is None:
+        return max_workers
+    return max(1, min(max_workers, int(budget_mb * MB // bytes_per_worker)))
+
+
+def current_rss_mb():
+    """Resident set size of this process, or None where it cannot be read."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def peak_rss_mb():
+    """Peak RSS since start (or the last reset_peak_rss), or None where unavailable."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Kilobytes on Linux, bytes on macOS
+    return peak / MB if os.uname().sysname == 'Darwin' else peak / 1024
+
+
+def reset_peak_rss():
+    """Restart the peak RSS measurement (Linux only; elsewhere the peak stays process-wide)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+class MemoryProfiler:
+    def __init__(self, top=TOP_ALLOCATIONS):
+        self.top = top
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        started_tracing = not tracemalloc.is_tracing()
+        if started_tracing:
+            tracemalloc.start()
+        tracemalloc.reset_peak()
+        reset_peak_rss()
+        rss_before = current_rss_mb()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            seconds = time.perf_counter() - t0
+            current, peak = tracemalloc.get_traced_memory()
+            stats = tracemalloc.take_snapshot().statistics('lineno')[:self.top]
+            if started_tracing:
+                tracemalloc.stop()
+            self.stages.append({
+                'stage': name,
+                'seconds': seconds,
+                'traced_peak_mb': peak / MB,
+                'traced_current_mb': current / MB,
+                'rss_before_mb': rss_before,
+                'rss_after_mb': current_rss_mb(),
+                'peak_rss_mb': peak_rss_mb(),
+                'top_allocations': [f"{s.traceback[0].filename}:{s.traceback[0].lineno} {s.size / MB:.1f} MB"
+                                    for s in stats],
+            })
+
+    def print_report(self):
+        print(f"  {'Stage':<32} {'Time':>8} {'Traced peak':>12} {'RSS':>9} {'Peak RSS':>9}")
+        for s in self.stages:
+            rss = f"{s['rss_after_mb']:.0f} MB" if s['rss_after_mb'] is not None else 'n/a'
+            peak_rss = f"{s['peak_rss_mb']:.0f} MB" if s['peak_rss_mb'] is not None else 'n/a'
+            print(f"  {s['stage']:<32} {s['seconds']:>7.2f}s {s['traced_peak_mb']:>9.1f} MB {rss:>9} {peak_rss:>9}")
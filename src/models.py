@@ -23,8 +23,13 @@ class Team:
     def add_player(self, player):
         self.squad_pool[player.name] = player
 
-    def get_default_11(self):
+    def get_default_11(self, exclude=None):
+        """
+        exclude: optional collection of player names that are unavailable (injuries, suspensions).
+        """
         all_players = list(self.squad_pool.values())
+        if exclude:
+            all_players = [p for p in all_players if p.name not in exclude]
         all_players.sort(key=lambda p: p.minutes_played, reverse=True)
         
         gk = [p for p in all_players if p.position == 'GK'][:1]
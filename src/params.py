@@ -0,0 +1,126 @@
+import copy
+import glob
+import json
+import os
+
+TUNING_GLOB = 'output/tuning_results_*.json'
+
+# Default Parameters
+DEFAULT_SIM_PARAMS = {
+    'sigma': 0.15,
+    'scaling_factor': 1500,
+    'league_avg_goals': 1.6395,
+    'home_adv': 1.0,
+    'weights': {
+        'ATT': {'att': 1.0, 'def': 0.15},
+        'MID': {'att': 0.7, 'def': 0.6},
+        'DEF': {'att': 0.1, 'def': 1.0},
+        'GK':  {'att': 0.0, 'def': 0.0},
+        'UNK': {'att': 0.5, 'def': 0.5}
+    }
+}
+
+# Flat keys that apply_config copies into sim params unchanged
+SCALAR_PARAM_KEYS = ('sigma', 'scaling_factor', 'home_adv', 'league_avg_goals', 'form_rate', 'form_decay')
+
+# Flat tuning keys -> location inside the nested sim params dict
+POSITION_WEIGHT_KEYS = {
+    'att_def': ('ATT', 'def'),
+    'mid_att': ('MID', 'att'),
+    'mid_def': ('MID', 'def'),
+    'def_att': ('DEF', 'att'),
+}
+
+METRIC_WEIGHT_KEYS = {
+    'gls_weight': 'gls',
+    'ast_weight': 'ast',
+    'xg_weight': 'xg',
+    'xag_weight': 'xag',
+    'prg_weight': 'prg',
+}
+
+
+def apply_config(sim_params, config):
+    """
+    Return a copy of sim_params updated with a flat tuning config
+    (the format of PARAM_CONFIG / 'best_config').
+    """
+    params = copy.deepcopy(sim_params)
+    for key in SCALAR_PARAM_KEYS:
+        if key in config:
+            params[key] = config[key]
+    for key, (pos, side) in POSITION_WEIGHT_KEYS.items():
+        if key in config:
+            params['weights'][pos][side] = config[key]
+    return params
+
+
+def build_metric_weights(config):
+    """Player metric weights ('gls', 'ast', ...) from a flat tuning config."""
+    return {short: config[key] for key, short in METRIC_WEIGHT_KEYS.items() if key in config}
+
+
+def params_to_config(sim_params, metric_weights=None):
+    """Inverse of apply_config / build_metric_weights."""
+    config = {k: sim_params[k] for k in ('sigma', 'scaling_factor', 'home_adv', 'league_avg_goals')}
+    for key, (pos, side) in POSITION_WEIGHT_KEYS.items():
+        config[key] = sim_params['weights'][pos][side]
+    for key, short in METRIC_WEIGHT_KEYS.items():
+        if metric_weights and short in metric_weights:
+            config[key] = metric_weights[short]
+    return config
+
+
+def params_key(sim_params):
+    """Hashable, order-independent key for a sim params dict."""
+    return json.dumps(sim_params, sort_keys=True, default=float)
+
+
+def find_latest_tuning_file(pattern=TUNING_GLOB):
+    list_of_files = glob.glob(pattern)
+    if not list_of_files:
+        return None
+    return max(list_of_files, key=os.path.getctime)
+
+
+def load_optimized_params(sim_params=None, pattern=TUNING_GLOB, verbose=True):
+    """
+    Apply the 'best_config' of the newest tuning file on top of sim_params.
+    Falls back to the given (or default) params if nothing usable is found.
+    """
+    if sim_params is None:
+        sim_params = DEFAULT_SIM_PARAMS
+
+    try:
+        latest_file = find_latest_tuning_file(pattern)
+        if latest_file is None:
+            if verbose:
+                print("[INFO] No tuning results found. Using default parameters.")
+            return copy.deepcopy(sim_params)
+
+        if verbose:
+            print(f"[INFO] Loading optimized parameters from: {latest_file}")
+
+        with open(latest_file, 'r') as f:
+            data = json.load(f)
+            config = data.get('best_config', {})
+
+        if not config:
+            if verbose:
+                print("[WARN] 'best_config' not found in file. Using defaults.")
+            return copy.deepcopy(sim_params)
+
+        params = apply_config(sim_params, {k: v for k, v in config.items() if k != 'league_avg_goals'})
+
+        if verbose:
+            print("[SUCCESS] Optimized parameters applied.")
+            print("-" * 40)
+            for k, v in config.items():
+                print(f"  {k}: {v}")
+            print("-" * 40)
+        return params
+
+    except Exception as e:
+        print(f"[ERROR] Failed to load optimized parameters: {e}")
+        print("Using default parameters.")
+        return copy.deepcopy(sim_params)
@@ -0,0 +1,187 @@
+"""
+Player search index.
+
+Built once at load time over Player objects. Names are accent-folded
+("Ødegaard" -> "odegaard") and indexed by character trigrams and by token
+prefixes, so a query only touches the players sharing n-grams with it instead
+of scanning the whole list. Candidates are taken from the query's rarest
+trigram postings and its token-prefix matches, at most MAX_CANDIDATES of them
+(the most-played when a list is longer), and only those are scored against
+all of the query's trigrams. The cost per query is therefore bounded
+whatever the size of the index; below MAX_CANDIDATES hits the ranking is
+exact.
+
+    index = PlayerIndex(all_players)
+    index.search('odegard')                                # fuzzy, ranked
+    index.search('sal', position='ATT', min_minutes=900)   # prefix + filters
+"""
+import bisect
+import re
+import unicodedata
+
+import numpy as np
+
+# Characters NFKD does not decompose
+_SPECIAL_FOLDS = str.maketrans({'ø': 'o', 'Ø': 'o', 'ß': 'ss', 'æ': 'ae', 'Æ': 'ae',
+                                'đ': 'd', 'Đ': 'd', 'ł': 'l', 'Ł': 'l', 'ı': 'i'})
+_NON_ALNUM = re.compile(r'[^a-z0-9 ]+')
+# Candidates scored per query
+MAX_CANDIDATES = 1000
+
+
+def fold_text(text):
+    """Lowercase, strip accents and punctuation: 'Martin Ødegaard' -> 'martin odegaard'."""
+    text = str(text).translate(_SPECIAL_FOLDS)
+    text = unicodedata.normalize('NFKD', text)
+    text = ''.join(c for c in text if not unicodedata.combining(c)).lower()
+    text = _NON_ALNUM.sub(' ', text.replace('-', ' ').replace("'", ''))
+    return ' '.join(text.split())
+
+
+def trigrams(folded):
+    padded = f'  {folded} '
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class PlayerIndex:
+    def __init__(self, players):
+        self.players = list(players)
+        self.names = [fold_text(p.name) for p in self.players]
+        self.positions = np.array([p.position for p in self.players])
+        self.squads = np.array([p.squad_name for p in self.players])
+        self.minutes = np.array([float(p.minutes_played) for p in self.players])
+        self.n_grams = np.array([len(trigrams(n)) for n in self.names])
+
+        # Postings list the most-played players first, so capping a list keeps its best-known names
+        postings = {}
+        tokens = []
+        for pid in np.argsort(-self.minutes, kind='stable').tolist():
+            for gram in trigrams(self.names[pid]):
+                postings.setdefault(gram, []).append(pid)
+        for pid, name in enumerate(self.names):
+            for token in name.split():
+                tokens.append((token, pid))
+        self._postings = {g: np.array(ids, dtype=np.int32) for g, ids in postings.items()}
+        self._gram_ids = {g: i for i, g in enumerate(postings)}
+        # Trigram ids of every player (CSR by player), for counting the trigrams candidates share with a query
+        gram_pids = np.concatenate(list(self._postings.values())) if postings else np.array([], dtype=np.int32)
+        gram_values = np.repeat(np.arange(len(postings), dtype=np.int32), [len(v) for v in postings.values()])
+        self._player_grams = gram_values[np.argsort(gram_pids, kind='stable')]
+        self._player_gram_starts = np.concatenate([[0], np.cumsum(self.n_grams)[:-1]]).astype(np.int64)
+        tokens.sort()
+        self._tokens = [t for t, _ in tokens]
+        self._token_ids = np.array([pid for _, pid in tokens], dtype=np.int32)
+        # Sorted-token ranks of every player's tokens (CSR by player), for prefix checks of candidates
+        by_player = np.argsort(self._token_ids, kind='stable')
+        self._player_token_ranks = by_player.astype(np.int32)
+        counts = np.bincount(self._token_ids, minlength=len(self.players))
+        self._player_token_starts = np.concatenate([[0], np.cumsum(counts)[:-1]]).astype(np.int64)
+        self._player_token_counts = counts
+
+    def __len__(self):
+        return len(self.players)
+
+    def _prefix_range(self, prefix):
+        lo = bisect.bisect_left(self._tokens, prefix)
+        return lo, bisect.bisect_left(self._tokens, prefix + '￿', lo)
+
+    @staticmethod
+    def _gather(values, starts, counts, ids):
+        """
+        Rows ids (all non-empty) of a CSR table: the concatenated values and the
+        offset of each row in them, for np.add.reduceat.
+        """
+        counts = counts[ids]
+        row_starts = np.cumsum(counts) - counts
+        offsets = np.arange(row_starts[-1] + counts[-1]) - np.repeat(row_starts, counts)
+        return values[np.repeat(starts[ids], counts) + offsets], row_starts
+
+    def _shared_grams(self, ids, q_grams):
+        """Per candidate, the number of query trigrams in its name."""
+        in_query = np.zeros(len(self._gram_ids), dtype=np.int32)
+        in_query[[self._gram_ids[g] for g in q_grams if g in self._gram_ids]] = 1
+        grams, rows = self._gather(self._player_grams, self._player_gram_starts, self.n_grams, ids)
+        return np.add.reduceat(in_query[grams], rows)
+
+    def _prefix_hits(self, ids, ranges):
+        """Per candidate, the number of query tokens (given as sorted-token ranges) prefixing one of its tokens."""
+        ranks, rows = self._gather(self._player_token_ranks, self._player_token_starts,
+                                   self._player_token_counts, ids)
+        owner = np.repeat(np.arange(len(ids)), self._player_token_counts[ids])
+        hits = np.zeros(len(ids))
+        for lo, hi in ranges:
+            hit = np.zeros(len(ids), dtype=bool)
+            hit[owner[(ranks >= lo) & (ranks < hi)]] = True
+            hits += hit
+        return hits
+
+    def _most_played(self, ids, n=MAX_CANDIDATES):
+        if len(ids) <= n:
+            return ids
+        return ids[np.argpartition(-self.minutes[ids], n)[:n]]
+
+    def _filter_mask(self, ids, position, squad, min_minutes):
+        mask = np.ones(len(ids), dtype=bool)
+        if position is not None:
+            mask &= self.positions[ids] == position
+        if squad is not None:
+            mask &= self.squads[ids] == squad
+        if min_minutes:
+            mask &= self.minutes[ids] >= min_minutes
+        return mask
+
+    def search(self, query, limit=10, position=None, squad=None, min_minutes=0, min_score=0.3):
+        """
+        Ranked fuzzy matches as (player, score) pairs, best first.
+        Score is the trigram Dice similarity between query and name, plus a bonus
+        when a query token is a prefix of a name token or the query is a substring.
+        """
+        folded = fold_text(query)
+        if not folded:
+            return []
+
+        q_grams = trigrams(folded)
+        q_tokens = folded.split()
+        lists = sorted((self._postings[g] for g in q_grams if g in self._postings), key=len)
+        ranges = [self._prefix_range(t) for t in q_tokens]
+
+        # Seed candidates from the rarest postings and the prefix matches; common
+        # trigrams (' sa', 'an ') only count towards the candidates' scores
+        seeds, total = [], 0
+        for postings in lists:
+            if seeds and total + len(postings) > MAX_CANDIDATES:
+                break
+            seeds.append(postings)
+            total += len(postings)
+        seeds = [postings[:MAX_CANDIDATES] for postings in seeds]
+        # Prefix matches in token order: the tokens closest to the query token come first
+        seeds += [self._token_ids[lo:min(hi, lo + MAX_CANDIDATES)] for lo, hi in ranges]
+        if not any(len(seed) for seed in seeds):
+            return []
+        ids = self._most_played(np.unique(np.concatenate(seeds)))
+
+        shared = self._shared_grams(ids, q_grams)
+        prefix_hits = self._prefix_hits(ids, ranges)
+
+        # Candidates share a third of the query's trigrams or prefix-match a token
+        keep = (shared >= max(1.0, len(q_grams) / 3)) | (prefix_hits > 0)
+        keep &= self._filter_mask(ids, position, squad, min_minutes)
+        ids, shared, prefix_hits = ids[keep], shared[keep], prefix_hits[keep]
+        if len(ids) == 0:
+            return []
+
+        score = 2 * shared / (len(q_grams) + self.n_grams[ids])
+        # Every query token must prefix some name token for the full bonus
+        score += 0.5 * prefix_hits / len(q_tokens)
+
+        # Substring bonus only for the best few candidates
+        if len(ids) > 5 * limit:
+            top = np.argpartition(-score, 5 * limit)[:5 * limit]
+            ids, score = ids[top], score[top]
+        if len(folded) >= 3:
+            score = score + 0.3 * np.array([folded in self.names[i] for i in ids])
+
+        keep = score >= min_score
+        ids, score = ids[keep], score[keep]
+        order = np.lexsort((-self.minutes[ids], -score))[:limit]
+        return [(self.players[ids[i]], float(score[i])) for i in order]
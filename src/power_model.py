@@ -0,0 +1,131 @@
+"""
+Vectorized team powers.
+
+Team.calculate_power is linear in the player metric weights and in the
+position weights once the lineup is fixed, and the default XI only depends on
+minutes and positions. TeamPowerModel precomputes, per team and position group,
+the summed raw stats of the lineup, so powers for any params are a couple of
+small tensor contractions instead of rebuilding Player objects.
+"""
+import numpy as np
+
+from src.data_loader import CHUNK_ROWS, load_player_frame
+from src.models import Player, Team
+
+POSITIONS = ['ATT', 'MID', 'DEF', 'GK', 'UNK']
+# Attacking stat groups, in the order of the metric weights below
+ATT_STATS = [['Gls'], ['Ast'], ['xG'], ['xAG'], ['PrgC', 'PrgP', 'PrgR']]
+METRIC_KEYS = ['gls', 'ast', 'xg', 'xag', 'prg']
+METRIC_DEFAULTS = {'gls': 4, 'ast': 3, 'xg': 15, 'xag': 15, 'prg': 0.2}
+GK_DEF_MULTIPLIER = 3.5
+NO_GK_PENALTY = 0.4
+
+
+def _stat(row, col):
+    value = row.get(col, 0)
+    return float(value) if value == value else 0.0  # NaN -> 0
+
+
+def metric_vector(metric_weights=None):
+    metric_weights = metric_weights or {}
+    return np.array([metric_weights.get(k, METRIC_DEFAULTS[k]) for k in METRIC_KEYS], dtype=float)
+
+
+def position_weight_arrays(sim_params):
+    """(att, def) weight per position group, missing groups fall back to 'UNK' like calculate_power."""
+    weights = sim_params['weights']
+    att = np.array([weights.get(pos, weights['UNK'])['att'] for pos in POSITIONS], dtype=float)
+    dfn = np.array([weights.get(pos, weights['UNK'])['def'] for pos in POSITIONS], dtype=float)
+    return att, dfn
+
+
+class TeamPowerModel:
+    """
+    Per-team lineup sums:
+        att_stats[t, pos, k]: sum of attacking stat group k over lineup players in pos
+        def_stats[t, pos]:    sum of s_def over lineup players in pos
+        gk_stats[t]:          sum of s_gk over lineup goalkeepers
+        has_gk[t]
+    """
+    def __init__(self, team_names, att_stats, def_stats, gk_stats, has_gk, lineups=None):
+        self.team_names = list(team_names)
+        self.att_stats = att_stats
+        self.def_stats = def_stats
+        self.gk_stats = gk_stats
+        self.has_gk = has_gk
+        self.lineups = lineups or {}
+
+    @classmethod
+    def from_records(cls, records, lineups=None):
+        """
+        records: player rows as dicts (the format of LeagueOptimizer.raw_player_data).
+        lineups: optional {team: [player names]}; default XI otherwise.
+        """
+        teams = {}
+        rows = {}
+        for row in records:
+            player = Player(row)
+            if player.squad_name not in teams:
+                teams[player.squad_name] = Team(player.squad_name)
+            teams[player.squad_name].add_player(player)
+            rows[(player.squad_name, player.name)] = row
+        return cls.from_teams(teams, rows, lineups)
+
+    @classmethod
+    def from_csv(cls, filepath, chunksize=CHUNK_ROWS, split_by=()):
+        """
+        Default-XI model straight from a player CSV of any size. The file is read in
+        chunks and only the lineup candidates of each team are kept, so memory is
+        bounded by the number of teams, not rows.
+        split_by: columns separating teams with the same name, e.g. ['Comp', 'Season']
+        in a multi-league, multi-season export; returns {value tuple: model} then.
+        """
+        split_by = list(split_by)
+        df = load_player_frame(filepath, chunksize, lineups_only=True, extra_columns=split_by)
+        if not split_by:
+            return cls.from_records(df.to_dict('records'))
+        return {key if isinstance(key, tuple) else (key,): cls.from_records(group.to_dict('records'))
+                for key, group in df.groupby(split_by, sort=False)}
+
+    @classmethod
+    def from_teams(cls, teams, rows, lineups=None):
+        lineups = lineups or {}
+        names = list(teams.keys())
+        n = len(names)
+        att_stats = np.zeros((n, len(POSITIONS), len(ATT_STATS)))
+        def_stats = np.zeros((n, len(POSITIONS)))
+        gk_stats = np.zeros(n)
+        has_gk = np.zeros(n, dtype=bool)
+        used = {}
+
+        for t, name in enumerate(names):
+            team = teams[name]
+            if lineups.get(name):
+                lineup = [team.squad_pool[p] for p in lineups[name] if p in team.squad_pool]
+            else:
+                lineup = team.get_default_11()
+            used[name] = [p.name for p in lineup]
+            for p in lineup:
+                pos = POSITIONS.index(p.position) if p.position in POSITIONS else POSITIONS.index('UNK')
+                row = rows[(name, p.name)]
+                att_stats[t, pos] += [sum(_stat(row, c) for c in group) for group in ATT_STATS]
+                if p.position == 'GK':
+                    gk_stats[t] += p.s_gk
+                    has_gk[t] = True
+                else:
+                    def_stats[t, pos] += p.s_def
+        return cls(names, att_stats, def_stats, gk_stats, has_gk, used)
+
+    def powers(self, sim_params, metric_weights=None, att_stats=None):
+        """
+        Attack and defense arrays (n_teams,), same values as Team.calculate_power up to rounding.
+        att_stats: optional (..., n_teams, positions, groups) stats to use instead of
+        self.att_stats (e.g. bootstrap replicates); attack then has the leading axes too.
+        """
+        att_stats = self.att_stats if att_stats is None else att_stats
+        w_att, w_def = position_weight_arrays(sim_params)
+        mw = metric_vector(metric_weights)
+        att = np.einsum('...tpk,p,k->...t', att_stats, w_att, mw)
+        dfn = self.def_stats @ w_def + GK_DEF_MULTIPLIER * self.gk_stats
+        dfn = np.where(self.has_gk, dfn, dfn * NO_GK_PENALTY)
+        return att, dfn
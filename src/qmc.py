@@ -0,0 +1,83 @@
+"""
+Randomized quasi-Monte Carlo sampling.
+
+Each fixture of a simulated match or season consumes four uniforms: two for
+the home / away form noise (mapped through the inverse normal CDF) and two
+for the goals (inverse Poisson CDF). A scrambled Sobol sequence over all of
+them spreads the points far more evenly than pseudo-random draws.
+
+Drawing only the noise from Sobol and the goals pseudo-randomly gains
+nothing: most of the variance of a result comes from the Poisson draws.
+
+A single scrambled point set has no usable error estimate, so estimates are
+averaged over independent scramblings (replicates) and the standard error
+comes from the spread between them (see rqmc).
+"""
+import warnings
+
+import numpy as np
+from scipy.special import ndtri, pdtr
+from scipy.stats import qmc
+
+QMC_CHUNK = 2048
+
+
+def sobol_uniforms(num_sims, dim, rng=None, chunk_size=None):
+    """
+    Yield (n, dim) blocks of one scrambled Sobol point set of num_sims points.
+    The set is drawn sequentially, so memory stays at chunk_size * dim.
+    Powers of two keep the balance properties of the full set.
+    """
+    engine = qmc.Sobol(dim, scramble=True, seed=rng)
+    chunk_size = chunk_size or num_sims
+    for start in range(0, num_sims, chunk_size):
+        with warnings.catch_warnings():
+            # Sobol warns on counts that are not powers of two; callers choose num_sims
+            warnings.simplefilter('ignore', UserWarning)
+            u = engine.random(min(chunk_size, num_sims - start))
+        # Scrambled points are never exactly 0 or 1 in theory, guard against rounding
+        yield np.clip(u, 1e-12, 1 - 1e-12)
+
+
+def poisson_ppf(u, lam):
+    """
+    Smallest k with P(Poisson(lam) <= k) >= u, elementwise.
+    Starts from a normal approximation and corrects with a few exact CDF steps.
+    """
+    u = np.asarray(u, dtype=float)
+    lam = np.broadcast_to(np.asarray(lam, dtype=float), u.shape)
+    k = np.maximum(np.floor(lam + np.sqrt(lam) * ndtri(u)), 0.0)
+
+    # Step up while the CDF at k is still below u
+    todo = np.flatnonzero(pdtr(k, lam) < u)
+    while todo.size:
+        k.flat[todo] += 1
+        todo = todo[pdtr(k.flat[todo], lam.flat[todo]) < u.flat[todo]]
+    # Step down while the CDF at k - 1 already reaches u
+    todo = np.flatnonzero((k > 0) & (pdtr(k - 1, lam) >= u))
+    while todo.size:
+        k.flat[todo] -= 1
+        kt = k.flat[todo]
+        todo = todo[(kt > 0) & (pdtr(kt - 1, lam.flat[todo]) >= u.flat[todo])]
+    return k.astype(np.int64)
+
+
+def fixture_draws(num_sims, n_fixtures, sigma, rng=None, chunk_size=None):
+    """
+    Yield (noise, unif) blocks shaped (n, n_fixtures, 2), one scrambled Sobol
+    point set over 4 * n_fixtures dimensions: noise ~ N(0, sigma), unif ~ U(0, 1).
+    """
+    for u in sobol_uniforms(num_sims, 4 * n_fixtures, rng, chunk_size):
+        u = u.reshape(len(u), n_fixtures, 4)
+        yield sigma * ndtri(u[..., :2]), u[..., 2:]
+
+
+def rqmc(estimate, replicates=16, rng=None):
+    """
+    Randomized QMC estimate: run estimate(rng) for independent scramblings.
+    estimate returns a scalar or array; returns (mean, standard error, per-replicate values).
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    values = np.array([estimate(child) for child in rng.spawn(replicates)], dtype=float)
+    se = values.std(axis=0, ddof=1) / np.sqrt(replicates) if replicates > 1 else np.full(values.shape[1:], np.nan)
+    return values.mean(axis=0), se, values
@@ -0,0 +1,221 @@
+"""
+Importance sampling for rare league events.
+
+Plain simulation of an event like "Ipswich Town champion" returns 0 hits in
+10,000 seasons. Here seasons are simulated under a tilted model in which one
+team (the tilt team) is made stronger or weaker:
+
+    - its form noise is drawn from N(+-theta * sigma, sigma) instead of N(0, sigma)
+    - its goals for / against are Poisson with rates scaled by e^(+-theta) / e^(-+theta)
+
+Every season carries the likelihood ratio of the real model to the tilted one,
+so weighted averages are unbiased estimates under the real model. theta and
+its direction are chosen by a short pilot run that minimizes the estimated
+relative error of the event of interest, among tilts whose weighted hits
+still have a reasonable effective sample size.
+
+    seasons = estimate_event(team_names, att, dfn, params, "Ipswich Town champion")
+"""
+import re
+
+import numpy as np
+
+from src.memory import chunk_size_for
+from src.results_store import SeasonEvents, parse_event
+from src.simulation import SEASON_CHUNK, build_fixtures, fixture_incidence, match_rates, rank_table
+
+# Candidate tilts in units of 1 / sqrt(expected goals in the tilted team's matches),
+# so +-1 moves its season goal difference by about one standard deviation
+PILOT_TILTS = np.linspace(-6, 6, 25)
+PILOT_SIMS = 1000
+MIN_PILOT_ESS = 10
+# Working memory per season and fixture in a chunk, for the memory budget (src/memory.py)
+CHUNK_BYTES_PER_FIXTURE = 125
+
+
+def tilted_seasons(att, dfn, params, num_sims, team, theta, rng=None, fixtures=None, chunk_size=None):
+    """
+    Seasons under the model tilted towards team `team` (index) by theta
+    (> 0 stronger, < 0 weaker). Returns the simulate_seasons dict plus
+    'log_weight': log likelihood ratio real / tilted per season.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    att = np.asarray(att, dtype=float)
+    dfn = np.asarray(dfn, dtype=float)
+    n_teams = len(att)
+    home, away = build_fixtures(n_teams) if fixtures is None else fixtures
+    H, A = fixture_incidence(home, away, n_teams)
+    sigma = params.get('sigma', 0.1)
+
+    # +1 where the tilted team plays at home, -1 away, 0 elsewhere
+    is_home = (home == team).astype(float)
+    is_away = (away == team).astype(float)
+    shift = theta * sigma
+    # Goal-rate multipliers: the tilted team scores e^theta more, concedes e^-theta
+    tilt_home = theta * (is_home - is_away)
+    tilt_away = -tilt_home
+
+    points = np.empty((num_sims, n_teams), dtype=np.int16)
+    gf = np.empty((num_sims, n_teams), dtype=np.int32)
+    ga = np.empty((num_sims, n_teams), dtype=np.int32)
+    log_weight = np.empty(num_sims)
+    if chunk_size is None:
+        chunk_size = chunk_size_for(len(home) * CHUNK_BYTES_PER_FIXTURE, SEASON_CHUNK,
+                                    fixed_bytes=num_sims * (n_teams * 10 + 8))
+
+    for start in range(0, num_sims, chunk_size):
+        n = min(chunk_size, num_sims - start)
+        noise_home = sigma * rng.standard_normal((n, len(home))) + shift * is_home
+        noise_away = sigma * rng.standard_normal((n, len(home))) + shift * is_away
+        lambda_home, lambda_away = match_rates(att[home], dfn[home], att[away], dfn[away],
+                                               noise_home, noise_away, params)
+        gh = rng.poisson(lambda_home * np.exp(tilt_home))
+        g_a = rng.poisson(lambda_away * np.exp(tilt_away))
+
+        # log N(x; 0, s) - log N(x; shift, s) on the tilted team's noise
+        lw = ((shift ** 2 - 2 * shift * noise_home) / (2 * sigma ** 2) * is_home).sum(axis=1)
+        lw += ((shift ** 2 - 2 * shift * noise_away) / (2 * sigma ** 2) * is_away).sum(axis=1)
+        # log Pois(k; lam) - log Pois(k; lam * e^t) = -k t + lam (e^t - 1)
+        lw += (-gh * tilt_home + lambda_home * np.expm1(tilt_home)).sum(axis=1)
+        lw += (-g_a * tilt_away + lambda_away * np.expm1(tilt_away)).sum(axis=1)
+
+        pts_h = 3 * (gh > g_a) + (gh == g_a)
+        pts_a = 3 * (g_a > gh) + (gh == g_a)
+        sl = slice(start, start + n)
+        points[sl] = pts_h @ H + pts_a @ A
+        gf[sl] = gh @ H + g_a @ A
+        ga[sl] = g_a @ H + gh @ A
+        log_weight[sl] = lw
+
+    return {'points': points, 'gf': gf, 'ga': ga, 'positions': rank_table(points, gf),
+            'log_weight': log_weight}
+
+
+class WeightedSeasons(SeasonEvents):
+    """
+    Importance-sampled seasons with the SeasonStore event and query interface,
+    so the same text queries work (see results_store.parse_event).
+    """
+    def __init__(self, team_names, seasons, relegation_spots=3, tilt_team=None, theta=0.0):
+        self.team_names = list(team_names)
+        self.relegation_spots = relegation_spots
+        self.num_sims = seasons['points'].shape[0]
+        self.weights = np.exp(seasons['log_weight'])
+        self.tilt_team = tilt_team
+        self.theta = theta
+        self._seasons = seasons
+        self._team_idx = {name: i for i, name in enumerate(self.team_names)}
+
+    def _idx(self, team):
+        if team not in self._team_idx:
+            raise KeyError(f"Team not found: {team}")
+        return self._team_idx[team]
+
+    def points(self, team):
+        return self._seasons['points'][:, self._idx(team)]
+
+    def positions(self, team):
+        return self._seasons['positions'][:, self._idx(team)]
+
+    def prob(self, event, given=None):
+        """
+        Unbiased P(event) and its standard error. With given, the ratio
+        estimate of P(event | given) with a delta-method standard error.
+        """
+        x = self.weights * event
+        if given is None:
+            return float(x.mean()), float(x.std(ddof=1) / np.sqrt(self.num_sims))
+        y = self.weights * given
+        if y.sum() == 0:
+            return float('nan'), float('nan')
+        x = x * given
+        p = x.sum() / y.sum()
+        resid = x - p * y
+        return float(p), float(np.sqrt(np.sum(resid ** 2)) / y.sum())
+
+    def effective_sample_size(self, event):
+        """Kish effective sample size of the weighted hits."""
+        log_w = self._seasons['log_weight'][np.asarray(event, dtype=bool)]
+        if len(log_w) == 0:
+            return 0.0
+        w = np.exp(log_w - log_w.max())
+        return float(w.sum() ** 2 / np.sum(w ** 2))
+
+
+def tilt_team_for(text, team_names):
+    """First team named in a query (longest names first, so 'Manchester City' beats 'Man')."""
+    best = None
+    for name in sorted(team_names, key=len, reverse=True):
+        m = re.search(re.escape(name), text, flags=re.I)
+        if m and (best is None or m.start() < best[0]):
+            best = (m.start(), name)
+    return best[1] if best else None
+
+
+def tilt_unit(att, dfn, params, team, fixtures=None):
+    """1 / sqrt(expected goals for + against over the team's season), the natural theta scale."""
+    home, away = build_fixtures(len(att)) if fixtures is None else fixtures
+    mine = (home == team) | (away == team)
+    lambda_home, lambda_away = match_rates(att[home][mine], dfn[home][mine], att[away][mine], dfn[away][mine],
+                                           0.0, 0.0, params)
+    return 1.0 / np.sqrt(np.sum(lambda_home + lambda_away))
+
+
+def choose_theta(team_names, att, dfn, params, text, tilt_team, rng, pilot_sims=PILOT_SIMS,
+                 tilts=PILOT_TILTS, relegation_spots=3):
+    """
+    Tilt with the lowest estimated relative error for the event, from a short
+    pilot run per candidate (sign = direction). Candidates whose weighted hits
+    have an effective sample size below MIN_PILOT_ESS are skipped: their error
+    estimate is not trustworthy.
+    """
+    att = np.asarray(att, dtype=float)
+    dfn = np.asarray(dfn, dtype=float)
+    team = list(team_names).index(tilt_team)
+    unit = tilt_unit(att, dfn, params, team)
+    best_theta, best_rel = 0.0, np.inf
+    for tilt in tilts:
+        theta = float(tilt * unit)
+        pilot = WeightedSeasons(team_names, tilted_seasons(att, dfn, params, pilot_sims, team, theta, rng),
+                                relegation_spots)
+        event = parse_event(pilot, text)
+        if pilot.effective_sample_size(event) < MIN_PILOT_ESS:
+            continue
+        p, se = pilot.prob(event)
+        if p > 0 and se / p < best_rel:
+            best_theta, best_rel = theta, se / p
+    return best_theta
+
+
+def estimate_event(team_names, att, dfn, params, text, num_sims=10000, tilt_team=None, theta=None,
+                   rng=None, relegation_spots=3):
+    """
+    Importance-sampling estimate of a text event (results_store.parse_event syntax).
+    tilt_team defaults to the first team named in the query; theta is chosen by a
+    pilot run unless given. Returns a dict with probability, std_error,
+    relative_error, effective_sample_size, theta and tilt_team.
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    tilt_team = tilt_team or tilt_team_for(text, team_names)
+    if tilt_team is None:
+        raise ValueError(f"No team named in query: '{text}'")
+    if theta is None:
+        theta = choose_theta(team_names, att, dfn, params, text, tilt_team, rng,
+                             relegation_spots=relegation_spots)
+
+    team = list(team_names).index(tilt_team)
+    seasons = WeightedSeasons(team_names, tilted_seasons(att, dfn, params, num_sims, team, theta, rng),
+                              relegation_spots, tilt_team, theta)
+    event = parse_event(seasons, text)
+    p, se = seasons.prob(event)
+    return {
+        'query': text,
+        'probability': p,
+        'std_error': se,
+        'relative_error': se / p if p > 0 else float('inf'),
+        'hits': int(np.count_nonzero(event)),
+        'effective_sample_size': seasons.effective_sample_size(event),
+        'num_sims': num_sims,
+        'tilt_team': tilt_team,
+        'theta': theta,
+    }
@@ -0,0 +1,251 @@
+"""
+Compact on-disk store for simulated seasons.
+
+A run is a directory with one .npy file per column, laid out team-major
+(n_teams, n_seasons) so every team's column is contiguous:
+    points.npy (int16), gf.npy (int16), ga.npy (int16), positions.npy (int8), meta.json
+
+Stores are opened memory-mapped, so runs of millions of seasons can be queried
+without loading them into RAM. Events are boolean masks over seasons and combine
+with & | ~, e.g.
+
+    store = SeasonStore.open('output/runs/league_20260110_150000')
+    store.prob(store.above('Arsenal', 'Chelsea') & store.relegated('Tottenham Hotspur'))
+    store.prob(store.champion('Arsenal'), given=store.relegated('Liverpool'))
+"""
+import json
+import os
+import re
+import shutil
+from datetime import datetime
+
+import numpy as np
+
+COLUMNS = {'points': np.int16, 'gf': np.int16, 'ga': np.int16, 'positions': np.int8}
+STORE_VERSION = 1
+RUNS_DIR = 'output/runs'
+# Completed runs kept per prefix; new_run_path deletes older ones
+KEEP_RUNS = 20
+
+
+def _check_range(name, values, dtype):
+    info = np.iinfo(dtype)
+    if values.size and (values.min() < info.min or values.max() > info.max):
+        raise ValueError(f"Column '{name}' does not fit in {np.dtype(dtype).name}")
+
+
+class SeasonStoreWriter:
+    """
+    Pre-allocates memory-mapped columns for num_sims seasons and fills them
+    chunk by chunk, so very large runs never have to sit in memory at once.
+    """
+    def __init__(self, path, team_names, num_sims, params=None, relegation_spots=3, powers=None):
+        if len(team_names) > np.iinfo(np.int8).max:
+            raise ValueError("Too many teams for int8 positions")
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.num_sims = num_sims
+        self.filled = 0
+        self.columns = {
+            name: np.lib.format.open_memmap(os.path.join(path, f'{name}.npy'), mode='w+',
+                                            dtype=dtype, shape=(len(team_names), num_sims))
+            for name, dtype in COLUMNS.items()
+        }
+        self.meta = {
+            'version': STORE_VERSION,
+            'team_names': list(team_names),
+            'num_sims': 0,
+            'relegation_spots': relegation_spots,
+            'params': params,
+            # (attack, defense) per team, so rare events can be re-estimated under the same model
+            'powers': None if powers is None else np.asarray(powers, dtype=float).tolist(),
+            'created': datetime.now().isoformat(timespec='seconds'),
+        }
+
+    def append(self, seasons):
+        """seasons: simulate_seasons output, arrays of shape (n, n_teams)."""
+        n = seasons['points'].shape[0]
+        if self.filled + n > self.num_sims:
+            raise ValueError("More seasons appended than allocated")
+        for name, dtype in COLUMNS.items():
+            values = np.asarray(seasons[name])
+            _check_range(name, values, dtype)
+            self.columns[name][:, self.filled:self.filled + n] = values.T
+        self.filled += n
+
+    def close(self):
+        for col in self.columns.values():
+            col.flush()
+        self.meta['num_sims'] = self.filled
+        with open(os.path.join(self.path, 'meta.json'), 'w') as f:
+            json.dump(self.meta, f, indent=2, default=float)
+        return SeasonStore.open(self.path)
+
+
+class SeasonEvents:
+    """
+    Event masks over seasons. Needs team_names, relegation_spots and the
+    positions(team) / points(team) accessors of the class it is mixed into.
+    """
+    def finishes_between(self, team, best, worst):
+        pos = self.positions(team)
+        return (pos >= best) & (pos <= worst)
+
+    def champion(self, team):
+        return self.positions(team) == 1
+
+    def top(self, team, k):
+        return self.positions(team) <= k
+
+    def relegated(self, team):
+        return self.positions(team) > len(self.team_names) - self.relegation_spots
+
+    def above(self, team, other):
+        return self.positions(team) < self.positions(other)
+
+    def points_at_least(self, team, pts):
+        return self.points(team) >= pts
+
+
+class SeasonStore(SeasonEvents):
+    def __init__(self, path, meta, columns):
+        self.path = path
+        self.meta = meta
+        self.team_names = meta['team_names']
+        self.num_sims = meta['num_sims']
+        self.relegation_spots = meta.get('relegation_spots', 3)
+        self._team_idx = {name: i for i, name in enumerate(self.team_names)}
+        self._columns = columns
+
+    @classmethod
+    def save(cls, path, team_names, seasons, params=None, relegation_spots=3):
+        writer = SeasonStoreWriter(path, team_names, seasons['points'].shape[0], params, relegation_spots)
+        writer.append(seasons)
+        return writer.close()
+
+    @classmethod
+    def open(cls, path):
+        with open(os.path.join(path, 'meta.json'), 'r') as f:
+            meta = json.load(f)
+        if meta.get('version') != STORE_VERSION:
+            raise ValueError(f"Unsupported store version: {meta.get('version')}")
+        n = meta['num_sims']
+        columns = {name: np.load(os.path.join(path, f'{name}.npy'), mmap_mode='r')[:, :n]
+                   for name in COLUMNS}
+        return cls(path, meta, columns)
+
+    # --- Raw columns ---
+    def _idx(self, team):
+        if team not in self._team_idx:
+            raise KeyError(f"Team not in store: {team}")
+        return self._team_idx[team]
+
+    def column(self, name, team):
+        return self._columns[name][self._idx(team)]
+
+    def points(self, team):
+        return self.column('points', team)
+
+    def positions(self, team):
+        return self.column('positions', team)
+
+    # --- Probabilities ---
+    def prob(self, event, given=None):
+        """P(event) or P(event | given), with its standard error."""
+        if given is not None:
+            n = int(np.count_nonzero(given))
+            if n == 0:
+                return float('nan'), float('nan')
+            p = float(np.count_nonzero(event & given) / n)
+        else:
+            n = self.num_sims
+            p = float(np.count_nonzero(event) / n)
+        return p, float(np.sqrt(p * (1 - p) / n))
+
+    def position_matrix(self):
+        """(n_teams, n_teams) probability of each team finishing in each position."""
+        n_teams = len(self.team_names)
+        matrix = np.empty((n_teams, n_teams))
+        for t in range(n_teams):
+            matrix[t] = np.bincount(self._columns['positions'][t], minlength=n_teams + 1)[1:] / self.num_sims
+        return matrix
+
+    def rankings_data(self):
+        """Position counts in the {team: {pos: count}} format of plot_league_heatmap."""
+        matrix = np.rint(self.position_matrix() * self.num_sims).astype(int)
+        return {name: {pos + 1: int(c) for pos, c in enumerate(matrix[t]) if c}
+                for t, name in enumerate(self.team_names)}
+
+
+def new_run_path(prefix='league', runs_dir=RUNS_DIR, keep=KEEP_RUNS):
+    """
+    Create and return a new, empty run directory. Older completed runs with the
+    same prefix are pruned so that at most keep remain, the new one included
+    (keep=None keeps everything).
+    """
+    timestamp = datetime.now().strftime("%Y%m%d_%H%M%S")
+    os.makedirs(runs_dir, exist_ok=True)
+    if keep is not None:
+        prune_runs(max(keep - 1, 0), prefix, runs_dir)
+    path = os.path.join(runs_dir, f'{prefix}_{timestamp}')
+    # Background jobs can start two runs within the same second; makedirs reserves the name atomically
+    suffix = 2
+    while True:
+        try:
+            os.makedirs(path)
+            return path
+        except FileExistsError:
+            path = os.path.join(runs_dir, f'{prefix}_{timestamp}_{suffix}')
+            suffix += 1
+
+
+def list_runs(runs_dir=RUNS_DIR):
+    if not os.path.isdir(runs_dir):
+        return []
+    return sorted(d for d in os.listdir(runs_dir) if os.path.exists(os.path.join(runs_dir, d, 'meta.json')))
+
+
+def prune_runs(keep=KEEP_RUNS, prefix='league', runs_dir=RUNS_DIR):
+    """
+    Delete all but the newest keep completed runs whose name starts with prefix.
+    Runs still being written have no meta.json yet and are left alone.
+    """
+    runs = [d for d in list_runs(runs_dir) if d.startswith(f'{prefix}_')]
+    runs.sort(key=lambda d: os.path.getmtime(os.path.join(runs_dir, d, 'meta.json')))
+    for run in runs[:max(len(runs) - keep, 0)]:
+        shutil.rmtree(os.path.join(runs_dir, run), ignore_errors=True)
+
+
+_CLAUSES = [
+    (re.compile(r'^(.+?) above (.+)$', re.I), lambda s, m: s.above(m[1], m[2])),
+    (re.compile(r'^(.+?) (?:champion|wins?(?: the)? league)$', re.I), lambda s, m: s.champion(m[1])),
+    (re.compile(r'^(.+?) relegated$', re.I), lambda s, m: s.relegated(m[1])),
+    (re.compile(r'^(.+?) top (\d+)$', re.I), lambda s, m: s.top(m[1], int(m[2]))),
+    (re.compile(r'^(.+?) pos (\d+)(?:-(\d+))?$', re.I),
+     lambda s, m: s.finishes_between(m[1], int(m[2]), int(m[3] or m[2]))),
+    (re.compile(r'^(.+?) points >= (\d+)$', re.I), lambda s, m: s.points_at_least(m[1], int(m[2]))),
+]
+
+
+def parse_event(store, text):
+    """
+    Build an event mask from a small text query, clauses joined by ' and ' / ' or ':
+        "Arsenal above Chelsea and Tottenham Hotspur relegated"
+        "Liverpool top 4 or Liverpool points >= 80"
+    Clauses: above, champion, relegated, top <k>, pos <a>[-<b>], points >= <n>.
+    """
+    result = None
+    for or_part in re.split(r'\s+or\s+', text.strip(), flags=re.I):
+        conj = None
+        for clause in re.split(r'\s+and\s+', or_part.strip(), flags=re.I):
+            mask = None
+            for pattern, build in _CLAUSES:
+                m = pattern.match(clause.strip())
+                if m:
+                    mask = build(store, m)
+                    break
+            if mask is None:
+                raise ValueError(f"Could not parse clause: '{clause}'")
+            conj = mask if conj is None else conj & mask
+        result = conj if result is None else result | conj
+    return result
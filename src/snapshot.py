@@ -0,0 +1,125 @@
+"""
+Precompiled model snapshot.
+
+Every tool used to rebuild the model on startup: parse the player CSV, build
+the Team objects, calibrate the league, find the newest tuning file and
+compute the team powers. A snapshot stores the result for one player CSV:
+
+    team names and default XIs, the tuned params, attack / defense powers,
+    and the noise-free scoring rates of every home / away pairing
+
+as one pickle under output/snapshots/. hyperparameter_search.py writes it after
+each tuning run. load_snapshot compares the inputs the snapshot was built from
+(player CSV and tuning file contents, DEFAULT_SIM_PARAMS, SNAPSHOT_VERSION)
+with the current ones and rebuilds it when any of them changed, so a current
+snapshot loads in a few milliseconds and a stale one is never used.
+
+    snapshot = load_snapshot()
+    att, dfn = snapshot.power('Arsenal')
+"""
+import os
+import pickle
+import uuid
+
+import numpy as np
+
+from src.cache import file_hash, make_key
+from src.params import DEFAULT_SIM_PARAMS, TUNING_GLOB, find_latest_tuning_file, load_optimized_params
+
+SNAPSHOT_VERSION = 1
+SNAPSHOT_DIR = 'output/snapshots'
+PLAYER_CSV = 'data/raw/player_stats_2024-25.csv'
+
+
+class ModelSnapshot:
+    """
+    team_names: league order; att, dfn: (n_teams,) powers of the default XIs
+    lineups: {team: default XI player names}; params: tuned sim params
+    rates: (2, n_teams, n_teams) expected home / away goals with team i at home to j
+    """
+    def __init__(self, team_names, lineups, params, att, dfn, rates, player_csv, tuning_file):
+        self.team_names = list(team_names)
+        self.lineups = lineups
+        self.params = params
+        self.att = att
+        self.dfn = dfn
+        self.rates = rates
+        self.player_csv = player_csv
+        self.tuning_file = tuning_file
+        self._index = {name: i for i, name in enumerate(self.team_names)}
+
+    def power(self, team):
+        i = self._index[team]
+        return float(self.att[i]), float(self.dfn[i])
+
+    def expected_goals(self, home, away):
+        """Noise-free (home, away) scoring rates of a fixture."""
+        i, j = self._index[home], self._index[away]
+        return float(self.rates[0, i, j]), float(self.rates[1, i, j])
+
+
+def snapshot_path(player_csv=PLAYER_CSV):
+    return os.path.join(SNAPSHOT_DIR, f"{os.path.splitext(os.path.basename(player_csv))[0]}.pkl")
+
+
+def inputs_key(player_csv=PLAYER_CSV, pattern=TUNING_GLOB):
+    """Key of everything a snapshot is built from; the newest tuning file is found as in load_optimized_params."""
+    tuning_file = find_latest_tuning_file(pattern)
+    return make_key(SNAPSHOT_VERSION, file_hash(player_csv), tuning_file,
+                    file_hash(tuning_file) if tuning_file else None, DEFAULT_SIM_PARAMS), tuning_file
+
+
+def build_snapshot(player_csv=PLAYER_CSV, path=None, pattern=TUNING_GLOB):
+    """Build the model the slow way, write the snapshot atomically and return it."""
+    # Only needed when rebuilding; loading a current snapshot does not import pandas
+    from src.data_loader import load_players_from_csv
+    from src.league import League
+    from src.simulation import match_rates
+
+    path = path or snapshot_path(player_csv)
+    key, tuning_file = inputs_key(player_csv, pattern)
+    params = load_optimized_params(DEFAULT_SIM_PARAMS, pattern, verbose=False)
+    league = League(load_players_from_csv(player_csv))
+    team_names, att, dfn = league.power_arrays(params)
+    rates = np.array(match_rates(att[:, None], dfn[:, None], att[None, :], dfn[None, :], 0, 0, params))
+    data = {
+        'version': SNAPSHOT_VERSION,
+        'key': key,
+        'team_names': team_names,
+        'lineups': {name: [p.name for p in league.teams[name].get_default_11()] for name in team_names},
+        'params': params,
+        'att': att,
+        'dfn': dfn,
+        'rates': rates,
+        'player_csv': player_csv,
+        'tuning_file': tuning_file,
+    }
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'wb') as f:
+        pickle.dump(data, f, protocol=pickle.HIGHEST_PROTOCOL)
+    os.replace(tmp, path)
+    return _from_data(data)
+
+
+def _from_data(data):
+    return ModelSnapshot(data['team_names'], data['lineups'], data['params'], data['att'], data['dfn'],
+                         data['rates'], data['player_csv'], data['tuning_file'])
+
+
+def load_snapshot(player_csv=PLAYER_CSV, path=None, pattern=TUNING_GLOB, verbose=True):
+    """The snapshot for player_csv, rebuilt first if it is missing, from an older version or stale."""
+    path = path or snapshot_path(player_csv)
+    key, tuning_file = inputs_key(player_csv, pattern)
+    try:
+        with open(path, 'rb') as f:
+            data = pickle.load(f)
+        if data.get('version') == SNAPSHOT_VERSION and data.get('key') == key:
+            if verbose:
+                print(f"[INFO] Model snapshot {path} (params from {tuning_file or 'defaults'})")
+            return _from_data(data)
+    except (FileNotFoundError, EOFError, pickle.UnpicklingError, AttributeError):
+        pass
+    if verbose:
+        print(f"[INFO] Inputs changed, rebuilding model snapshot {path}...")
+    return build_snapshot(player_csv, path, pattern)
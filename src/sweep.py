@@ -0,0 +1,116 @@
+"""
+Common-random-number parameter sweeps.
+
+Separate random-search trials each draw fresh noise, so the error difference
+between two neighbouring configs is mostly Monte Carlo noise. sweep_grid
+evaluates a whole grid of flat tuning configs (one or two keys varied, the
+rest from a base config) on the same seasons: the standard-normal form noise
+and the goal uniforms are drawn once per season chunk and reused at every
+grid point, and goals come from the inverse Poisson CDF of those uniforms
+instead of being resampled. A goal count only changes where a rate crosses
+one of its uniform's thresholds, so the error surface is smooth across the
+grid and its differences are meaningful at a few thousand seasons.
+
+    result = sweep_grid(model, GROUND_TRUTH, {'sigma': np.linspace(0.1, 0.35, 11),
+                                              'scaling_factor': np.linspace(500, 2500, 11)})
+    result['error']     # (11, 11)
+"""
+import itertools
+
+import numpy as np
+
+from src.kernels import HAS_NUMBA, poisson_inv
+from src.memory import chunk_size_for
+from src.params import (DEFAULT_SIM_PARAMS, METRIC_WEIGHT_KEYS, POSITION_WEIGHT_KEYS, apply_config,
+                        build_metric_weights, params_to_config)
+from src.power_model import METRIC_DEFAULTS
+from src.qmc import poisson_ppf
+from src.simulation import build_fixtures, fixture_incidence, match_rates
+
+MATCH_KEYS = ('sigma', 'scaling_factor', 'home_adv', 'league_avg_goals')
+SWEEP_KEYS = MATCH_KEYS + tuple(POSITION_WEIGHT_KEYS) + tuple(METRIC_WEIGHT_KEYS)
+SWEEP_SIMS = 2000
+SWEEP_CHUNK = 200
+GRID_BLOCK = 8
+# Working memory per grid point, season and fixture of one block (measured with tracemalloc)
+BYTES_PER_POINT_FIXTURE = 100
+_poisson_inverse = poisson_inv if HAS_NUMBA else poisson_ppf
+
+
+def grid_configs(grid, base_config=None):
+    """Flat configs for every point of the grid ({key: values}), row-major, and the grid shape."""
+    base_config = base_config or params_to_config(DEFAULT_SIM_PARAMS, METRIC_DEFAULTS)
+    unknown = [k for k in grid if k not in SWEEP_KEYS]
+    if unknown:
+        raise ValueError(f"Unknown sweep parameters: {', '.join(unknown)}")
+    keys = list(grid)
+    values = [np.asarray(grid[k], dtype=float) for k in keys]
+    configs = [dict(base_config, **dict(zip(keys, point))) for point in itertools.product(*values)]
+    return configs, tuple(len(v) for v in values)
+
+
+def sweep_grid(model, ground_truth, grid, base_config=None, base_params=None, num_sims=SWEEP_SIMS, rng=None,
+               chunk_size=SWEEP_CHUNK, block_size=None, progress=None):
+    """
+    Expected points and tuning error at every point of a parameter grid, all
+    grid points simulated on the same random numbers in one pass.
+
+    model: TeamPowerModel of the tuning season; ground_truth: rows with 'Points'.
+    grid: {flat tuning key: values}, usually one or two keys.
+    block_size: grid points simulated together; by default as many as fit the memory budget, up to GRID_BLOCK.
+    progress: optional callable(done, total) over season chunks.
+    Returns a dict with
+        keys, values: the grid axes
+        error:  (*grid shape) rank-paired squared error, the compute_error objective
+        points: (*grid shape, n_teams) expected points (model.team_names order)
+    """
+    rng = np.random.default_rng() if rng is None else rng
+    base_params = base_params or DEFAULT_SIM_PARAMS
+    configs, shape = grid_configs(grid, base_config)
+    n_points = len(configs)
+
+    params = [apply_config(base_params, config) for config in configs]
+    powers = [model.powers(p, build_metric_weights(config)) for p, config in zip(params, configs)]
+    att = np.array([a for a, _ in powers])
+    dfn = np.array([d for _, d in powers])
+    # Match parameters per grid point, shaped to broadcast against (points, seasons, fixtures)
+    match = {k: np.array([p[k] for p in params], dtype=float)[:, None, None]
+             for k in MATCH_KEYS}
+
+    n_teams = att.shape[1]
+    home, away = build_fixtures(n_teams)
+    H, A = fixture_incidence(home, away, n_teams)
+    n_fix = len(home)
+    if block_size is None:
+        block_size = chunk_size_for(chunk_size * n_fix * BYTES_PER_POINT_FIXTURE, GRID_BLOCK)
+
+    points = np.zeros((n_points, n_fix, 2))
+    n_chunks = -(-num_sims // chunk_size)
+    for c, start in enumerate(range(0, num_sims, chunk_size)):
+        n = min(chunk_size, num_sims - start)
+        # The same draws for every grid point
+        z = rng.standard_normal((n, n_fix, 2))
+        unif = rng.random((n, n_fix, 2))
+        for lo in range(0, n_points, block_size):
+            g = slice(lo, lo + block_size)
+            block = {k: v[g] for k, v in match.items()}
+            lambda_home, lambda_away = match_rates(
+                att[g][:, None, home], dfn[g][:, None, home], att[g][:, None, away], dfn[g][:, None, away],
+                block['sigma'] * z[..., 0], block['sigma'] * z[..., 1], block)
+            gh = _poisson_inverse(np.broadcast_to(unif[..., 0], lambda_home.shape), lambda_home)
+            ga = _poisson_inverse(np.broadcast_to(unif[..., 1], lambda_away.shape), lambda_away)
+            # Points are linear in the per-fixture results, so season totals are not needed
+            points[g, :, 0] += (3 * (gh > ga) + (gh == ga)).sum(axis=1)
+            points[g, :, 1] += (3 * (ga > gh) + (gh == ga)).sum(axis=1)
+        if progress:
+            progress(c + 1, n_chunks)
+
+    expected = (points[..., 0] @ H + points[..., 1] @ A) / num_sims
+    target = np.sort([row['Points'] for row in ground_truth])[::-1].astype(float)
+    error = np.sum((np.sort(expected, axis=1)[:, ::-1] - target) ** 2, axis=1)
+    return {
+        'keys': list(grid),
+        'values': [np.asarray(grid[k], dtype=float) for k in grid],
+        'error': error.reshape(shape),
+        'points': expected.reshape(shape + (n_teams,)),
+    }
@@ -3,76 +3,126 @@ import seaborn as sns
 import pandas as pd
 import numpy as np
 import os
+import json
+import hashlib
+import concurrent.futures
 
-def ensure_plots_dir():
-    if not os.path.exists('plots'):
-        os.makedirs('plots')
+PLOTS_DIR = 'plots'
 
-def plot_league_heatmap(rankings_data, team_names, filename='league_heatmap.png'):
-    ensure_plots_dir()
+def ensure_plots_dir(plots_dir=PLOTS_DIR):
+    if not os.path.exists(plots_dir):
+        os.makedirs(plots_dir)
+
+def _finish(show):
+    """Show the figure interactively, or just release it in headless mode."""
+    if show:
+        plt.show()
+    else:
+        plt.close('all')
+
+def log_downsample_indices(n, max_points=500):
+    """
+    Indices 0..n-1 spaced evenly on a log scale (always keeps the first and last point).
+    Running averages change fast early and slowly later, so this keeps the shape of
+    a convergence curve with a few hundred points instead of n.
+    """
+    if n <= max_points:
+        return np.arange(n)
+    idx = np.unique(np.geomspace(1, n, max_points).astype(int) - 1)
+    return idx
+
+def plot_league_heatmap(rankings_data, team_names, filename='league_heatmap.png', show=True, plots_dir=PLOTS_DIR):
+    ensure_plots_dir(plots_dir)
     data_matrix = []
     sorted_teams = sorted(team_names) 
+    n_teams = len(sorted_teams)
+    num_sims = 0
     
     for team in sorted_teams:
         row = []
         total_sims = sum(rankings_data[team].values())
+        num_sims = max(num_sims, total_sims)
         if total_sims == 0:
-            row = [0] * 20
+            row = [0] * n_teams
         else:
-            for pos in range(1, 21):
+            for pos in range(1, n_teams + 1):
                 count = rankings_data[team].get(pos, 0)
                 percentage = (count / total_sims) * 100
                 row.append(percentage)
         data_matrix.append(row)
         
-    df = pd.DataFrame(data_matrix, index=sorted_teams, columns=range(1, 21))
+    df = pd.DataFrame(data_matrix, index=sorted_teams, columns=range(1, n_teams + 1))
     df = df.sort_values(by=1, ascending=False)
 
-    plt.figure(figsize=(16, 10))
+    # Scale the figure with the league size (16x10 for 20 teams)
+    plt.figure(figsize=(max(8, 0.8 * n_teams), max(5, 0.5 * n_teams)))
     sns.heatmap(df, annot=True, fmt=".1f", cmap="YlGnBu", cbar_kws={'label': 'Probability (%)'})
-    plt.title("League Position Probabilities (Monte Carlo N=10,000)", fontsize=16)
+    plt.title(f"League Position Probabilities (Monte Carlo N={num_sims:,})", fontsize=16)
     plt.xlabel("League Position", fontsize=12)
     plt.ylabel("Team", fontsize=12)
     plt.tight_layout()
     
-    save_path = os.path.join('plots', filename)
+    save_path = os.path.join(plots_dir, filename)
     plt.savefig(save_path)
     print(f"Heatmap saved to {save_path}")
-    plt.show()
+    _finish(show)
 
-def plot_points_distribution(points_history, team_name, filename=None):
-    ensure_plots_dir()
+def plot_points_distribution(points_history, team_name, filename=None, show=True, plots_dir=PLOTS_DIR, pmf=None):
+    """
+    Histogram of simulated season points, or with pmf (probabilities of 0, 1, 2, ...
+    points, e.g. from src.exact.season_pmfs) the exact distribution, with exact
+    2.5% / 97.5% percentiles instead of the normal approximation.
+    """
+    ensure_plots_dir(plots_dir)
     if filename is None:
         filename = f'{team_name}_points_dist.png'
         
     plt.figure(figsize=(10, 6))
-    sns.histplot(points_history, kde=True, bins=20, color='skyblue', edgecolor='black')
-    
-    mean_pts = np.mean(points_history)
-    std_pts = np.std(points_history)
-    
+    if pmf is None:
+        sns.histplot(points_history, kde=True, bins=20, color='skyblue', edgecolor='black')
+
+        mean_pts = np.mean(points_history)
+        std_pts = np.std(points_history)
+        low, high = mean_pts - 1.96*std_pts, mean_pts + 1.96*std_pts
+        ylabel = "Frequency (Simulations)"
+    else:
+        pmf = np.asarray(pmf, dtype=float)
+        points = np.arange(len(pmf))
+        cdf = np.cumsum(pmf)
+        plt.bar(points, pmf, width=1.0, color='skyblue', edgecolor='black')
+        # The support reaches 3 points per match; only show where there is visible mass
+        visible = np.flatnonzero(pmf > 1e-6)
+        plt.xlim(visible[0] - 1, visible[-1] + 1)
+
+        mean_pts = float(points @ pmf)
+        low, high = np.searchsorted(cdf, 0.025), np.searchsorted(cdf, 0.975)
+        ylabel = "Probability (exact)"
+
     plt.axvline(mean_pts, color='red', linestyle='--', label=f'Mean: {mean_pts:.1f}')
-    plt.axvline(mean_pts + 1.96*std_pts, color='green', linestyle=':', label='95% CI')
-    plt.axvline(mean_pts - 1.96*std_pts, color='green', linestyle=':')
+    plt.axvline(high, color='green', linestyle=':', label='95% CI')
+    plt.axvline(low, color='green', linestyle=':')
     
     plt.title(f"Projected Points Distribution for {team_name}", fontsize=14)
     plt.xlabel("Points", fontsize=12)
-    plt.ylabel("Frequency (Simulations)", fontsize=12)
+    plt.ylabel(ylabel, fontsize=12)
     plt.legend()
     plt.grid(True, alpha=0.3)
     
-    save_path = os.path.join('plots', filename)
+    save_path = os.path.join(plots_dir, filename)
     plt.savefig(save_path)
     print(f"Distribution plot saved to {save_path}")
-    plt.show()
+    _finish(show)
 
-def plot_convergence(h_history, d_history, a_history, h_name, a_name, filename=None):
-    ensure_plots_dir()
+def plot_convergence(h_history, d_history, a_history, h_name, a_name, filename=None, show=True,
+                     plots_dir=PLOTS_DIR, max_points=500):
+    ensure_plots_dir(plots_dir)
     if filename is None:
         filename = f'{h_name}_vs_{a_name}_convergence.png'
 
     N = len(h_history)
     x_axis = np.arange(1, N + 1)
+    # Running stats use every sample, only the plotted points are downsampled
+    keep = log_downsample_indices(N, max_points)
     
     # Prepare data for all 3 outcomes
     outcomes = [
@@ -97,8 +147,8 @@ def plot_convergence(h_history, d_history, a_history, h_name, a_name, filename=N
         
         final_prob = running_means[-1]
 
-        axs[i].plot(x_axis, running_means, color=color, label=f'Est. Probability')
-        axs[i].fill_between(x_axis, lower_bound, upper_bound, color=color, alpha=0.2, label='95% CI')
+        axs[i].plot(x_axis[keep], running_means[keep], color=color, label=f'Est. Probability')
+        axs[i].fill_between(x_axis[keep], lower_bound[keep], upper_bound[keep], color=color, alpha=0.2, label='95% CI')
         axs[i].axhline(y=final_prob, color='black', linestyle='--', linewidth=1, label=f'Final: {final_prob:.3f}')
         
         axs[i].set_ylabel("Probability", fontsize=10)
@@ -113,8 +163,88 @@ def plot_convergence(h_history, d_history, a_history, h_name, a_name, filename=N
     plt.xlabel("Number of Simulations (N)", fontsize=12)
     plt.tight_layout(rect=[0, 0.03, 1, 0.95]) # Make room for suptitle
     
-    save_path = os.path.join('plots', filename)
+    save_path = os.path.join(plots_dir, filename)
     save_path = "".join(save_path.split())
     plt.savefig(save_path)
     print(f"Convergence plot saved to {save_path}")
-    plt.show()
+    _finish(show)
+
+
+# ============================================================================
+# BATCH (HEADLESS) RENDERING
+# ============================================================================
+
+PLOT_FUNCTIONS = {
+    'heatmap': plot_league_heatmap,
+    'points': plot_points_distribution,
+    'convergence': plot_convergence,
+}
+
+MANIFEST_FILE = '.render_manifest.json'
+
+def hash_plot_inputs(*parts):
+    """Content hash of a plot's inputs (arrays by their bytes, everything else as JSON)."""
+    h = hashlib.sha1()
+    for part in parts:
+        if isinstance(part, np.ndarray):
+            h.update(part.dtype.str.encode())
+            h.update(np.ascontiguousarray(part).tobytes())
+        else:
+            h.update(json.dumps(part, sort_keys=True, default=str).encode())
+    return h.hexdigest()
+
+def _init_headless():
+    plt.switch_backend('Agg')
+
+def _render_job(job):
+    _init_headless()
+    PLOT_FUNCTIONS[job['kind']](*job['args'], filename=job['filename'], show=False,
+                                plots_dir=job['plots_dir'], **job.get('kwargs', {}))
+    return job['filename']
+
+def render_batch(jobs, plots_dir=PLOTS_DIR, max_workers=None, force=False):
+    """
+    Render many plots in parallel worker processes with the Agg backend.
+
+    jobs: list of {'kind': 'heatmap' | 'points' | 'convergence', 'args': (...),
+                   'filename': str, 'kwargs': {...}}
+    Figures whose input hash matches the manifest from a previous run (and whose
+    file still exists) are skipped unless force=True.
+    """
+    ensure_plots_dir(plots_dir)
+    manifest_path = os.path.join(plots_dir, MANIFEST_FILE)
+    manifest = {}
+    if os.path.exists(manifest_path):
+        with open(manifest_path, 'r') as f:
+            manifest = json.load(f)
+
+    todo, skipped = [], []
+    for job in jobs:
+        job = dict(job, plots_dir=plots_dir)
+        digest = hash_plot_inputs(job['kind'], list(job['args']), job.get('kwargs', {}))
+        out_file = "".join(os.path.join(plots_dir, job['filename']).split())
+        if not force and manifest.get(job['filename']) == digest and os.path.exists(out_file):
+            skipped.append(job['filename'])
+        else:
+            todo.append((job, digest))
+
+    rendered = []
+    if todo:
+        with concurrent.futures.ProcessPoolExecutor(max_workers=max_workers, initializer=_init_headless) as executor:
+            futures = {executor.submit(_render_job, job): (job, digest) for job, digest in todo}
+            for future in concurrent.futures.as_completed(futures):
+                job, digest = futures[future]
+                try:
+                    future.result()
+                except Exception as e:
+                    print(f"[ERROR] Failed to render {job['filename']}: {e}")
+                    manifest.pop(job['filename'], None)
+                    continue
+                manifest[job['filename']] = digest
+                rendered.append(job['filename'])
+
+    with open(manifest_path, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+
+    print(f"Rendered {len(rendered)} plots, skipped {len(skipped)} unchanged.")
+    return {'rendered': rendered, 'skipped': skipped}
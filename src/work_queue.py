@@ -0,0 +1,168 @@
+"""
+Shared-directory lease queue.
+
+A queue is a directory every machine can reach (NFS/SMB mount, synced folder,
+or just a local path for several processes on one host):
+
+    queue_dir/
+        job.json            job description written by the coordinator
+        pending/<id>.json   batches waiting for a worker
+        leased/<id>.json    batches a worker is running; mtime is the heartbeat
+        done/<id>.json      results, written atomically
+        FINISHED            present once the coordinator has merged everything
+
+Claiming a batch is an os.rename from pending/ to leased/, which is atomic, so
+two workers can never take the same batch. A worker that disconnects stops
+touching its lease; the coordinator moves leases older than the timeout back
+to pending/ and another worker picks them up. Results are keyed by batch id, so
+a late duplicate from a worker that was presumed dead is harmless.
+"""
+import json
+import os
+import socket
+import time
+import uuid
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+JOB_FILE = 'job.json'
+FINISHED_FILE = 'FINISHED'
+
+
+def _write_json_atomic(path, data, **kwargs):
+    tmp = f"{path}.{uuid.uuid4().hex}.tmp"
+    with open(tmp, 'w') as f:
+        json.dump(data, f, **kwargs)
+    os.replace(tmp, path)
+
+
+def default_worker_id():
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class Lease:
+    def __init__(self, queue, batch_id, payload):
+        self.queue = queue
+        self.batch_id = batch_id
+        self.payload = payload
+        self.path = queue._path(LEASED, batch_id)
+
+    def heartbeat(self):
+        """Refresh the lease. Returns False if the coordinator took it back."""
+        try:
+            os.utime(self.path)
+            return True
+        except FileNotFoundError:
+            return False
+
+    def complete(self, result):
+        _write_json_atomic(self.queue._path(DONE, self.batch_id), result, **self.queue.json_kwargs)
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+
+
+class WorkQueue:
+    def __init__(self, path, json_kwargs=None):
+        self.path = path
+        self.json_kwargs = json_kwargs or {}
+
+    def _path(self, state, batch_id=None):
+        if batch_id is None:
+            return os.path.join(self.path, state)
+        return os.path.join(self.path, state, f"{batch_id}.json")
+
+    def _ids(self, state):
+        try:
+            names = os.listdir(self._path(state))
+        except FileNotFoundError:
+            return []
+        return sorted(n[:-5] for n in names if n.endswith('.json'))
+
+    def exists(self):
+        return os.path.exists(os.path.join(self.path, JOB_FILE))
+
+    # ---------------- Coordinator side ----------------
+
+    def create(self, job, batches):
+        """Write the job description and one pending file per batch."""
+        if self.exists():
+            raise FileExistsError(f"Queue already exists: {self.path}")
+        for state in (PENDING, LEASED, DONE):
+            os.makedirs(self._path(state), exist_ok=True)
+        batch_ids = []
+        for i, batch in enumerate(batches):
+            batch_id = f"batch_{i:05d}"
+            _write_json_atomic(self._path(PENDING, batch_id), batch, **self.json_kwargs)
+            batch_ids.append(batch_id)
+        _write_json_atomic(os.path.join(self.path, JOB_FILE),
+                           dict(job, batch_ids=batch_ids), **self.json_kwargs)
+        return batch_ids
+
+    def requeue_expired(self, timeout):
+        """Move leases without a heartbeat for `timeout` seconds back to pending."""
+        now = time.time()
+        requeued = []
+        for batch_id in self._ids(LEASED):
+            path = self._path(LEASED, batch_id)
+            try:
+                expired = now - os.path.getmtime(path) > timeout
+                if expired and not os.path.exists(self._path(DONE, batch_id)):
+                    os.rename(path, self._path(PENDING, batch_id))
+                    requeued.append(batch_id)
+                elif expired:
+                    os.remove(path)
+            except FileNotFoundError:
+                # Completed or released in the meantime
+                continue
+        return requeued
+
+    def results(self, skip=()):
+        """{batch_id: result} for finished batches not in skip."""
+        out = {}
+        for batch_id in self._ids(DONE):
+            if batch_id in skip:
+                continue
+            try:
+                with open(self._path(DONE, batch_id)) as f:
+                    out[batch_id] = json.load(f)
+            except (FileNotFoundError, json.JSONDecodeError):
+                continue
+        return out
+
+    def counts(self):
+        return {state: len(self._ids(state)) for state in (PENDING, LEASED, DONE)}
+
+    def mark_finished(self):
+        open(os.path.join(self.path, FINISHED_FILE), 'w').close()
+
+    # ---------------- Worker side ----------------
+
+    def job(self):
+        with open(os.path.join(self.path, JOB_FILE)) as f:
+            return json.load(f)
+
+    def is_finished(self):
+        return os.path.exists(os.path.join(self.path, FINISHED_FILE))
+
+    def claim(self):
+        """Lease the next pending batch, or None if there is nothing to do right now."""
+        for batch_id in self._ids(PENDING):
+            src = self._path(PENDING, batch_id)
+            dst = self._path(LEASED, batch_id)
+            try:
+                os.rename(src, dst)
+            except FileNotFoundError:
+                # Another worker won the race for this batch
+                continue
+            try:
+                os.utime(dst)
+                with open(dst) as f:
+                    payload = json.load(f)
+            except FileNotFoundError:
+                # Requeued before we could read it; leave it to the next claim
+                continue
+            return Lease(self, batch_id, payload)
+        return None